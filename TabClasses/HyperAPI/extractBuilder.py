@@ -0,0 +1,177 @@
+import atexit
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+import time
+
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource, infer_sql_types
+
+_worker_pool = None
+
+
+def _init_worker(hyper_parameters):
+    """
+    Starts the connection pool of a worker process.
+
+    Parameters:
+        hyper_parameters (dict): Parameters for the worker's Hyper process.
+    """
+    global _worker_pool
+    _worker_pool = HyperConnectionPool(max_connections_per_database=1, parameters=hyper_parameters)
+    atexit.register(_worker_pool.close)
+
+
+def _append_source(ds, table_name, source):
+    """
+    Appends a source to a table with the fastest ingestion path for its type.
+
+    Parameters:
+        ds (TableauDataSource): The data source to write to.
+        table_name (str): The name of the table.
+        source: A CSV/Parquet path, a DataFrame, Arrow table or dict of NumPy arrays, or an iterable of tuples.
+
+    Returns:
+        int: The number of rows appended.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return ds.append_stream(table_name, source)
+    if isinstance(source, dict) or hasattr(source, 'schema') or hasattr(source, 'dtypes'):
+        return ds.append_dataframe(table_name, source)
+    return ds.bulk_append_rows(table_name, source)
+
+
+def _build_file(path, tables, pool=None, progress=None):
+    """
+    Creates and fills every table of one .hyper file.
+
+    Tables of one file are filled one after another on a single connection.
+
+    Parameters:
+        path (str): The path to the .hyper file.
+        tables (list of dict): The manifest entries for the file.
+        pool (HyperConnectionPool): The pool to take the connection from, or None for the worker's pool.
+        progress (callable): Called with the result of each table as soon as it is built.
+
+    Returns:
+        list of dict: One result per table with its row count, timing and error, if any.
+    """
+    results = []
+    with TableauDataSource(path, pool=pool or _worker_pool) as ds:
+        for entry in tables:
+            table_name = entry['table']
+            start = time.perf_counter()
+            result = {'path': path, 'table': table_name, 'rows': 0, 'seconds': 0.0, 'error': None}
+            try:
+                if not ds.has_table(table_name):
+                    ds.create_table(table_name, entry.get('columns') or infer_sql_types(entry['source']))
+                result['rows'] = _append_source(ds, table_name, entry['source'])
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['seconds'] = time.perf_counter() - start
+            results.append(result)
+            if progress is not None:
+                try:
+                    progress(result)
+                except Exception as e:
+                    print(f"Warning: Progress callback failed: {type(e).__name__}: {e}")
+    return results
+
+
+class ExtractBuilder:
+    """
+    A class for building many .hyper extracts concurrently.
+    """
+
+    def __init__(self, max_workers=None, executor='thread', progress=None, hyper_parameters=None):
+        """
+        Constructor for the ExtractBuilder class.
+
+        Parameters:
+            max_workers (int): The maximum number of files built at the same time. Defaults to the number of CPUs.
+            executor (str): 'thread' to share one Hyper process between worker threads, or 'process' to build
+                in worker processes with one Hyper process each. Sources must be picklable with 'process'.
+            progress (callable): Called with the result dict of each table as soon as it is built. With 'thread'
+                it is called from the worker threads, with 'process' from the thread that called build.
+            hyper_parameters (dict): Parameters for the Hyper process, e.g. {'log_config': ''}.
+        """
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unsupported executor {executor}. Expected 'thread' or 'process'.")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self.progress = progress
+        self.hyper_parameters = hyper_parameters
+
+    def build(self, manifest):
+        """
+        Builds every table in the manifest, running different files in parallel.
+
+        Each manifest entry is a dict with the keys:
+            path (str): The .hyper file to write.
+            table (str): The table to create and fill.
+            source: A CSV/Parquet path, a DataFrame, Arrow table or dict of NumPy arrays, or an iterable of tuples.
+            columns (dict, optional): Column names to SqlType. Inferred for columnar sources when omitted.
+
+        Parameters:
+            manifest (list of dict): The tables to build.
+
+        Returns:
+            list of dict: One result per table with 'path', 'table', 'rows', 'seconds' and 'error'.
+        """
+        files = {}
+        for entry in manifest:
+            files.setdefault(os.path.abspath(entry['path']), []).append(entry)
+
+        results = []
+        manager = None
+        progress_queue = None
+        if self.executor == 'thread':
+            pool = HyperConnectionPool(max_connections_per_database=1, parameters=self.hyper_parameters)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            report = self.progress
+        else:
+            pool = None
+            context = multiprocessing.get_context('spawn')
+            # Forked workers would inherit the parent's Hyper sockets, so start them fresh
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                              initializer=_init_worker,
+                                                              initargs=(self.hyper_parameters,))
+            report = None
+            if self.progress is not None:
+                # workers send each table result back through a queue the parent drains while they run
+                manager = context.Manager()
+                progress_queue = manager.Queue()
+                report = progress_queue.put
+
+        try:
+            with executor:
+                futures = [executor.submit(_build_file, path, tables, pool, report) for path, tables in files.items()]
+                pending = set(futures)
+                while pending:
+                    done, pending = concurrent.futures.wait(pending, timeout=0.1 if progress_queue else None,
+                                                            return_when=concurrent.futures.FIRST_COMPLETED)
+                    if progress_queue is not None:
+                        self._drain(progress_queue)
+                    for future in done:
+                        results.extend(future.result())
+        finally:
+            if pool is not None:
+                pool.close()
+            if manager is not None:
+                manager.shutdown()
+        return results
+
+    def _drain(self, progress_queue):
+        """
+        Reports every result waiting in the progress queue of the worker processes.
+        """
+        while True:
+            try:
+                result = progress_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.progress(result)
+            except Exception as e:
+                print(f"Warning: Progress callback failed: {type(e).__name__}: {e}")
@@ -0,0 +1,299 @@
+import os
+import time
+import uuid
+
+import tableauhyperapi as tab_api
+
+from TabClasses.HyperAPI.hyperQuery import _replace_table
+
+# uncompressed bytes per value of the fixed-width types
+_TYPE_WIDTHS = {
+    tab_api.TypeTag.BOOL: 1,
+    tab_api.TypeTag.SMALL_INT: 2,
+    tab_api.TypeTag.INT: 4,
+    tab_api.TypeTag.BIG_INT: 8,
+    tab_api.TypeTag.DOUBLE: 8,
+    tab_api.TypeTag.DATE: 4,
+    tab_api.TypeTag.TIME: 8,
+    tab_api.TypeTag.TIMESTAMP: 8,
+    tab_api.TypeTag.TIMESTAMP_TZ: 8,
+    tab_api.TypeTag.NUMERIC: 8,
+}
+_TEXT_TAGS = (tab_api.TypeTag.TEXT, tab_api.TypeTag.VARCHAR, tab_api.TypeTag.CHAR)
+_INTEGER_TAGS = (tab_api.TypeTag.SMALL_INT, tab_api.TypeTag.INT, tab_api.TypeTag.BIG_INT)
+_SQL_NAMES = {
+    tab_api.TypeTag.SMALL_INT: 'SMALLINT',
+    tab_api.TypeTag.INT: 'INTEGER',
+    tab_api.TypeTag.BIG_INT: 'BIGINT',
+    tab_api.TypeTag.DOUBLE: 'DOUBLE PRECISION',
+}
+# the narrowest integer type whose range holds the values, from narrowest to widest
+_INTEGER_RANGES = [
+    (tab_api.SqlType.small_int(), -2 ** 15, 2 ** 15 - 1),
+    (tab_api.SqlType.int(), -2 ** 31, 2 ** 31 - 1),
+    (tab_api.SqlType.big_int(), -2 ** 63, 2 ** 63 - 1),
+]
+
+
+def _sql_name(sql_type):
+    return _SQL_NAMES.get(sql_type.tag, str(sql_type))
+
+
+def _narrowest_integer(minimum, maximum):
+    for sql_type, low, high in _INTEGER_RANGES:
+        if low <= minimum and maximum <= high:
+            return sql_type
+    return None
+
+
+class TableOptimizer:
+    """
+    Analyzes the columns of a table and rewrites it with narrower types and a clustering sort order.
+
+    Hyper stores tables in compressed blocks and skips blocks whose min/max
+    range does not match a filter. Sorting by the columns queries filter on,
+    starting with the ones with the fewest distinct values, makes those
+    ranges tight and long runs of equal values compress well. Narrower types
+    make every block smaller.
+    """
+
+    def __init__(self, datasource):
+        """
+        Constructor for the TableOptimizer class.
+
+        Parameters:
+            datasource (TableauDataSource): The data source containing the tables.
+        """
+        self.datasource = datasource
+
+    def analyze(self, table_name, sample_size=100000):
+        """
+        Collects statistics and type recommendations for every column of a table.
+
+        Distinct counts, null rates and sizes are estimated from a random sample of about
+        sample_size rows. The value ranges that type recommendations rely on are computed
+        over the whole table, so a recommended type always holds every value.
+
+        Parameters:
+            table_name (str): The name of the table.
+            sample_size (int): The approximate number of rows sampled.
+
+        Returns:
+            list of dict: One dict per column with 'column', 'type', 'distinct' (estimated), 'distinct_ratio',
+            'null_rate', 'avg_bytes' (uncompressed), 'min', 'max' and 'recommended_type', a narrower
+            tab_api.SqlType or None.
+        """
+        self.datasource.connect()
+        return self._analyze(self.datasource._get_table_definition(table_name), sample_size)
+
+    def _analyze(self, table_definition, sample_size):
+        """
+        Collects the statistics of analyze for a table definition, which may belong to an attached database.
+        """
+        if sample_size < 1:
+            raise ValueError("sample_size must be positive.")
+        connection = self.datasource.connection
+        table = table_definition.table_name
+        row_count = connection.execute_scalar_query(f"SELECT COUNT(*) FROM {table}")
+        sample = f"{table} TABLESAMPLE BERNOULLI ({min(100.0, 100.0 * sample_size / row_count)})" \
+            if row_count > sample_size else str(table)
+
+        sample_expressions = []
+        full_expressions = []
+        for column in table_definition.columns:
+            name = tab_api.escape_name(column.name.unescaped)
+            sample_expressions += [f"COUNT(*) - COUNT({name})", f"APPROX_COUNT_DISTINCT({name})"]
+            sample_expressions.append(f"AVG(OCTET_LENGTH({name}))" if column.type.tag in _TEXT_TAGS else "NULL")
+            full_expressions += [f"MIN({name})", f"MAX({name})"]
+            if column.type.tag == tab_api.TypeTag.DOUBLE:
+                full_expressions.append(f"COUNT(*) FILTER (WHERE {name} <> FLOOR({name}))")
+            elif column.type.tag == tab_api.TypeTag.TIMESTAMP:
+                full_expressions.append(f"COUNT(*) FILTER (WHERE CAST({name} AS TIME) <> TIME '00:00:00')")
+            else:
+                full_expressions.append("NULL")
+        sample_values = connection.execute_list_query(
+            f"SELECT COUNT(*), {', '.join(sample_expressions)} FROM {sample}")[0]
+        full_values = connection.execute_list_query(f"SELECT {', '.join(full_expressions)} FROM {table}")[0]
+
+        sampled_rows = sample_values[0]
+        stats = []
+        for i, column in enumerate(table_definition.columns):
+            nulls, distinct, avg_text_bytes = sample_values[1 + 3 * i:4 + 3 * i]
+            minimum, maximum, mismatches = full_values[3 * i:3 * i + 3]
+            stats.append({
+                'column': column.name.unescaped,
+                'type': column.type,
+                'distinct': distinct,
+                'distinct_ratio': distinct / sampled_rows if sampled_rows else 0.0,
+                'null_rate': nulls / sampled_rows if sampled_rows else 0.0,
+                'avg_bytes': float(avg_text_bytes or 0) if column.type.tag in _TEXT_TAGS
+                else _TYPE_WIDTHS.get(column.type.tag),
+                'min': minimum,
+                'max': maximum,
+                'recommended_type': self._recommend_type(column.type, minimum, maximum, mismatches),
+            })
+        return stats
+
+    @staticmethod
+    def _recommend_type(sql_type, minimum, maximum, mismatches):
+        """
+        Returns a narrower type that holds every value of a column, or None.
+        """
+        if minimum is None:
+            return None
+        if sql_type.tag in _INTEGER_TAGS:
+            narrower = _narrowest_integer(minimum, maximum)
+            return narrower if narrower is not None and narrower.tag != sql_type.tag \
+                and _TYPE_WIDTHS[narrower.tag] < _TYPE_WIDTHS[sql_type.tag] else None
+        if sql_type.tag == tab_api.TypeTag.DOUBLE and mismatches == 0:
+            # whole numbers stored as doubles
+            narrower = _narrowest_integer(minimum, maximum)
+            return narrower if narrower is not None and narrower.tag != tab_api.TypeTag.BIG_INT else None
+        if sql_type.tag == tab_api.TypeTag.TIMESTAMP and mismatches == 0:
+            # timestamps that are all at midnight
+            return tab_api.SqlType.date()
+        return None
+
+    @staticmethod
+    def recommend_sort_key(stats, filter_columns=(), max_columns=3, max_distinct_ratio=0.1):
+        """
+        Recommends a clustering sort key from the statistics returned by analyze.
+
+        Columns that queries filter on come first, in the given order. They are followed by the
+        columns with the fewest distinct values. Columns that are nearly unique do not form runs
+        and are left out.
+
+        Parameters:
+            stats (list of dict): The result of analyze.
+            filter_columns (list of str): Columns most queries filter on, e.g. a date column.
+            max_columns (int): The maximum number of columns in the sort key.
+            max_distinct_ratio (float): The largest ratio of distinct values to rows of a column added
+                for its cardinality.
+
+        Returns:
+            list of str: The columns of the sort key.
+        """
+        names = {entry['column'] for entry in stats}
+        unknown = [column for column in filter_columns if column not in names]
+        if unknown:
+            raise ValueError(f"Filter columns {unknown} do not exist in the table.")
+        sort_key = list(filter_columns)[:max_columns]
+        candidates = sorted((entry for entry in stats
+                             if entry['column'] not in sort_key and entry['distinct']
+                             and entry['distinct_ratio'] <= max_distinct_ratio),
+                            key=lambda entry: entry['distinct'])
+        for entry in candidates[:max_columns - len(sort_key)]:
+            sort_key.append(entry['column'])
+        return sort_key
+
+    def report(self, table_name, sample_size=100000, filter_columns=()):
+        """
+        Analyzes a table and recommends types and a sort key.
+
+        Parameters:
+            table_name (str): The name of the table.
+            sample_size (int): The approximate number of rows sampled.
+            filter_columns (list of str): Columns most queries filter on.
+
+        Returns:
+            dict: 'table', 'rows', 'file_bytes', 'columns' (the result of analyze), 'types' (the recommended
+            type per column that can be narrowed) and 'sort_key'.
+        """
+        stats = self.analyze(table_name, sample_size=sample_size)
+        table = self.datasource._get_table_definition(table_name).table_name
+        return {
+            'table': table_name,
+            'rows': self.datasource.connection.execute_scalar_query(f"SELECT COUNT(*) FROM {table}"),
+            'file_bytes': os.path.getsize(self.datasource.datasource_path)
+            if os.path.exists(self.datasource.datasource_path) else None,
+            'columns': stats,
+            'types': {entry['column']: entry['recommended_type'] for entry in stats
+                      if entry['recommended_type'] is not None},
+            'sort_key': self.recommend_sort_key(stats, filter_columns=filter_columns),
+        }
+
+    def optimize(self, table_name, sort_key=None, types=None, source_database=None):
+        """
+        Rewrites a table in sort_key order and with new column types using CREATE TABLE AS ... ORDER BY.
+
+        Without source_database the table is rewritten in place: the new table is created next to
+        it and takes the name of the old one, which is dropped last. If the swap fails, the old table
+        keeps its name and the new one is dropped. Hyper does not shrink the file when a table
+        is dropped. To get a compact file, build into a ShadowExtract created with clone=False and pass
+        the original file as source_database, so the table is copied from it in its new order.
+
+        Parameters:
+            table_name (str): The name of the table.
+            sort_key (list of str): The columns to sort by. Defaults to the recommended sort key.
+            types (dict): The new tab_api.SqlType per column name, e.g. the 'types' of report. Columns that are
+                not given keep their type. Changing a type can change query results, e.g. of a timestamp
+                column narrowed to a date, so types are only changed when asked for.
+            source_database (str): The path of a .hyper file to read the table from.
+
+        Returns:
+            dict: The 'sort_key' and 'types' that were applied.
+        """
+        self.datasource.connect()
+        connection = self.datasource.connection
+        alias = None
+        if source_database is not None:
+            # with a second database attached, names have to be qualified with their database
+            target = tab_api.TableName(connection.execute_scalar_query("SELECT current_database()"), 'public',
+                                       table_name)
+            alias = f"source_{uuid.uuid4().hex}"
+            connection.catalog.attach_database(os.path.abspath(source_database), alias)
+        try:
+            source = tab_api.TableName(alias, 'public', table_name) if alias else tab_api.TableName(table_name)
+            source_definition = connection.catalog.get_table_definition(source)
+            if sort_key is None:
+                sort_key = self.recommend_sort_key(self._analyze(source_definition, 100000))
+            types = types or {}
+            columns = [column.name.unescaped for column in source_definition.columns]
+            unknown = [column for column in list(sort_key) + list(types) if column not in columns]
+            if unknown:
+                raise ValueError(f"Columns {unknown} do not exist in table {table_name}.")
+
+            select = ', '.join(
+                f"CAST({tab_api.escape_name(column)} AS {_sql_name(types[column])}) AS {tab_api.escape_name(column)}"
+                if column in types else tab_api.escape_name(column) for column in columns)
+            order_by = f" ORDER BY {', '.join(tab_api.escape_name(column) for column in sort_key)}" if sort_key else ''
+            with self.datasource.metrics.timer('hyper.optimize', table=table_name) as timer:
+                if alias:
+                    if connection.catalog.has_table(target):
+                        raise ValueError(f"Table {table_name} already exists in the data source.")
+                    timer.rows = connection.execute_command(
+                        f"CREATE TABLE {target} AS SELECT {select} FROM {source}{order_by}")
+                else:
+                    staging = tab_api.TableName(f"optimized_{uuid.uuid4().hex}")
+                    timer.rows = connection.execute_command(
+                        f"CREATE TABLE {staging} AS SELECT {select} FROM {source}{order_by}")
+                    _replace_table(connection, table_name, staging)
+        finally:
+            if alias:
+                connection.catalog.detach_database(alias)
+        self.datasource.refresh_metadata(table_name)
+        return {'sort_key': list(sort_key), 'types': dict(types)}
+
+    def benchmark(self, queries, repeat=5):
+        """
+        Times queries against the data source, e.g. before and after optimize.
+
+        Parameters:
+            queries (dict): SQL queries by name.
+            repeat (int): The number of runs per query. The fastest run is reported.
+
+        Returns:
+            dict: The fastest time in seconds per query name.
+        """
+        self.datasource.connect()
+        timings = {}
+        for name, query in queries.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self.datasource.connection.execute_list_query(query)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+        return timings
+
@@ -0,0 +1,228 @@
+import os
+import shutil
+import sys
+import time
+import uuid
+
+from TabClasses.HyperAPI.hyperPool import get_default_pool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl of Linux filesystems with shared extents (Btrfs, XFS, OCFS2) that makes a copy-on-write clone
+_FICLONE = 0x40049409
+
+
+def clone_file(source, destination):
+    """
+    Copies a file as cheaply as the filesystem allows.
+
+    On filesystems with copy-on-write support the destination shares every
+    block with the source until one of them is written, so the copy takes
+    constant time and no extra space. Otherwise the kernel copies the data
+    without passing it through Python.
+
+    Parameters:
+        source (str): The path of the file to copy.
+        destination (str): The path of the copy. An existing file is replaced.
+
+    Returns:
+        str: How the file was copied: 'reflink', 'copy_file_range' or 'copy'.
+    """
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        if fcntl is not None and sys.platform.startswith('linux'):
+            try:
+                fcntl.ioctl(dst.fileno(), getattr(fcntl, 'FICLONE', _FICLONE), src.fileno())
+                return 'reflink'
+            except OSError:
+                pass
+        if hasattr(os, 'copy_file_range'):
+            try:
+                # lets filesystems such as XFS or NFS share or copy extents on the server side
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return 'copy_file_range'
+            except OSError:
+                pass
+            src.seek(0)
+            dst.seek(0)
+            dst.truncate()
+    shutil.copyfile(source, destination)
+    return 'copy'
+
+
+def snapshot(path, snapshot_path=None, pool=None, hard_link=False):
+    """
+    Takes a read-only snapshot of a .hyper file.
+
+    The snapshot is an independent copy made with clone_file, so it costs no
+    space until one of the files changes on filesystems with copy-on-write
+    support. Later writes to the file, in place or through ShadowExtract,
+    do not change the snapshot.
+
+    With hard_link, the snapshot is a hard link that shares its inode with the
+    file. It then only keeps the old version as long as the file is replaced
+    by ShadowExtract and never written in place, e.g. by
+    TableauDataSource.bulk_append_rows.
+
+    Only changes on disk are included, so every connection to the file must
+    be released first.
+
+    Parameters:
+        path (str): The path to the .hyper file.
+        snapshot_path (str): The path of the snapshot. Defaults to the file name with a timestamp.
+        pool (HyperConnectionPool): The pool whose idle connections to the file are closed first.
+            Defaults to the process-wide pool.
+        hard_link (bool): Link the snapshot to the file instead of copying it, see above.
+
+    Returns:
+        str: The path of the snapshot.
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"File {path} does not exist.")
+    if snapshot_path is None:
+        root, extension = os.path.splitext(path)
+        snapshot_path = f"{root}.{time.strftime('%Y%m%dT%H%M%S')}.{uuid.uuid4().hex[:8]}{extension}"
+    _detach_file(path, pool)
+    if hard_link:
+        os.link(path, snapshot_path)
+    else:
+        clone_file(path, snapshot_path)
+    return snapshot_path
+
+
+def _detach_file(path, pool):
+    """
+    Closes the idle connections to a file so Hyper writes it out, and fails if any connection is still in use.
+
+    A connection in use may hold changes that are not on disk yet, so copying the file would miss them.
+    """
+    in_use = (pool or get_default_pool()).discard(path)
+    if in_use:
+        raise ValueError(f"{in_use} connections to {path} are still in use. Release them before copying the file.")
+
+
+class ShadowExtract:
+    """
+    Builds a new version of a .hyper file next to it and swaps it in atomically.
+
+    Changes go to a shadow file in the same directory, which starts as a
+    clone of the current file so unchanged tables are not rebuilt. On
+    filesystems with copy-on-write support the clone shares their blocks.
+    commit detaches the shadow file, flushes it to disk and renames it over
+    the original. Readers see either the old or the new file, never a partial
+    one, and are not blocked while the shadow file is built. Connections
+    that are still reading the old file keep seeing it. In the same Hyper
+    process, new connections see the new file once every connection to the
+    old one is released.
+    """
+
+    def __init__(self, path, pool=None, clone=True, metrics=None):
+        """
+        Constructor for the ShadowExtract class.
+
+        Parameters:
+            path (str): The path of the .hyper file to replace.
+            pool (HyperConnectionPool): The pool to take connections from. Defaults to the process-wide pool.
+            clone (bool): Start from a clone of the current file. False builds the new version from an empty file.
+            metrics (MetricsRegistry): The registry the operations of the data source are recorded in.
+        """
+        self.path = os.path.abspath(path)
+        self.pool = pool
+        self.clone = clone
+        self.metrics = metrics
+        directory, name = os.path.split(self.path)
+        self.shadow_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.shadow.hyper")
+        self.clone_method = None
+        self.datasource = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def open(self):
+        """
+        Creates the shadow file and returns a data source on it.
+
+        With clone, every connection to the original file must be released first, so the
+        clone holds all of its committed changes. Readers can attach again right after.
+
+        Returns:
+            TableauDataSource: The data source to write the new version to.
+        """
+        if self.datasource is not None:
+            return self.datasource
+        if self.clone and os.path.exists(self.path):
+            _detach_file(self.path, self.pool)
+            self.clone_method = clone_file(self.path, self.shadow_path)
+        self.datasource = TableauDataSource(self.shadow_path, pool=self.pool, metrics=self.metrics)
+        self.datasource.connect()
+        return self.datasource
+
+    def commit(self):
+        """
+        Replaces the original file with the shadow file.
+
+        The shadow file is removed if the swap fails, e.g. because another connection to
+        it is still in use, and the original file is left untouched.
+        """
+        if self.datasource is None:
+            raise ValueError("The shadow file is not open.")
+        try:
+            pool = self._detach()
+            # the data must be on disk before the rename makes it visible
+            with open(self.shadow_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(self.shadow_path, self.path)
+            if hasattr(os, 'O_DIRECTORY'):
+                directory_fd = os.open(os.path.dirname(self.path), os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(directory_fd)
+                finally:
+                    os.close(directory_fd)
+        except:
+            self._remove_shadow()
+            raise
+        # idle connections still have the old file attached
+        pool.discard(self.path)
+
+    def abort(self):
+        """
+        Discards the shadow file and leaves the original file untouched.
+        """
+        try:
+            if self.datasource is not None:
+                self._detach()
+        finally:
+            self._remove_shadow()
+
+    def _detach(self):
+        """
+        Closes every connection to the shadow file so Hyper writes it out. Returns the pool.
+        """
+        pool = self.datasource._connection_pool or self.pool or get_default_pool()
+        self.datasource.close()
+        self.datasource = None
+        in_use = pool.discard(self.shadow_path)
+        if in_use:
+            raise ValueError(f"{in_use} connections to the shadow file of {self.path} are still in use.")
+        return pool
+
+    def _remove_shadow(self):
+        try:
+            os.remove(self.shadow_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,182 @@
+import atexit
+import os
+import threading
+
+import tableauhyperapi as tab_api
+
+
+class HyperConnectionPool:
+    """
+    A pool that runs one HyperProcess and recycles connections per .hyper file.
+    """
+
+    def __init__(self, max_connections_per_database=4, parameters=None, create_mode=tab_api.CreateMode.CREATE_IF_NOT_EXISTS):
+        """
+        Constructor for the HyperConnectionPool class.
+
+        Parameters:
+            max_connections_per_database (int): The maximum number of open connections to one database file.
+            parameters (dict): Parameters passed to the HyperProcess, e.g. {'log_config': ''}.
+            create_mode (tab_api.CreateMode): The create mode used when opening a database file.
+        """
+        if max_connections_per_database < 1:
+            raise ValueError("max_connections_per_database must be positive.")
+        self.max_connections_per_database = max_connections_per_database
+        self.parameters = parameters
+        self.create_mode = create_mode
+        self.hyper = None
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self._idle = {}
+        self._in_use = {}
+        self._owners = {}
+        self._stale = set()
+        self._lock = threading.Condition()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Starts the Hyper process if it is not already running.
+        """
+        with self._lock:
+            if self.hyper is None:
+                self.hyper = tab_api.HyperProcess(tab_api.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                                                  parameters=self.parameters)
+
+    def acquire(self, database_path, timeout=None):
+        """
+        Returns an open connection to a database file, reusing an idle one if possible.
+
+        Blocks while max_connections_per_database connections to the file are in use.
+
+        Parameters:
+            database_path (str): The path to the .hyper file.
+            timeout (float): The maximum number of seconds to wait for a free connection, or None to wait forever.
+
+        Returns:
+            tab_api.Connection: An open connection to the database file.
+        """
+        self.start()
+        key = os.path.abspath(database_path)
+        with self._lock:
+            if not self._lock.wait_for(lambda: self._in_use.get(key, 0) < self.max_connections_per_database,
+                                       timeout=timeout):
+                raise TimeoutError(f"Timed out waiting for a connection to {database_path}.")
+
+            # Reuse an idle connection if one is still open
+            idle = self._idle.setdefault(key, [])
+            while idle:
+                connection = idle.pop()
+                if connection.is_open:
+                    self.connections_reused += 1
+                    break
+            else:
+                connection = tab_api.Connection(self.hyper.endpoint, key, self.create_mode)
+                self.connections_opened += 1
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+            self._owners[id(connection)] = (key, connection)
+            return connection
+
+    def release(self, connection):
+        """
+        Returns a connection to the pool so it can be handed out again.
+
+        Parameters:
+            connection (tab_api.Connection): A connection returned by acquire.
+        """
+        with self._lock:
+            owner = self._owners.pop(id(connection), None)
+            if owner is None:
+                raise ValueError("Connection was not acquired from this pool.")
+            key = owner[0]
+            self._in_use[key] -= 1
+            if id(connection) in self._stale:
+                self._stale.discard(id(connection))
+                connection.close()
+            elif connection.is_open and self.hyper is not None:
+                self._idle.setdefault(key, []).append(connection)
+            self._lock.notify_all()
+
+    def discard(self, database_path):
+        """
+        Closes the idle connections to a database file, so the next acquire opens the file again.
+
+        Hyper keeps a file attached while any connection to it is open, so this is needed after
+        the file was replaced on disk, or before the file is copied. Connections to the file that
+        are in use are closed when they are released.
+
+        Parameters:
+            database_path (str): The path to the .hyper file.
+
+        Returns:
+            int: The number of connections to the file that are still in use.
+        """
+        key = os.path.abspath(database_path)
+        with self._lock:
+            for connection in self._idle.pop(key, []):
+                connection.close()
+            for owner_key, connection in self._owners.values():
+                if owner_key == key:
+                    self._stale.add(id(connection))
+            return self._in_use.get(key, 0)
+
+    def close(self):
+        """
+        Closes every connection and shuts down the Hyper process.
+
+        Connections still in use are closed as well; releasing them afterwards is a no-op.
+        """
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+            for _, connection in self._owners.values():
+                connection.close()
+            self._stale.clear()
+            if self.hyper is not None:
+                self.hyper.close()
+                self.hyper = None
+            self._lock.notify_all()
+
+    def stats(self):
+        """
+        Returns statistics for the pool.
+
+        Returns:
+            dict: The number of connections opened, reused, idle and in use.
+        """
+        with self._lock:
+            return {
+                'opened': self.connections_opened,
+                'reused': self.connections_reused,
+                'idle': sum(len(connections) for connections in self._idle.values()),
+                'in_use': sum(self._in_use.values()),
+            }
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    The pool's Hyper process is shut down when the interpreter exits.
+
+    Returns:
+        HyperConnectionPool: The shared connection pool.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = HyperConnectionPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
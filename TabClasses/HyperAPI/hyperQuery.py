@@ -1,31 +1,234 @@
+import itertools
+import os
+import re
+import tempfile
+import time
+import uuid
+
 import tableauhyperapi as tab_api
 
+from TabClasses.HyperAPI.hyperPool import get_default_pool
+from TabClasses.Instrumentation.metrics import get_default_registry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def _batched(rows, batch_size):
+    """
+    Splits an iterable of rows into lists of at most batch_size rows.
+
+    Parameters:
+        rows (iterable): The rows to split.
+        batch_size (int): The maximum number of rows per batch.
+
+    Returns:
+        generator: A generator of lists of rows.
+    """
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _replace_table(connection, table_name, replacement):
+    """
+    Replaces a table with another table of the same database under its name.
+
+    Hyper commits DDL statements at once even inside a transaction, so the
+    table is first renamed aside and only dropped once the replacement has
+    its name. If a rename fails, the table gets its name back and the
+    replacement is dropped.
+
+    Parameters:
+        connection (tab_api.Connection): The connection to the database.
+        table_name (str): The name of the table to replace.
+        replacement (tab_api.TableName): The table that takes its place.
+    """
+    table = tab_api.TableName(table_name)
+    replaced_name = f"{table_name}_replaced_{uuid.uuid4().hex}"
+    renamed = False
+    try:
+        connection.execute_command(f"ALTER TABLE {table} RENAME TO {tab_api.escape_name(replaced_name)}")
+        renamed = True
+        connection.execute_command(f"ALTER TABLE {replacement} RENAME TO {tab_api.escape_name(table_name)}")
+    except:
+        if renamed:
+            connection.execute_command(
+                f"ALTER TABLE {tab_api.TableName(replaced_name)} RENAME TO {tab_api.escape_name(table_name)}")
+        connection.execute_command(f"DROP TABLE IF EXISTS {replacement}")
+        raise
+    connection.execute_command(f"DROP TABLE {tab_api.TableName(replaced_name)}")
+
+
+def _validate_batch(batch, num_columns):
+    """
+    Checks that every row in a batch has the expected number of columns.
+
+    Parameters:
+        batch (list of tuples): The rows to validate.
+        num_columns (int): The number of columns in the target table.
+    """
+    if set(map(len, batch)) != {num_columns}:
+        for row in batch:
+            if len(row) != num_columns:
+                raise ValueError(f"Number of columns in row {row} does not match the number of columns in the table.")
+
+
+def _sql_type_for_arrow(arrow_type):
+    """
+    Maps an Arrow data type to the matching Hyper SqlType.
+
+    Parameters:
+        arrow_type (pyarrow.DataType): The Arrow data type.
+
+    Returns:
+        tab_api.SqlType: The Hyper SQL type.
+    """
+    types = pa.types
+    if types.is_dictionary(arrow_type):
+        return _sql_type_for_arrow(arrow_type.value_type)
+    if types.is_boolean(arrow_type):
+        return tab_api.SqlType.bool()
+    if types.is_int8(arrow_type) or types.is_int16(arrow_type) or types.is_uint8(arrow_type):
+        return tab_api.SqlType.small_int()
+    if types.is_int32(arrow_type) or types.is_uint16(arrow_type):
+        return tab_api.SqlType.int()
+    if types.is_int64(arrow_type) or types.is_uint32(arrow_type):
+        return tab_api.SqlType.big_int()
+    if types.is_floating(arrow_type):
+        return tab_api.SqlType.double()
+    if types.is_decimal(arrow_type):
+        return tab_api.SqlType.numeric(arrow_type.precision, arrow_type.scale)
+    if types.is_string(arrow_type) or types.is_large_string(arrow_type):
+        return tab_api.SqlType.text()
+    if types.is_binary(arrow_type) or types.is_large_binary(arrow_type):
+        return tab_api.SqlType.bytes()
+    if types.is_date(arrow_type):
+        return tab_api.SqlType.date()
+    if types.is_time(arrow_type):
+        return tab_api.SqlType.time()
+    if types.is_timestamp(arrow_type):
+        return tab_api.SqlType.timestamp_tz() if arrow_type.tz else tab_api.SqlType.timestamp()
+    raise ValueError(f"Arrow type {arrow_type} has no matching Hyper SQL type.")
+
+
+def _arrow_batches(data, batch_size):
+    """
+    Converts columnar data to an Arrow schema and a generator of record batches.
+
+    Parameters:
+        data: A pandas DataFrame, a pyarrow Table or RecordBatch, or a dict of column name to NumPy array.
+        batch_size (int): The maximum number of rows per record batch.
+
+    Returns:
+        tuple: The Arrow schema and an iterable of pyarrow.RecordBatch.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for columnar appends. Install it with 'pip install pyarrow'.")
+    if isinstance(data, dict):
+        data = pa.table(data)
+    if isinstance(data, pa.RecordBatch):
+        data = pa.Table.from_batches([data])
+    if isinstance(data, pa.Table):
+        return data.schema, data.to_batches(max_chunksize=batch_size)
+
+    # Convert pandas DataFrames one slice at a time so only one batch is copied at once
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    batches = (pa.RecordBatch.from_pandas(data.iloc[start:start + batch_size], schema=schema, preserve_index=False)
+               for start in range(0, len(data), batch_size))
+    return schema, batches
+
+
+def infer_sql_types(data):
+    """
+    Infers Hyper SQL types for the columns of a DataFrame, Arrow table or dict of NumPy arrays.
+
+    The result can be passed to TableauDataSource.create_table as the table definition.
+
+    Parameters:
+        data: A pandas DataFrame, a pyarrow Table or RecordBatch, or a dict of column name to NumPy array.
+
+    Returns:
+        dict: A dictionary of column names to tab_api.SqlType.
+    """
+    schema, _ = _arrow_batches(data, 1)
+    return {field.name: _sql_type_for_arrow(field.type) for field in schema}
+
+
 class TableauDataSource:
     """
     A class for creating and manipulating Tableau data sources using the Tableau Hyper API.
     """
 
 
-    def __init__(self, datasource_path):
+    def __init__(self, datasource_path, pool=None, metrics=None):
         """
         Constructor for the TableauDataSource class.
 
         Parameters:
             datasource_path (str): The path to the Tableau data source file.
+            pool (HyperConnectionPool): The pool to take connections from. Defaults to the process-wide pool.
+            metrics (MetricsRegistry): The registry operations are recorded in. Defaults to the process-wide registry.
         """
         self.datasource_path = datasource_path
+        self.pool = pool
+        self.metrics = metrics or get_default_registry()
         self.connection = None
+        self._connection_pool = None
         self.table_definition = None
+        self._table_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def connect(self):
         """
         Creates a connection to the data source.
+
+        The connection is taken from the connection pool, so data sources share one
+        Hyper process and reuse connections to the same file.
         """
 
         if self.connection is None:
-            self.connection = tab_api.Connection(endpoint=tab_api.Endpoint('localhost'),
-                                                    dbname=self.datasource_path)
-            self.connection.open()
+            with self.metrics.timer('hyper.connect'):
+                self._connection_pool = self.pool or get_default_pool()
+                self.connection = self._connection_pool.acquire(self.datasource_path)
+
+    def close(self):
+        """
+        Returns the connection to the pool, or closes it if it was not taken from a pool.
+        """
+        if self.connection is None:
+            return
+        if self._connection_pool is not None:
+            self._connection_pool.release(self.connection)
+        else:
+            self.connection.close()
+        self.connection = None
+        self._connection_pool = None
 
     def create_table(self, table_name, table_definition):
 
@@ -46,17 +249,17 @@ class TableauDataSource:
             raise ValueError("Table definition cannot be empty.")
 
         # Check if the table name already exists in the data source
-        for table in self.connection.catalog.get_tables():
-            if table.name == table_name:
-                raise ValueError(f"Table {table_name} already exists in the data source.")
+        if table_name in self._table_cache or self.connection.catalog.has_table(tab_api.TableName(table_name)):
+            raise ValueError(f"Table {table_name} already exists in the data source.")
 
         # Create the table
-        schema = tab_api.SchemaDefinition(table_name)
-        for column_name, data_type in table_definition.items():
-            column = tab_api.TableDefinition.Column(column_name, data_type)
-            schema.add_column(column)
-        self.table_definition = schema
-        self.connection.catalog.create_table(self.table_definition)
+        columns = [tab_api.TableDefinition.Column(column_name, data_type)
+                   for column_name, data_type in table_definition.items()]
+        self.table_definition = tab_api.TableDefinition(tab_api.TableName(table_name), columns)
+        with self.metrics.timer('hyper.create_table', table=table_name):
+            self.connection.catalog.create_table(self.table_definition)
+        self._table_cache[table_name] = self.table_definition
+
     def append_rows(self, table_name, rows):
         """
         Appends rows to an existing table in the data source.
@@ -72,30 +275,471 @@ class TableauDataSource:
         self.connect()
 
         # Check if the specified table exists in the data source
-        table = self.connection.catalog.get_table(table_name)
-        if table is None:
-            raise ValueError(f"Table {table_name} does not exist in the data source.")
+        table_definition = self._get_table_definition(table_name)
 
         # Check if the number of columns in a row matches the number of columns in the table
-        num_columns = len(table.table_definition.columns)
+        num_columns = len(table_definition.columns)
         for row in rows:
             if len(row) != num_columns:
                 raise ValueError(f"Number of columns in row {row} does not match the number of columns in the table.")
 
-        # Check if the columns in the row match the columns in the table
-        table_columns = set(column.name for column in table.table_definition.columns)
-        row_columns = set(column[0] for column in table.table_definition.items())
-        if table_columns != row_columns:
-            raise ValueError("Columns in the row do not match the columns in the table.")
-
         # Append the rows to the table, rolling back the transaction if an error occurs
-        with self.connection.begin():
+        with self.metrics.timer('hyper.insert', table=table_name, method='append_rows') as timer:
+            self.connection.execute_command("BEGIN TRANSACTION")
+            try:
+                with tab_api.Inserter(self.connection, table_definition) as inserter:
+                    for row in rows:
+                        inserter.add_row(row)
+                    inserter.execute()
+            except:
+                self.connection.execute_command("ROLLBACK")
+                raise
+            self.connection.execute_command("COMMIT")
+            timer.rows = len(rows)
+
+    def bulk_append_rows(self, table_name, rows, batch_size=10000, flush_size=100000):
+        """
+        Appends rows to an existing table using the Hyper API Inserter.
+
+        Rows are validated one batch at a time and streamed to Hyper through a
+        single Inserter, which is executed every flush_size rows. All rows are
+        appended in one transaction.
+
+        Parameters:
+            table_name (str): The name of the table to append rows to.
+            rows (iterable of tuples): The rows to be appended.
+            batch_size (int): The number of rows validated and handed to the Inserter at a time.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        self.connect()
+        table_definition = self._get_table_definition(table_name)
+
+        with self.metrics.timer('hyper.insert', table=table_name, method='bulk_append_rows') as timer:
+            self.connection.execute_command("BEGIN TRANSACTION")
+            try:
+                row_count = self._insert_batches(table_definition, rows, batch_size, flush_size)
+            except:
+                self.connection.execute_command("ROLLBACK")
+                raise
+            self.connection.execute_command("COMMIT")
+            timer.rows = row_count
+        return row_count
+
+    def upsert_rows(self, table_name, rows, key_columns, batch_size=10000, flush_size=100000):
+        """
+        Inserts new rows and replaces existing rows with matching keys.
+
+        The rows are bulk-loaded into a temporary staging table. Matching rows are
+        then deleted from the target with DELETE ... USING and the staged rows are
+        inserted with INSERT ... SELECT, all in one transaction. Keys are expected
+        to be unique within rows.
+
+        Parameters:
+            table_name (str): The name of the table to merge rows into.
+            rows (iterable of tuples): The new and changed rows, with every column of the table.
+            key_columns (list of str): The columns that identify a row.
+            batch_size (int): The number of rows validated and handed to the Inserter at a time.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+
+        Returns:
+            dict: The number of rows 'deleted' from and 'inserted' into the table.
+        """
+        if not key_columns:
+            raise ValueError("key_columns cannot be empty.")
+
+        self.connect()
+        table_definition = self._get_table_definition(table_name)
+        table_columns = [column.name.unescaped for column in table_definition.columns]
+        self._check_columns(table_name, table_columns, key_columns, 'Key')
+
+        table = table_definition.table_name
+        staging_definition = self._create_staging_table(table_definition)
+        staging = staging_definition.table_name
+        key_condition = ' AND '.join(f"{table}.{tab_api.escape_name(key)} = {staging}.{tab_api.escape_name(key)}"
+                                     for key in key_columns)
+        columns = ', '.join(tab_api.escape_name(column) for column in table_columns)
+        try:
+            with self.metrics.timer('hyper.upsert', table=table_name) as timer:
+                self.connection.execute_command("BEGIN TRANSACTION")
+                try:
+                    timer.rows = self._insert_batches(staging_definition, rows, batch_size, flush_size)
+                    deleted = self.connection.execute_command(
+                        f"DELETE FROM {table} USING {staging} WHERE {key_condition}")
+                    inserted = self.connection.execute_command(
+                        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging}")
+                except:
+                    self.connection.execute_command("ROLLBACK")
+                    raise
+                self.connection.execute_command("COMMIT")
+        finally:
+            self._drop_staging_table(staging_definition)
+        return {'deleted': deleted, 'inserted': inserted}
+
+    def update_rows_by_key(self, table_name, updates, key_columns, update_columns, batch_size=10000,
+                           flush_size=100000):
+        """
+        Updates many rows identified by their keys with one joined UPDATE statement.
+
+        The keys and new values are bulk-loaded into a temporary staging table and
+        applied with a single UPDATE ... FROM, in one transaction, instead of one
+        statement per row. Keys are expected to be unique within updates.
+
+        Parameters:
+            table_name (str): The name of the table to update rows in.
+            updates (iterable of tuples): (key, values) pairs. key is a tuple of the key_columns values, or a
+                single value if there is one key column, and values is a tuple of the update_columns values.
+            key_columns (list of str): The columns that identify a row.
+            update_columns (list of str): The columns to set.
+            batch_size (int): The number of rows validated and handed to the Inserter at a time.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+
+        Returns:
+            int: The number of rows updated.
+        """
+        if not key_columns or not update_columns:
+            raise ValueError("key_columns and update_columns cannot be empty.")
+        if set(key_columns) & set(update_columns):
+            raise ValueError("update_columns cannot contain key columns.")
+
+        single_key = len(key_columns) == 1
+        num_values = len(update_columns)
+
+        def staged_rows():
+            for key, values in updates:
+                values = tuple(values)
+                if len(values) != num_values:
+                    raise ValueError(f"Number of values {values} does not match the number of update columns.")
+                yield ((key,) if single_key and not isinstance(key, tuple) else tuple(key)) + values
+
+        def build_statement(table, staging, key_condition):
+            assignments = ', '.join(f"{tab_api.escape_name(column)} = {staging}.{tab_api.escape_name(column)}"
+                                    for column in update_columns)
+            return f"UPDATE {table} SET {assignments} FROM {staging} WHERE {key_condition}"
+
+        with self.metrics.timer('hyper.update', table=table_name, method='update_rows_by_key') as timer:
+            row_count = self._apply_staged(table_name, staged_rows(), key_columns, update_columns, batch_size,
+                                           flush_size, build_statement)
+            timer.rows = row_count
+        return row_count
+
+    def delete_rows_by_key(self, table_name, keys, key_columns, batch_size=10000, flush_size=100000):
+        """
+        Deletes many rows identified by their keys with one joined DELETE statement.
+
+        The keys are bulk-loaded into a temporary staging table and removed with a
+        single DELETE ... USING, in one transaction, instead of one statement per row.
+
+        Parameters:
+            table_name (str): The name of the table to delete rows from.
+            keys (iterable): The keys of the rows to delete, as tuples of the key_columns values, or single
+                values if there is one key column.
+            key_columns (list of str): The columns that identify a row.
+            batch_size (int): The number of keys validated and handed to the Inserter at a time.
+            flush_size (int): The number of keys sent to Hyper before the Inserter is executed.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        if not key_columns:
+            raise ValueError("key_columns cannot be empty.")
+
+        single_key = len(key_columns) == 1
+        staged_rows = ((key,) if single_key and not isinstance(key, tuple) else tuple(key) for key in keys)
+
+        with self.metrics.timer('hyper.delete', table=table_name, method='delete_rows_by_key') as timer:
+            row_count = self._apply_staged(
+                table_name, staged_rows, key_columns, [], batch_size, flush_size,
+                lambda table, staging, key_condition: f"DELETE FROM {table} USING {staging} WHERE {key_condition}")
+            timer.rows = row_count
+        return row_count
+
+    def _apply_staged(self, table_name, rows, key_columns, value_columns, batch_size, flush_size, build_statement):
+        """
+        Loads rows into a staging table and runs one statement joining it to a table, in one transaction.
+
+        Parameters:
+            table_name (str): The name of the table.
+            rows (iterable of tuples): The staged rows, with the key_columns followed by the value_columns.
+            key_columns (list of str): The columns the staging table is joined on.
+            value_columns (list of str): The other columns of the staging table.
+            batch_size (int): The number of rows validated and handed to the Inserter at a time.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+            build_statement (callable): Returns the SQL statement, given the escaped table name, the escaped
+                staging table name and the join condition.
+
+        Returns:
+            int: The number of rows affected by the statement.
+        """
+        self.connect()
+        table_definition = self._get_table_definition(table_name)
+        table_columns = [column.name.unescaped for column in table_definition.columns]
+        self._check_columns(table_name, table_columns, key_columns, 'Key')
+        self._check_columns(table_name, table_columns, value_columns, 'Update')
+
+        table = table_definition.table_name
+        staging_definition = self._create_staging_table(table_definition, list(key_columns) + list(value_columns))
+        staging = staging_definition.table_name
+        key_condition = ' AND '.join(f"{table}.{tab_api.escape_name(key)} = {staging}.{tab_api.escape_name(key)}"
+                                     for key in key_columns)
+        try:
+            self.connection.execute_command("BEGIN TRANSACTION")
             try:
-                for row in rows:
-                    self.connection.execute_insert(tab_api.TableName(table_name), row)
+                self._insert_batches(staging_definition, rows, batch_size, flush_size)
+                row_count = self.connection.execute_command(build_statement(table, staging, key_condition))
             except:
-                self.connection.rollback()
+                self.connection.execute_command("ROLLBACK")
                 raise
+            self.connection.execute_command("COMMIT")
+        finally:
+            self._drop_staging_table(staging_definition)
+        return row_count
+
+    @staticmethod
+    def _check_columns(table_name, table_columns, columns, kind):
+        missing_columns = set(columns) - set(table_columns)
+        if missing_columns:
+            raise ValueError(f"{kind} columns {sorted(missing_columns)} do not exist in table {table_name}.")
+
+    def _insert_batches(self, table_definition, rows, batch_size, flush_size):
+        """
+        Streams rows into a table through the Hyper API Inserter in the current transaction.
+
+        Parameters:
+            table_definition (tab_api.TableDefinition): The table to insert into.
+            rows (iterable of tuples): The rows to be inserted.
+            batch_size (int): The number of rows validated and handed to the Inserter at a time.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+
+        Returns:
+            int: The number of rows inserted.
+        """
+        if batch_size < 1 or flush_size < 1:
+            raise ValueError("batch_size and flush_size must be positive.")
+        num_columns = len(table_definition.columns)
+
+        row_count = 0
+        inserter = tab_api.Inserter(self.connection, table_definition)
+        pending = 0
+        try:
+            for batch in _batched(rows, batch_size):
+                _validate_batch(batch, num_columns)
+                inserter.add_rows(batch)
+                pending += len(batch)
+                row_count += len(batch)
+
+                # Execute the inserter once enough rows are buffered and start a new one
+                if pending >= flush_size:
+                    inserter.execute()
+                    inserter = tab_api.Inserter(self.connection, table_definition)
+                    pending = 0
+            inserter.execute()
+        finally:
+            inserter.close()
+        return row_count
+
+    def _create_staging_table(self, table_definition, columns=None):
+        """
+        Creates an empty temporary table with the same columns as a table.
+
+        Hyper does not allow DDL and DML in one transaction, so staging tables are
+        created and dropped outside of the transaction that uses them.
+
+        Parameters:
+            table_definition (tab_api.TableDefinition): The table to copy the columns of.
+            columns (list of str): The columns to copy, in this order. Defaults to every column.
+
+        Returns:
+            tab_api.TableDefinition: The definition of the staging table.
+        """
+        staging_columns = table_definition.columns
+        if columns is not None:
+            by_name = {column.name.unescaped: column for column in table_definition.columns}
+            staging_columns = [by_name[column] for column in columns]
+        staging_definition = tab_api.TableDefinition(tab_api.TableName(f"staging_{uuid.uuid4().hex}"),
+                                                     staging_columns,
+                                                     persistence=tab_api.Persistence.TEMPORARY)
+        self.connection.catalog.create_table(staging_definition)
+        return staging_definition
+
+    def _drop_staging_table(self, staging_definition):
+        """
+        Drops a staging table created by _create_staging_table.
+
+        Parameters:
+            staging_definition (tab_api.TableDefinition): The staging table to drop.
+        """
+        self.connection.execute_command(f"DROP TABLE IF EXISTS {staging_definition.table_name}")
+
+    def append_stream(self, table_name, source, batch_size=10000, flush_size=100000,
+                      file_format=None, header=True, delimiter=','):
+        """
+        Appends rows from an iterable or a CSV/Parquet file without materializing them.
+
+        Iterables and generators are consumed in batches of batch_size rows through
+        bulk_append_rows. Files are read by the Hyper server itself, so their contents
+        never pass through Python.
+
+        Parameters:
+            table_name (str): The name of the table to append rows to.
+            source (iterable of tuples or str): The rows to append, or the path to a CSV or Parquet file.
+            batch_size (int): The number of rows held in memory at a time when source is an iterable.
+            flush_size (int): The number of rows sent to Hyper before the Inserter is executed.
+            file_format (str): 'csv' or 'parquet'. Inferred from the file extension if not given.
+            header (bool): Whether the first line of a CSV file is a header.
+            delimiter (str): The delimiter of a CSV file.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return self._copy_from_file(table_name, os.fspath(source), file_format, header, delimiter)
+        return self.bulk_append_rows(table_name, source, batch_size=batch_size, flush_size=flush_size)
+
+    def _copy_from_file(self, table_name, path, file_format, header, delimiter):
+        """
+        Appends the contents of a CSV or Parquet file using a server-side COPY or external() scan.
+
+        Parameters:
+            table_name (str): The name of the table to append rows to.
+            path (str): The path to the file.
+            file_format (str): 'csv' or 'parquet', or None to infer it from the file extension.
+            header (bool): Whether the first line of a CSV file is a header.
+            delimiter (str): The delimiter of a CSV file.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        if not os.path.isfile(path):
+            raise ValueError(f"File {path} does not exist.")
+        file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+
+        self.connect()
+        table_definition = self._get_table_definition(table_name)
+        table = table_definition.table_name
+        # The Hyper server resolves relative paths against its own working directory
+        path_literal = tab_api.escape_string_literal(os.path.abspath(path))
+
+        if file_format == 'csv':
+            query = (f"COPY {table} FROM {path_literal} WITH (FORMAT csv, "
+                     f"HEADER {'true' if header else 'false'}, "
+                     f"DELIMITER {tab_api.escape_string_literal(delimiter)})")
+        elif file_format == 'parquet':
+            # Map Parquet columns by name so they are cast to the table's column types
+            columns = ', '.join(str(column.name) for column in table_definition.columns)
+            query = (f"INSERT INTO {table} ({columns}) "
+                     f"SELECT {columns} FROM external({path_literal}, FORMAT => 'parquet')")
+        else:
+            raise ValueError(f"Unsupported file format {file_format}. Expected 'csv' or 'parquet'.")
+        with self.metrics.timer('hyper.copy', table=table_name, format=file_format) as timer:
+            row_count = self.connection.execute_command(query)
+            timer.rows = row_count
+            timer.bytes = os.path.getsize(path)
+        return row_count
+
+    def append_dataframe(self, table_name, data, batch_size=1000000):
+        """
+        Appends a pandas DataFrame or Arrow table to an existing table.
+
+        The data is converted to Arrow in batches of batch_size rows and staged in a
+        temporary Parquet file that the Hyper server reads directly, so no Python
+        object is created per cell. Columns are matched to the table by name.
+
+        Parameters:
+            table_name (str): The name of the table to append rows to.
+            data: A pandas DataFrame or a pyarrow Table or RecordBatch.
+            batch_size (int): The number of rows converted to Arrow at a time.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        self.connect()
+        table_definition = self._get_table_definition(table_name)
+        schema, batches = _arrow_batches(data, batch_size)
+
+        # Check if the columns in the data match the columns in the table
+        table_columns = set(column.name.unescaped for column in table_definition.columns)
+        if set(schema.names) != table_columns:
+            raise ValueError("Columns in the data do not match the columns in the table.")
+
+        with tempfile.TemporaryDirectory() as staging_dir:
+            staging_path = os.path.join(staging_dir, 'staging.parquet')
+            with self.metrics.timer('hyper.stage', table=table_name) as timer, \
+                    pq.ParquetWriter(staging_path, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    timer.rows += batch.num_rows
+                    timer.bytes += batch.nbytes
+            return self._copy_from_file(table_name, staging_path, 'parquet', True, ',')
+
+    def append_columns(self, table_name, columns, batch_size=1000000):
+        """
+        Appends columns of NumPy arrays to an existing table.
+
+        Parameters:
+            table_name (str): The name of the table to append rows to.
+            columns (dict): A dictionary of column names to NumPy arrays of equal length.
+            batch_size (int): The number of rows converted to Arrow at a time.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        return self.append_dataframe(table_name, columns, batch_size=batch_size)
+
+    def query_chunks(self, query, chunk_size=100000, output='rows'):
+        """
+        Runs a query and yields its results in chunks of at most chunk_size rows.
+
+        Only one chunk is held in memory at a time. The query result stays open
+        until the generator is exhausted or closed, and no other query can run on
+        the connection in the meantime.
+
+        Parameters:
+            query (str): The SQL query to run.
+            chunk_size (int): The maximum number of rows per chunk.
+            output (str): 'rows' for lists of rows, 'numpy' for a dict of column name to NumPy array,
+                or 'pandas' for a DataFrame.
+
+        Returns:
+            generator: A generator of result chunks in the requested format.
+        """
+        if output not in ('rows', 'numpy', 'pandas'):
+            raise ValueError(f"Unsupported output {output}. Expected 'rows', 'numpy' or 'pandas'.")
+        if output == 'numpy' and np is None:
+            raise ImportError("numpy is required for output='numpy'. Install it with 'pip install numpy'.")
+        if output == 'pandas' and pd is None:
+            raise ImportError("pandas is required for output='pandas'. Install it with 'pip install pandas'.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive.")
+
+        self.connect()
+        # only the time spent fetching and converting chunks is recorded, not the time the caller holds them
+        seconds = 0.0
+        row_count = 0
+        error = False
+        start = time.perf_counter()
+        try:
+            with self.connection.execute_query(query) as result:
+                column_names = [column.name.unescaped for column in result.schema.columns]
+                for chunk in _batched(result, chunk_size):
+                    row_count += len(chunk)
+                    if output == 'numpy':
+                        chunk = {name: np.array(values) for name, values in zip(column_names, zip(*chunk))}
+                    elif output == 'pandas':
+                        chunk = pd.DataFrame.from_records(chunk, columns=column_names)
+                    seconds += time.perf_counter() - start
+                    start = None
+                    yield chunk
+                    start = time.perf_counter()
+        except Exception:
+            error = True
+            raise
+        finally:
+            if start is not None:
+                seconds += time.perf_counter() - start
+            self.metrics.observe('hyper.query', seconds, rows=row_count, error=error, output=output)
 
     def update_rows(self, table_name, update_query):
         """
@@ -109,23 +753,25 @@ class TableauDataSource:
         self.connect()
 
         # Check if the specified table exists in the data source
-        table = self.connection.catalog.get_table(table_name)
-        if table is None:
-            raise ValueError(f"Table {table_name} does not exist in the data source.")
+        table_definition = self._get_table_definition(table_name)
 
         # Check if the columns in the update query match the columns in the table
-        update_columns = set(column.split('=')[0].strip() for column in update_query.split(',') if '=' in column)
-        table_columns = set(column.name for column in table.table_definition.columns)
-        if update_columns != table_columns:
+        set_clause = re.search(r'\bSET\b(.*?)(?:\bFROM\b|\bWHERE\b|$)', update_query, re.IGNORECASE | re.DOTALL)
+        assignments = set_clause.group(1).split(',') if set_clause else []
+        update_columns = set(column.split('=')[0].strip().strip('"') for column in assignments if '=' in column)
+        table_columns = set(column.name.unescaped for column in table_definition.columns)
+        if not update_columns or not update_columns <= table_columns:
             raise ValueError("Columns in the update query do not match the columns in the table.")
 
         # Update the rows in the table, rolling back the transaction if an error occurs
-        with self.connection.begin():
+        with self.metrics.timer('hyper.update', table=table_name) as timer:
+            self.connection.execute_command("BEGIN TRANSACTION")
             try:
-                self.connection.execute_update(tab_api.TableName(table_name), update_query)
+                timer.rows = self.connection.execute_command(update_query) or 0
             except:
-                self.connection.rollback()
+                self.connection.execute_command("ROLLBACK")
                 raise
+            self.connection.execute_command("COMMIT")
 
     def delete_rows(self, table_name, delete_query):
         """
@@ -142,8 +788,18 @@ class TableauDataSource:
         # table_name: name of the table to delete rows from
         # delete_query: an SQL query string that specifies the rows to be deleted
         self.connect()
-        with self.connection.begin():
-            self.connection.execute_delete(tab_api.TableName(table_name), delete_query)
+
+        # Check if the specified table exists in the data source
+        self._get_table_definition(table_name)
+
+        with self.metrics.timer('hyper.delete', table=table_name) as timer:
+            self.connection.execute_command("BEGIN TRANSACTION")
+            try:
+                timer.rows = self.connection.execute_command(delete_query) or 0
+            except:
+                self.connection.execute_command("ROLLBACK")
+                raise
+            self.connection.execute_command("COMMIT")
 
     def get_datasource_id(self, datasource_name):
         """
@@ -172,12 +828,78 @@ class TableauDataSource:
         self.connect()
 
         # Check if the specified table exists in the data source
-        table = self.connection.catalog.get_table(table_name)
-        if table is None:
-            raise ValueError(f"Table {table_name} does not exist in the data source.")
+        table_definition = self._get_table_definition(table_name)
 
         # Get the schema for the table
         schema = {}
-        for column in table.table_definition.columns:
-            schema[column.name] = column.type
-        return schema
\ No newline at end of file
+        for column in table_definition.columns:
+            schema[column.name.unescaped] = column.type
+        return schema
+
+    def has_table(self, table_name):
+        """
+        Checks whether a table exists in the data source.
+
+        Parameters:
+            table_name (str): The name of the table.
+
+        Returns:
+            bool: True if the table exists.
+        """
+        self.connect()
+        try:
+            self._get_table_definition(table_name)
+        except ValueError:
+            return False
+        return True
+
+    def refresh_metadata(self, table_name=None):
+        """
+        Drops cached table definitions so they are read from the catalog again.
+
+        Call this after tables are changed outside of this class, e.g. by raw SQL
+        or by another connection.
+
+        Parameters:
+            table_name (str): The table to refresh, or None to refresh every table.
+        """
+        if table_name is None:
+            self._table_cache.clear()
+        else:
+            self._table_cache.pop(table_name, None)
+
+    def cache_info(self):
+        """
+        Returns statistics for the table definition cache.
+
+        Returns:
+            dict: The number of cache hits, misses and cached tables.
+        """
+        return {'hits': self.cache_hits, 'misses': self.cache_misses, 'size': len(self._table_cache)}
+
+    def _get_table_definition(self, table_name):
+        """
+        Returns the Hyper table definition for a table in the data source.
+
+        Definitions are cached per table name, so only the first lookup of a table
+        queries the catalog.
+
+        Parameters:
+            table_name (str): The name of the table.
+
+        Returns:
+            tab_api.TableDefinition: The definition of the table.
+        """
+        table_definition = self._table_cache.get(table_name)
+        if table_definition is not None:
+            self.cache_hits += 1
+            return table_definition
+
+        self.cache_misses += 1
+        table = tab_api.TableName(table_name)
+        with self.metrics.timer('hyper.catalog'):
+            if not self.connection.catalog.has_table(table):
+                raise ValueError(f"Table {table_name} does not exist in the data source.")
+            table_definition = self.connection.catalog.get_table_definition(table)
+        self._table_cache[table_name] = table_definition
+        return table_definition
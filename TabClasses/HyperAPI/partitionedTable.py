@@ -0,0 +1,362 @@
+import datetime
+import re
+
+import tableauhyperapi as tab_api
+
+from TabClasses.HyperAPI.hyperQuery import _batched, _replace_table
+
+_PERIODS = ('year', 'month', 'day')
+
+
+def _partition_key(value, period):
+    """
+    Returns the partition key of a date or timestamp value.
+
+    Parameters:
+        value: A datetime.date, datetime.datetime, tab_api.Date or tab_api.Timestamp.
+        period (str): 'year', 'month' or 'day'.
+
+    Returns:
+        str: The partition key, e.g. '2023_01' for a monthly partition.
+    """
+    if period == 'year':
+        return f"{value.year:04d}"
+    if period == 'month':
+        return f"{value.year:04d}_{value.month:02d}"
+    return f"{value.year:04d}_{value.month:02d}_{value.day:02d}"
+
+
+def _partition_bounds(key, period):
+    """
+    Returns the first day of a partition and the first day after it.
+
+    Parameters:
+        key (str): The partition key.
+        period (str): 'year', 'month' or 'day'.
+
+    Returns:
+        tuple of datetime.date: The inclusive start and exclusive end of the partition.
+    """
+    parts = [int(part) for part in key.split('_')]
+    if period == 'year':
+        return datetime.date(parts[0], 1, 1), datetime.date(parts[0] + 1, 1, 1)
+    if period == 'month':
+        year, month = parts
+        return datetime.date(year, month, 1), datetime.date(year + month // 12, month % 12 + 1, 1)
+    start = datetime.date(*parts)
+    return start, start + datetime.timedelta(days=1)
+
+
+def _as_date(value):
+    """
+    Converts a date or timestamp to a datetime.date.
+    """
+    return datetime.date(value.year, value.month, value.day)
+
+
+def _ceil_date(value):
+    """
+    Converts a date or timestamp to the first datetime.date that is not earlier than it.
+    """
+    date = _as_date(value)
+    if getattr(value, 'hour', 0) or getattr(value, 'minute', 0) or getattr(value, 'second', 0) \
+            or getattr(value, 'microsecond', 0):
+        date += datetime.timedelta(days=1)
+    return date
+
+
+class PartitionedTable:
+    """
+    A table split into one Hyper table per time period.
+
+    Each partition is a table named <table_name>_p<key>, e.g. events_p2023_01 for
+    January 2023. Old partitions are dropped with a single DROP TABLE and queries
+    only scan the partitions that overlap their time range.
+    """
+
+    def __init__(self, datasource, table_name, partition_column, columns=None, period='month'):
+        """
+        Constructor for the PartitionedTable class.
+
+        Parameters:
+            datasource (TableauDataSource): The data source that holds the partitions.
+            table_name (str): The name of the partitioned table.
+            partition_column (str): The date or timestamp column that rows are partitioned by.
+            columns (dict): Column names to SqlType. Read from an existing partition if not given.
+            period (str): The length of a partition: 'year', 'month' or 'day'.
+        """
+        if period not in _PERIODS:
+            raise ValueError(f"Unsupported period {period}. Expected one of {', '.join(_PERIODS)}.")
+        self.datasource = datasource
+        self.table_name = table_name
+        self.partition_column = partition_column
+        self.columns = columns
+        self.period = period
+        self._partitions = None
+        self._deleted_rows = {}
+        self._key_pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}}(?:_\d{{2}}){{0,2}})$")
+
+    def partition_table_name(self, key):
+        """
+        Returns the name of the table that holds a partition.
+
+        Parameters:
+            key (str): The partition key.
+
+        Returns:
+            str: The table name.
+        """
+        return f"{self.table_name}_p{key}"
+
+    def partitions(self):
+        """
+        Returns the keys of all partitions in chronological order.
+
+        Returns:
+            list of str: The partition keys.
+        """
+        if self._partitions is None:
+            self.datasource.connect()
+            keys = set()
+            for table in self.datasource.connection.catalog.get_table_names('public'):
+                match = self._key_pattern.match(table.name.unescaped)
+                if match:
+                    keys.add(match.group(1))
+            self._partitions = keys
+        return sorted(self._partitions)
+
+    def append_rows(self, rows, batch_size=10000):
+        """
+        Appends rows to the partitions that match their partition column.
+
+        The rows of a batch are appended to all of their partitions in one transaction,
+        so a failing batch appends none of its rows. A batch with a null partition value
+        is rejected. Rows of earlier batches stay appended.
+
+        Parameters:
+            rows (iterable of tuples): The rows to append, with every column of the table.
+            batch_size (int): The number of rows grouped by partition at a time.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        index = list(self._get_columns()).index(self.partition_column)
+        row_count = 0
+        for batch in _batched(rows, batch_size):
+            groups = {}
+            for row in batch:
+                if row[index] is None:
+                    raise ValueError(f"Partition column {self.partition_column} of row {row} is null.")
+                groups.setdefault(_partition_key(row[index], self.period), []).append(row)
+            # tables are created outside the transaction, since Hyper commits DDL at once
+            for key in groups:
+                self._ensure_partition(key)
+            row_count += self._append_groups(groups)
+        return row_count
+
+    def append_dataframe(self, data):
+        """
+        Appends a pandas DataFrame to the partitions that match its partition column.
+
+        A DataFrame with a null partition value is rejected before any row is appended.
+
+        Parameters:
+            data (pandas.DataFrame): The rows to append, with every column of the table.
+
+        Returns:
+            int: The number of rows appended.
+        """
+        nulls = int(data[self.partition_column].isna().sum())
+        if nulls:
+            raise ValueError(f"Partition column {self.partition_column} is null in {nulls} rows.")
+        formats = {'year': '%Y', 'month': '%Y_%m', 'day': '%Y_%m_%d'}
+        keys = data[self.partition_column].dt.strftime(formats[self.period])
+        row_count = 0
+        for key, group in data.groupby(keys, sort=False):
+            self._ensure_partition(key)
+            row_count += self.datasource.append_dataframe(self.partition_table_name(key), group)
+        return row_count
+
+    def query_chunks(self, where=None, start=None, end=None, columns=None, chunk_size=100000, output='rows'):
+        """
+        Queries the partitions that overlap a time range and yields the results in chunks.
+
+        Parameters:
+            where (str): An optional SQL condition applied to every partition.
+            start: The inclusive start of the time range, or None for no lower bound.
+            end: The exclusive end of the time range, or None for no upper bound.
+            columns (list of str): The columns to select. Defaults to every column.
+            chunk_size (int): The maximum number of rows per chunk.
+            output (str): 'rows', 'numpy' or 'pandas', as for TableauDataSource.query_chunks.
+
+        Returns:
+            generator: A generator of result chunks.
+        """
+        keys = self._prune(start, end)
+        if not keys:
+            return
+        selected = ', '.join(tab_api.escape_name(column) for column in columns) if columns else '*'
+        condition = self._condition(where, start, end)
+        query = ' UNION ALL '.join(
+            f"SELECT {selected} FROM {tab_api.TableName(self.partition_table_name(key))}{condition}" for key in keys)
+        yield from self.datasource.query_chunks(query, chunk_size=chunk_size, output=output)
+
+    def delete_rows(self, where, start=None, end=None):
+        """
+        Deletes rows from the partitions that overlap a time range.
+
+        The deletes of all partitions run in one transaction, so either every
+        matching row is deleted or none is.
+
+        Parameters:
+            where (str): The SQL condition of the rows to delete.
+            start: The inclusive start of the time range, or None for no lower bound.
+            end: The exclusive end of the time range, or None for no upper bound.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        self.datasource.connect()
+        connection = self.datasource.connection
+        condition = self._condition(where, start, end)
+        counts = {}
+        connection.execute_command("BEGIN TRANSACTION")
+        try:
+            for key in self._prune(start, end):
+                table = tab_api.TableName(self.partition_table_name(key))
+                counts[key] = connection.execute_command(f"DELETE FROM {table}{condition}")
+        except:
+            connection.execute_command("ROLLBACK")
+            raise
+        connection.execute_command("COMMIT")
+        for key, count in counts.items():
+            self._deleted_rows[key] = self._deleted_rows.get(key, 0) + count
+        return sum(counts.values())
+
+    def drop_partitions(self, before):
+        """
+        Drops every partition that ends on or before a date.
+
+        Parameters:
+            before: A date or timestamp. Partitions that contain only earlier rows are dropped.
+
+        Returns:
+            list of str: The keys of the dropped partitions.
+        """
+        before = _as_date(before)
+        dropped = [key for key in self.partitions() if _partition_bounds(key, self.period)[1] <= before]
+        for key in dropped:
+            self._drop_partition(key)
+        return dropped
+
+    def compact(self, keys=None, min_deleted_fraction=0.2):
+        """
+        Rewrites fragmented partitions into new tables to reclaim the space of deleted rows.
+
+        Without keys, only partitions where at least min_deleted_fraction of the rows were
+        deleted through delete_rows since the last compaction are rewritten.
+
+        Parameters:
+            keys (list of str): The partitions to rewrite, or None to pick fragmented partitions.
+            min_deleted_fraction (float): The share of deleted rows that makes a partition fragmented.
+
+        Returns:
+            list of str: The keys of the rewritten partitions.
+        """
+        self.datasource.connect()
+        connection = self.datasource.connection
+        if keys is None:
+            keys = []
+            for key, deleted in self._deleted_rows.items():
+                remaining = connection.execute_scalar_query(
+                    f"SELECT COUNT(*) FROM {tab_api.TableName(self.partition_table_name(key))}")
+                if deleted and deleted / (deleted + remaining) >= min_deleted_fraction:
+                    keys.append(key)
+
+        for key in keys:
+            table_name = self.partition_table_name(key)
+            table = tab_api.TableName(table_name)
+            compacted = tab_api.TableName(f"{table_name}_compact")
+            connection.execute_command(f"CREATE TABLE {compacted} AS SELECT * FROM {table}")
+            _replace_table(connection, table_name, compacted)
+            self.datasource.refresh_metadata(table_name)
+            self._deleted_rows.pop(key, None)
+        return keys
+
+    def _get_columns(self):
+        """
+        Returns the columns of the table, reading them from an existing partition if needed.
+        """
+        if self.columns is None:
+            keys = self.partitions()
+            if not keys:
+                raise ValueError(f"Columns of {self.table_name} are unknown and no partition exists yet.")
+            self.columns = self.datasource.get_schema(self.partition_table_name(keys[0]))
+        if self.partition_column not in self.columns:
+            raise ValueError(f"Partition column {self.partition_column} does not exist in table {self.table_name}.")
+        return self.columns
+
+    def _ensure_partition(self, key):
+        """
+        Creates the table of a partition if it does not exist yet.
+        """
+        if key not in self.partitions():
+            self.datasource.create_table(self.partition_table_name(key), self._get_columns())
+            self._partitions.add(key)
+
+    def _append_groups(self, groups):
+        """
+        Appends the rows of each partition in one transaction. Returns the number of rows appended.
+        """
+        datasource = self.datasource
+        connection = datasource.connection
+        with datasource.metrics.timer('hyper.insert', table=self.table_name, method='append_rows') as timer:
+            row_count = 0
+            connection.execute_command("BEGIN TRANSACTION")
+            try:
+                for key, group in groups.items():
+                    table_definition = datasource._get_table_definition(self.partition_table_name(key))
+                    row_count += datasource._insert_batches(table_definition, group, len(group), len(group))
+            except:
+                connection.execute_command("ROLLBACK")
+                raise
+            connection.execute_command("COMMIT")
+            timer.rows = row_count
+        return row_count
+
+    def _drop_partition(self, key):
+        """
+        Drops the table of a partition.
+        """
+        table_name = self.partition_table_name(key)
+        self.datasource.connect()
+        self.datasource.connection.execute_command(f"DROP TABLE IF EXISTS {tab_api.TableName(table_name)}")
+        self.datasource.refresh_metadata(table_name)
+        self._partitions.discard(key)
+        self._deleted_rows.pop(key, None)
+
+    def _prune(self, start, end):
+        """
+        Returns the keys of the partitions that overlap a time range.
+        """
+        start = _as_date(start) if start is not None else None
+        end = _ceil_date(end) if end is not None else None
+        keys = []
+        for key in self.partitions():
+            partition_start, partition_end = _partition_bounds(key, self.period)
+            if (start is None or partition_end > start) and (end is None or partition_start < end):
+                keys.append(key)
+        return keys
+
+    def _condition(self, where, start, end):
+        """
+        Builds the WHERE clause for a condition and a time range.
+        """
+        column = tab_api.escape_name(self.partition_column)
+        sql_type = self._get_columns()[self.partition_column]
+        conditions = [f"({where})"] if where else []
+        if start is not None:
+            conditions.append(f"{column} >= CAST({tab_api.escape_string_literal(str(start))} AS {sql_type})")
+        if end is not None:
+            conditions.append(f"{column} < CAST({tab_api.escape_string_literal(str(end))} AS {sql_type})")
+        return f" WHERE {' AND '.join(conditions)}" if conditions else ''
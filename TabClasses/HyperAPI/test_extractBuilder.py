@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.extractBuilder import ExtractBuilder
+
+class TestExtractBuilder(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def count_rows(self, path, table_name):
+        with tab_api.HyperProcess(tab_api.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                                  parameters={'log_config': ''}) as hyper:
+            with tab_api.Connection(hyper.endpoint, path) as connection:
+                return connection.execute_scalar_query(f'SELECT COUNT(*) FROM "{table_name}"')
+
+    def manifest(self):
+        csv_path = self.path('people.csv')
+        with open(csv_path, 'w') as f:
+            f.write('id,name\n1,John\n2,Jane\n')
+        return [
+            {'path': self.path('a.hyper'), 'table': 'people', 'source': csv_path,
+             'columns': {'id': tab_api.SqlType.int(), 'name': tab_api.SqlType.text()}},
+            {'path': self.path('a.hyper'), 'table': 'scores', 'source': pd.DataFrame({'score': [1.5, 2.5, 3.5]})},
+            {'path': self.path('b.hyper'), 'table': 'ids', 'source': [(i,) for i in range(10)],
+             'columns': {'id': tab_api.SqlType.int()}},
+        ]
+
+    def test_build_threads(self):
+        progress = []
+        builder = ExtractBuilder(max_workers=2, progress=progress.append, hyper_parameters={'log_config': ''})
+        results = builder.build(self.manifest())
+
+        # test that every table is built and reported with its row count and timing
+        rows = {(os.path.basename(result['path']), result['table']): result['rows'] for result in results}
+        self.assertEqual(rows, {('a.hyper', 'people'): 2, ('a.hyper', 'scores'): 3, ('b.hyper', 'ids'): 10})
+        self.assertEqual(len(progress), 3)
+        self.assertTrue(all(result['error'] is None and result['seconds'] >= 0 for result in results))
+        self.assertEqual(self.count_rows(self.path('b.hyper'), 'ids'), 10)
+
+    def test_progress_per_table(self):
+        events = []
+
+        def rows():
+            events.append('scores started')
+            yield (1.5,)
+
+        # test that a table is reported before the next table of the same file is built
+        manifest = self.manifest()[:1] + [{'path': self.path('a.hyper'), 'table': 'scores', 'source': rows(),
+                                           'columns': {'score': tab_api.SqlType.double()}}]
+        ExtractBuilder(max_workers=1, progress=lambda result: events.append(result['table']),
+                       hyper_parameters={'log_config': ''}).build(manifest)
+        self.assertEqual(events, ['people', 'scores started', 'scores'])
+
+    def test_build_processes(self):
+        progress = []
+        results = ExtractBuilder(max_workers=2, executor='process', progress=progress.append,
+                                 hyper_parameters={'log_config': ''}).build(self.manifest())
+        self.assertEqual(sum(result['rows'] for result in results), 15)
+        self.assertEqual(sorted(result['table'] for result in progress), ['ids', 'people', 'scores'])
+        self.assertEqual(self.count_rows(self.path('a.hyper'), 'scores'), 3)
+
+    def test_build_error(self):
+        # test that a failing table is reported without stopping the other tables
+        manifest = self.manifest()
+        manifest[2]['source'] = [(1, 'too many columns')]
+        results = ExtractBuilder(max_workers=2, hyper_parameters={'log_config': ''}).build(manifest)
+        errors = {result['table']: result['error'] for result in results}
+        self.assertIn('ValueError', errors['ids'])
+        self.assertIsNone(errors['people'])
+
+    def test_invalid_executor(self):
+        with self.assertRaises(ValueError):
+            ExtractBuilder(executor='cluster')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import datetime
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.extractOptimizer import TableOptimizer
+from TabClasses.HyperAPI.extractSnapshot import ShadowExtract
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+class TestTableOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = HyperConnectionPool(parameters={'log_config': ''})
+        self.path = os.path.join(self.tmpdir.name, 'events.hyper')
+        self.ds = TableauDataSource(self.path, pool=self.pool)
+        self.ds.create_table('events', {
+            'id': tab_api.SqlType.big_int(),
+            'region': tab_api.SqlType.text(),
+            'score': tab_api.SqlType.double(),
+            'day': tab_api.SqlType.timestamp(),
+            'ratio': tab_api.SqlType.double(),
+        })
+        random.seed(1)
+        rows = [(i, random.choice(['north', 'south', 'east', 'west']), float(random.randint(0, 100)),
+                 datetime.datetime(2023, 1, 1) + datetime.timedelta(days=i % 30),
+                 None if i % 4 == 0 else random.random()) for i in range(5000)]
+        random.shuffle(rows)
+        self.ds.bulk_append_rows('events', rows)
+        self.optimizer = TableOptimizer(self.ds)
+
+    def tearDown(self):
+        self.ds.close()
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def test_analyze(self):
+        stats = {entry['column']: entry for entry in self.optimizer.analyze('events', sample_size=1000)}
+        self.assertEqual(stats['region']['distinct'], 4)
+        self.assertEqual(stats['region']['avg_bytes'] > 0, True)
+        self.assertAlmostEqual(stats['ratio']['null_rate'], 0.25, delta=0.1)
+        self.assertEqual((stats['id']['min'], stats['id']['max']), (0, 4999))
+        self.assertEqual(stats['id']['recommended_type'], tab_api.SqlType.small_int())
+        self.assertEqual(stats['score']['recommended_type'], tab_api.SqlType.small_int())
+        self.assertEqual(stats['day']['recommended_type'], tab_api.SqlType.date())
+        self.assertIsNone(stats['ratio']['recommended_type'])
+        self.assertIsNone(stats['region']['recommended_type'])
+
+    def test_recommend_sort_key(self):
+        stats = self.optimizer.analyze('events')
+        self.assertEqual(TableOptimizer.recommend_sort_key(stats), ['region', 'day', 'score'])
+        self.assertEqual(TableOptimizer.recommend_sort_key(stats, filter_columns=['day'], max_columns=2),
+                         ['day', 'region'])
+        with self.assertRaises(ValueError):
+            TableOptimizer.recommend_sort_key(stats, filter_columns=['missing'])
+
+    def test_optimize_in_place(self):
+        report = self.optimizer.report('events')
+        self.assertEqual(report['rows'], 5000)
+        applied = self.optimizer.optimize('events', sort_key=report['sort_key'], types=report['types'])
+        self.assertEqual(applied['sort_key'], ['region', 'day', 'score'])
+        schema = self.ds.get_schema('events')
+        self.assertEqual(schema['id'], tab_api.SqlType.small_int())
+        self.assertEqual(schema['day'], tab_api.SqlType.date())
+        self.assertEqual(schema['ratio'], tab_api.SqlType.double())
+        rows = self.ds.connection.execute_list_query('SELECT region FROM events')
+        self.assertEqual([row[0] for row in rows], sorted(row[0] for row in rows))
+        self.assertEqual(self.ds.connection.catalog.get_table_names('public'), [tab_api.TableName('public', 'events')])
+
+        # test that unknown columns are rejected
+        with self.assertRaises(ValueError):
+            self.optimizer.optimize('events', sort_key=['missing'])
+
+    def test_optimize_in_place_rollback(self):
+        # test that a failed swap keeps the original table and drops the rewritten one
+        execute_command = tab_api.Connection.execute_command
+        for failing in ('"events" RENAME', 'optimized_'):
+            def fail_on_rename(connection, command):
+                if command.startswith('ALTER TABLE') and failing in command:
+                    raise RuntimeError("rename failed")
+                return execute_command(connection, command)
+
+            with self.subTest(failing=failing), patch.object(tab_api.Connection, 'execute_command', fail_on_rename):
+                with self.assertRaises(RuntimeError):
+                    self.optimizer.optimize('events', sort_key=['region'])
+                self.assertEqual(self.ds.connection.catalog.get_table_names('public'),
+                                 [tab_api.TableName('public', 'events')])
+                self.assertEqual(self.ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events'), 5000)
+
+    def test_optimize_into_shadow(self):
+        self.ds.close()
+        self.pool.discard(self.path)
+        with ShadowExtract(self.path, pool=self.pool, clone=False) as shadow:
+            applied = TableOptimizer(shadow).optimize('events', source_database=self.path)
+        self.assertEqual(applied, {'sort_key': ['region', 'day', 'score'], 'types': {}})
+        with TableauDataSource(self.path, pool=self.pool) as ds:
+            self.assertEqual(ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events'), 5000)
+            self.assertEqual(ds.get_schema('events')['id'], tab_api.SqlType.big_int())
+
+    def test_benchmark(self):
+        timings = self.optimizer.benchmark({'north': "SELECT COUNT(*) FROM events WHERE region = 'north'"}, repeat=2)
+        self.assertGreater(timings['north'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.extractSnapshot import ShadowExtract, clone_file, snapshot
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+class TestExtractSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = HyperConnectionPool(parameters={'log_config': ''})
+        self.path = os.path.join(self.tmpdir.name, 'people.hyper')
+        with TableauDataSource(self.path, pool=self.pool) as ds:
+            ds.create_table('people', {'id': tab_api.SqlType.int()})
+            ds.create_table('lookup', {'id': tab_api.SqlType.int()})
+            ds.bulk_append_rows('people', [(1,), (2,)])
+            ds.bulk_append_rows('lookup', [(1,)])
+        self.pool.discard(self.path)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def count_rows(self, table_name='people', path=None):
+        with TableauDataSource(path or self.path, pool=self.pool) as ds:
+            return ds.connection.execute_scalar_query(f'SELECT COUNT(*) FROM "{table_name}"')
+
+    def test_clone_file(self):
+        copy_path = os.path.join(self.tmpdir.name, 'copy.hyper')
+        self.assertIn(clone_file(self.path, copy_path), ('reflink', 'copy_file_range', 'copy'))
+        with open(self.path, 'rb') as original, open(copy_path, 'rb') as copy:
+            self.assertEqual(original.read(), copy.read())
+
+    def test_swap(self):
+        reader = TableauDataSource(self.path, pool=self.pool)
+        with ShadowExtract(self.path, pool=self.pool) as ds:
+            reader.connect()
+            ds.bulk_append_rows('people', [(3,), (4,)])
+            # readers are not blocked and do not see the change before the swap
+            self.assertEqual(reader.connection.execute_scalar_query('SELECT COUNT(*) FROM people'), 2)
+        # a reader attached to the old file keeps its view
+        self.assertEqual(reader.connection.execute_scalar_query('SELECT COUNT(*) FROM people'), 2)
+        reader.close()
+
+        self.assertEqual(self.count_rows(), 4)
+        # unchanged tables are carried over from the clone
+        self.assertEqual(self.count_rows('lookup'), 1)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['people.hyper'])
+
+    def test_abort(self):
+        with self.assertRaises(RuntimeError):
+            with ShadowExtract(self.path, pool=self.pool) as ds:
+                ds.bulk_append_rows('people', [(3,)])
+                raise RuntimeError("build failed")
+        self.assertEqual(self.count_rows(), 2)
+        self.assertEqual(os.listdir(self.tmpdir.name), ['people.hyper'])
+
+    def test_rebuild_without_clone(self):
+        with ShadowExtract(self.path, pool=self.pool, clone=False) as ds:
+            ds.create_table('people', {'id': tab_api.SqlType.int()})
+            ds.bulk_append_rows('people', [(5,)])
+        self.assertEqual(self.count_rows(), 1)
+        with TableauDataSource(self.path, pool=self.pool) as ds:
+            self.assertFalse(ds.has_table('lookup'))
+
+    def test_connection_in_use(self):
+        # test that a file is not copied while a connection may still hold unwritten changes
+        writer = TableauDataSource(self.path, pool=self.pool)
+        writer.connect()
+        with self.assertRaises(ValueError):
+            snapshot(self.path, pool=self.pool)
+        with self.assertRaises(ValueError):
+            ShadowExtract(self.path, pool=self.pool).open()
+        writer.close()
+        self.assertEqual(os.listdir(self.tmpdir.name), ['people.hyper'])
+
+    def test_commit_connection_in_use(self):
+        # test that a failed commit removes the shadow file and keeps the original
+        shadow = ShadowExtract(self.path, pool=self.pool)
+        shadow.open().bulk_append_rows('people', [(3,)])
+        holder = TableauDataSource(shadow.shadow_path, pool=self.pool)
+        holder.connect()
+        with self.assertRaises(ValueError):
+            shadow.commit()
+        self.assertEqual(os.listdir(self.tmpdir.name), ['people.hyper'])
+        holder.close()
+        # aborting after the failed commit has nothing left to clean up
+        shadow.abort()
+        self.assertEqual(self.count_rows(), 2)
+
+    def test_snapshot(self):
+        snapshot_path = snapshot(self.path, pool=self.pool)
+        with ShadowExtract(self.path, pool=self.pool) as ds:
+            ds.delete_rows('people', 'DELETE FROM people')
+        self.assertEqual(self.count_rows(), 0)
+        # the snapshot keeps the version it was taken of
+        self.assertEqual(self.count_rows(path=snapshot_path), 2)
+
+    def test_snapshot_after_in_place_write(self):
+        # test that writing to the file in place does not change a snapshot
+        snapshot_path = snapshot(self.path, pool=self.pool)
+        with TableauDataSource(self.path, pool=self.pool) as ds:
+            ds.bulk_append_rows('people', [(3,)])
+        self.pool.discard(self.path)
+        self.assertEqual(self.count_rows(), 3)
+        self.assertEqual(self.count_rows(path=snapshot_path), 2)
+
+        # a hard-linked snapshot shares the file
+        linked_path = snapshot(self.path, pool=self.pool, hard_link=True)
+        self.assertEqual(os.stat(linked_path).st_ino, os.stat(self.path).st_ino)
+
+if __name__ == '__main__':
+    unittest.main()
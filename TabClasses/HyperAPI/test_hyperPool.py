@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+class TestHyperConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.pool = HyperConnectionPool(max_connections_per_database=2, parameters={'log_config': ''})
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_acquire_and_release(self):
+        # test that a released connection is handed out again
+        connection = self.pool.acquire(self.path('a.hyper'))
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(self.path('a.hyper')), connection)
+        self.assertEqual(self.pool.stats(), {'opened': 1, 'reused': 1, 'idle': 0, 'in_use': 1})
+
+        # test that other files are served by the same Hyper process
+        other = self.pool.acquire(self.path('b.hyper'))
+        self.assertIsNot(other, connection)
+        self.assertEqual(self.pool.stats()['opened'], 2)
+
+    def test_discard(self):
+        # test that idle connections are closed and connections in use are closed on release
+        idle = self.pool.acquire(self.path('a.hyper'))
+        in_use = self.pool.acquire(self.path('a.hyper'))
+        self.pool.release(idle)
+        self.assertEqual(self.pool.discard(self.path('a.hyper')), 1)
+        self.assertFalse(idle.is_open)
+        self.pool.release(in_use)
+        self.assertFalse(in_use.is_open)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+        # test releasing a connection that does not belong to the pool
+        with self.assertRaises(ValueError):
+            self.pool.release(object())
+
+    def test_acquire_limit(self):
+        # test that acquire times out once every connection to a file is in use
+        first = self.pool.acquire(self.path('a.hyper'))
+        self.pool.acquire(self.path('a.hyper'))
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire(self.path('a.hyper'), timeout=0.01)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(self.path('a.hyper'), timeout=0.01), first)
+
+    def test_datasource_context_manager(self):
+        # test that a data source returns its connection to the pool on exit
+        with TableauDataSource(self.path('a.hyper'), pool=self.pool) as ds:
+            ds.create_table('test_table', {'id': tab_api.SqlType.int()})
+            ds.bulk_append_rows('test_table', [(1,), (2,)])
+        self.assertIsNone(ds.connection)
+        self.assertEqual(self.pool.stats()['idle'], 1)
+
+        # test that the next data source on the same file reuses the connection and sees the data
+        with TableauDataSource(self.path('a.hyper'), pool=self.pool) as ds:
+            self.assertEqual(ds.connection.execute_scalar_query('SELECT COUNT(*) FROM test_table'), 2)
+        self.assertEqual(self.pool.stats()['reused'], 1)
+
+    def test_close(self):
+        self.pool.acquire(self.path('a.hyper'))
+        self.pool.close()
+        self.assertIsNone(self.pool.hyper)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
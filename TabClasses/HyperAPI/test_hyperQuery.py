@@ -1,5 +1,10 @@
+import os
+import tempfile
 import unittest
-from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+import tableauhyperapi as tab_api
+import numpy as np
+import pandas as pd
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource, infer_sql_types
 
 class TestTableauDataSource(unittest.TestCase):
     def setUp(self):
@@ -121,5 +126,236 @@ class TestTableauDataSource(unittest.TestCase):
             "updatedAt": "2022-03-01T12:00:00Z"
         })
 
+
+class TestHyperProcessDataSource(unittest.TestCase):
+    """
+    Runs TableauDataSource against a local Hyper process.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hyper = tab_api.HyperProcess(tab_api.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                                         parameters={'log_config': ''})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.hyper.close()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'test_datasource.hyper')
+        self.ds = TableauDataSource(self.path)
+        self.ds.connection = tab_api.Connection(self.hyper.endpoint, self.path,
+                                                tab_api.CreateMode.CREATE_AND_REPLACE)
+        self.ds.connection.catalog.create_table(tab_api.TableDefinition(
+            tab_api.TableName('test_table'),
+            [tab_api.TableDefinition.Column('id', tab_api.SqlType.int()),
+             tab_api.TableDefinition.Column('name', tab_api.SqlType.text())]))
+
+    def tearDown(self):
+        self.ds.connection.close()
+        self.tmpdir.cleanup()
+
+    def count_rows(self, table_name='test_table'):
+        return self.ds.connection.execute_scalar_query(f'SELECT COUNT(*) FROM "{table_name}"')
+
+    def test_append_update_delete_rows(self):
+        # test the row-level methods against a real Hyper connection
+        self.ds.append_rows('test_table', [(1, 'John'), (2, 'Jane'), (3, 'Bob')])
+        self.ds.update_rows('test_table', "UPDATE test_table SET name = 'Mary' WHERE id = 1")
+        self.ds.delete_rows('test_table', "DELETE FROM test_table WHERE id = 3")
+        rows = self.ds.connection.execute_list_query('SELECT id, name FROM test_table ORDER BY id')
+        self.assertEqual(rows, [[1, 'Mary'], [2, 'Jane']])
+
+        # test updating a column that does not exist in the table
+        with self.assertRaises(ValueError):
+            self.ds.update_rows('test_table', "UPDATE test_table SET email = 'x' WHERE id = 1")
+
+        # test deleting rows from a nonexistent table
+        with self.assertRaises(ValueError):
+            self.ds.delete_rows('nonexistent_table', "DELETE FROM nonexistent_table WHERE id = 3")
+
+    def test_bulk_append_rows(self):
+        # test appending rows across several batches and flushes
+        rows = ((i, f'name{i}') for i in range(2500))
+        self.assertEqual(self.ds.bulk_append_rows('test_table', rows, batch_size=100, flush_size=1000), 2500)
+        self.assertEqual(self.count_rows(), 2500)
+
+        # test appending rows to a nonexistent table
+        with self.assertRaises(ValueError):
+            self.ds.bulk_append_rows('nonexistent_table', [(1, 'Bob')])
+
+        # test that an invalid row rolls back the whole append
+        with self.assertRaises(ValueError):
+            self.ds.bulk_append_rows('test_table', [(1, 'Tom')] * 50 + [(2, 'Tom', 'tom@example.com')],
+                                     batch_size=10, flush_size=20)
+        self.assertEqual(self.count_rows(), 2500)
+
+    def test_append_stream(self):
+        # test appending rows from a generator
+        self.assertEqual(self.ds.append_stream('test_table', ((i, 'gen') for i in range(10)), batch_size=3), 10)
+
+        # test appending rows from a CSV file read by the Hyper server
+        csv_path = os.path.join(self.tmpdir.name, 'rows.csv')
+        with open(csv_path, 'w') as f:
+            f.write('id,name\n1,John\n2,"Doe, Jane"\n')
+        self.assertEqual(self.ds.append_stream('test_table', csv_path), 2)
+        result = self.ds.connection.execute_list_query("SELECT id FROM test_table WHERE name = 'Doe, Jane'")
+        self.assertEqual(result, [[2]])
+
+        # test appending rows from a Parquet file read by the Hyper server
+        parquet_path = os.path.join(self.tmpdir.name, 'rows.parquet')
+        self.ds.connection.execute_command(
+            f"COPY (SELECT * FROM test_table) TO {tab_api.escape_string_literal(parquet_path)} WITH (FORMAT parquet)")
+        self.assertEqual(self.ds.append_stream('test_table', parquet_path), 12)
+        self.assertEqual(self.count_rows(), 24)
+
+        # test appending from a file with an unsupported format
+        with self.assertRaises(ValueError):
+            self.ds.append_stream('test_table', csv_path, file_format='json')
+
+    def test_append_dataframe(self):
+        df = pd.DataFrame({'id': np.arange(5, dtype='int32'), 'name': [f'name{i}' for i in range(5)]})
+
+        # test appending a DataFrame across several Arrow batches
+        self.assertEqual(self.ds.append_dataframe('test_table', df, batch_size=2), 5)
+        result = self.ds.connection.execute_list_query('SELECT name FROM test_table WHERE id = 4')
+        self.assertEqual(result, [['name4']])
+
+        # test appending NumPy columns given in a different order than the table
+        self.assertEqual(self.ds.append_columns('test_table', {'name': np.array(['a', 'b']), 'id': np.array([7, 8])}), 2)
+        self.assertEqual(self.count_rows(), 7)
+
+        # test appending a DataFrame whose columns do not match the table
+        with self.assertRaises(ValueError):
+            self.ds.append_dataframe('test_table', df.rename(columns={'name': 'email'}))
+
+    def test_query_chunks(self):
+        self.ds.bulk_append_rows('test_table', [(i, f'name{i}') for i in range(25)])
+        query = 'SELECT id, name FROM test_table ORDER BY id'
+
+        # test fetching rows in fixed-size chunks
+        chunks = list(self.ds.query_chunks(query, chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(chunks[2][-1], [24, 'name24'])
+
+        # test converting each chunk to NumPy arrays
+        chunk = next(self.ds.query_chunks(query, chunk_size=10, output='numpy'))
+        np.testing.assert_array_equal(chunk['id'], np.arange(10))
+
+        # test converting each chunk to a DataFrame
+        frames = list(self.ds.query_chunks(query, chunk_size=10, output='pandas'))
+        self.assertEqual(sum(len(frame) for frame in frames), 25)
+        self.assertEqual(list(frames[0].columns), ['id', 'name'])
+
+        # test closing the generator early releases the connection for other queries
+        chunks = self.ds.query_chunks(query, chunk_size=10)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(self.count_rows(), 25)
+
+        # test requesting an unsupported output format
+        with self.assertRaises(ValueError):
+            next(self.ds.query_chunks(query, output='json'))
+
+    def test_upsert_rows(self):
+        self.ds.bulk_append_rows('test_table', [(1, 'John'), (2, 'Jane')])
+
+        # test that matching keys are replaced and new keys are inserted
+        result = self.ds.upsert_rows('test_table', [(2, 'Mary'), (3, 'Bob')], ['id'])
+        self.assertEqual(result, {'deleted': 1, 'inserted': 2})
+        rows = self.ds.connection.execute_list_query('SELECT id, name FROM test_table ORDER BY id')
+        self.assertEqual(rows, [[1, 'John'], [2, 'Mary'], [3, 'Bob']])
+
+        # test that an invalid row rolls back the merge and drops the staging table
+        with self.assertRaises(ValueError):
+            self.ds.upsert_rows('test_table', [(1, 'Tom'), (4, 'Tom', 'tom@example.com')], ['id'])
+        self.assertEqual(self.count_rows(), 3)
+        self.assertEqual(self.ds.connection.catalog.get_table_names('pg_temp'), [])
+
+        # test upserting with an unknown key column
+        with self.assertRaises(ValueError):
+            self.ds.upsert_rows('test_table', [(1, 'Tom')], ['email'])
+
+    def test_update_rows_by_key(self):
+        self.ds.bulk_append_rows('test_table', [(i, f'name{i}') for i in range(1000)])
+
+        # test that every correction is applied by one statement
+        updated = self.ds.update_rows_by_key('test_table', [(i, (f'fixed{i}',)) for i in range(0, 1000, 2)] +
+                                             [(5000, ('missing',))], ['id'], ['name'])
+        self.assertEqual(updated, 500)
+        rows = self.ds.connection.execute_list_query('SELECT id, name FROM test_table WHERE id < 3 ORDER BY id')
+        self.assertEqual(rows, [[0, 'fixed0'], [1, 'name1'], [2, 'fixed2']])
+        self.assertEqual(self.ds.connection.catalog.get_table_names('pg_temp'), [])
+
+        # test that invalid updates roll back the batch
+        with self.assertRaises(ValueError):
+            self.ds.update_rows_by_key('test_table', [(1, ('a',)), (3, ('b', 'c'))], ['id'], ['name'])
+        with self.assertRaises(ValueError):
+            self.ds.update_rows_by_key('test_table', [(1, ('a',))], ['id'], ['id'])
+        with self.assertRaises(ValueError):
+            self.ds.update_rows_by_key('test_table', [(1, ('a',))], ['id'], ['email'])
+        self.assertEqual(self.ds.connection.execute_scalar_query('SELECT name FROM test_table WHERE id = 1'),
+                         'name1')
+
+    def test_delete_rows_by_key(self):
+        self.ds.bulk_append_rows('test_table', [(i, f'name{i % 3}') for i in range(100)])
+
+        # test deleting by a single key column and by a composite key
+        self.assertEqual(self.ds.delete_rows_by_key('test_table', range(0, 50), ['id']), 50)
+        self.assertEqual(self.ds.delete_rows_by_key('test_table', [(50, 'name2'), (51, 'name1')], ['id', 'name']), 1)
+        self.assertEqual(self.count_rows(), 49)
+        self.assertEqual(self.ds.delete_rows_by_key('test_table', [], ['id']), 0)
+        self.assertEqual(self.ds.connection.catalog.get_table_names('pg_temp'), [])
+
+    def test_metadata_cache(self):
+        # test that only the first lookup of a table queries the catalog
+        self.ds.bulk_append_rows('test_table', [(1, 'John')])
+        self.ds.bulk_append_rows('test_table', [(2, 'Jane')])
+        self.assertEqual(self.ds.get_schema('test_table'), {'id': tab_api.SqlType.int(), 'name': tab_api.SqlType.text()})
+        self.assertEqual(self.ds.cache_info(), {'hits': 2, 'misses': 1, 'size': 1})
+
+        # test that create_table caches the new table and rejects a duplicate name from the cache
+        self.ds.create_table('cached_table', {'id': tab_api.SqlType.int()})
+        self.ds.get_schema('cached_table')
+        self.assertEqual(self.ds.cache_info(), {'hits': 3, 'misses': 1, 'size': 2})
+        with self.assertRaises(ValueError):
+            self.ds.create_table('cached_table', {'id': tab_api.SqlType.int()})
+
+        # test that has_table counts cached tables as hits and catalog lookups as misses
+        self.assertTrue(self.ds.has_table('cached_table'))
+        self.assertFalse(self.ds.has_table('missing_table'))
+        self.assertEqual(self.ds.cache_info(), {'hits': 4, 'misses': 2, 'size': 2})
+
+        # test refreshing after the table is dropped outside of the class
+        self.ds.connection.execute_command('DROP TABLE cached_table')
+        self.ds.refresh_metadata('cached_table')
+        with self.assertRaises(ValueError):
+            self.ds.get_schema('cached_table')
+        self.ds.refresh_metadata()
+        self.assertEqual(self.ds.cache_info()['size'], 0)
+
+    def test_infer_sql_types(self):
+        df = pd.DataFrame({
+            'id': np.arange(3, dtype='int64'),
+            'score': np.array([1.5, 2.5, 3.5]),
+            'active': [True, False, True],
+            'name': ['a', 'b', 'c'],
+            'created': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-03']),
+        })
+        self.assertEqual(infer_sql_types(df), {
+            'id': tab_api.SqlType.big_int(),
+            'score': tab_api.SqlType.double(),
+            'active': tab_api.SqlType.bool(),
+            'name': tab_api.SqlType.text(),
+            'created': tab_api.SqlType.timestamp(),
+        })
+
+        # test creating a table from the inferred types and appending the DataFrame to it
+        self.ds.create_table('inferred_table', infer_sql_types(df))
+        self.assertEqual(self.ds.append_dataframe('inferred_table', df), 3)
+        self.assertEqual(self.count_rows('inferred_table'), 3)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
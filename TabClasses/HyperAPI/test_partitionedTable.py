@@ -0,0 +1,131 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+from TabClasses.HyperAPI.partitionedTable import PartitionedTable
+
+class TestPartitionedTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = HyperConnectionPool(parameters={'log_config': ''})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.ds = TableauDataSource(os.path.join(self.tmpdir.name, 'events.hyper'), pool=self.pool)
+        self.columns = {'id': tab_api.SqlType.int(), 'ts': tab_api.SqlType.timestamp()}
+        self.events = PartitionedTable(self.ds, 'events', 'ts', columns=self.columns)
+        # 10 events per month from January to March 2023
+        self.rows = [(month * 100 + day, datetime.datetime(2023, month, day + 1, 12))
+                     for month in (1, 2, 3) for day in range(10)]
+        self.events.append_rows(self.rows, batch_size=7)
+
+    def tearDown(self):
+        self.ds.close()
+        self.tmpdir.cleanup()
+
+    def test_append_rows(self):
+        self.assertEqual(self.events.partitions(), ['2023_01', '2023_02', '2023_03'])
+        self.assertEqual(self.ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events_p2023_02'), 10)
+
+        # test that partitions are found again by a new instance without the column definitions
+        events = PartitionedTable(self.ds, 'events', 'ts')
+        self.assertEqual(events.partitions(), ['2023_01', '2023_02', '2023_03'])
+        events.append_rows([(400, datetime.datetime(2023, 4, 1))])
+        self.assertEqual(events.partitions()[-1], '2023_04')
+
+    def test_append_dataframe(self):
+        df = pd.DataFrame({'id': [1, 2], 'ts': pd.to_datetime(['2023-03-31', '2023-05-01'])})
+        df['id'] = df['id'].astype('int32')
+        self.assertEqual(self.events.append_dataframe(df), 2)
+        self.assertEqual(self.events.partitions(), ['2023_01', '2023_02', '2023_03', '2023_05'])
+
+    def test_null_partition_value(self):
+        # test that rows without a partition value are rejected instead of dropped
+        df = pd.DataFrame({'id': [1, 2, 3], 'ts': pd.to_datetime(['2023-06-01', None, '2023-06-02'])})
+        df['id'] = df['id'].astype('int32')
+        with self.assertRaises(ValueError):
+            self.events.append_dataframe(df)
+        with self.assertRaises(ValueError):
+            self.events.append_rows([(1, datetime.datetime(2023, 6, 1)), (2, None)])
+        self.assertEqual(self.events.partitions(), ['2023_01', '2023_02', '2023_03'])
+
+    def test_append_rows_rollback(self):
+        # test that a batch failing in one partition appends none of its rows
+        rows = [(1, datetime.datetime(2023, 1, 20)), (2, datetime.datetime(2023, 2, 20)),
+                (3, datetime.datetime(2023, 4, 20), 'extra')]
+        with self.assertRaises(ValueError):
+            self.events.append_rows(rows)
+        self.assertEqual(sum(len(chunk) for chunk in self.events.query_chunks()), 30)
+
+    def test_query_chunks_prunes_partitions(self):
+        # test that only partitions overlapping the range are queried
+        self.assertEqual(self.events._prune(datetime.date(2023, 2, 5), datetime.datetime(2023, 3, 1, 6)),
+                         ['2023_02', '2023_03'])
+        chunks = self.events.query_chunks(start=datetime.date(2023, 2, 5), end=datetime.date(2023, 3, 1),
+                                          columns=['id'])
+        ids = sorted(row[0] for chunk in chunks for row in chunk)
+        self.assertEqual(ids, [204, 205, 206, 207, 208, 209])
+
+        # test combining a condition with the time range
+        chunks = self.events.query_chunks(where='id % 2 = 0', start=datetime.date(2023, 3, 1))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 5)
+
+        # test that a range without partitions yields nothing
+        self.assertEqual(list(self.events.query_chunks(start=datetime.date(2024, 1, 1))), [])
+
+    def test_drop_partitions(self):
+        self.assertEqual(self.events.drop_partitions(datetime.date(2023, 3, 1)), ['2023_01', '2023_02'])
+        self.assertEqual(self.events.partitions(), ['2023_03'])
+        self.assertFalse(self.ds.has_table('events_p2023_01'))
+
+    def test_delete_and_compact(self):
+        self.assertEqual(self.events.delete_rows('id % 2 = 0', start=datetime.date(2023, 2, 1)), 10)
+
+        # test that only partitions with enough deleted rows are compacted
+        self.events.delete_rows('id = 100')
+        self.assertEqual(self.events.compact(min_deleted_fraction=0.2), ['2023_02', '2023_03'])
+        self.assertEqual(self.ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events_p2023_02'), 5)
+        self.assertEqual(self.events.compact(), [])
+
+        # test compacting an explicit partition
+        self.assertEqual(self.events.compact(['2023_01']), ['2023_01'])
+        self.assertEqual(self.ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events_p2023_01'), 9)
+
+    def test_compact_failure_keeps_partition(self):
+        # test that a failed swap leaves the partition in place and drops the compacted copy
+        execute_command = tab_api.Connection.execute_command
+
+        def fail_on_rename(connection, command):
+            if command.startswith('ALTER TABLE') and '_compact' in command:
+                raise RuntimeError("rename failed")
+            return execute_command(connection, command)
+
+        with patch.object(tab_api.Connection, 'execute_command', fail_on_rename):
+            with self.assertRaises(RuntimeError):
+                self.events.compact(['2023_01'])
+        self.assertEqual(self.ds.connection.execute_scalar_query('SELECT COUNT(*) FROM events_p2023_01'), 10)
+        self.assertEqual(len(self.ds.connection.catalog.get_table_names('public')), 3)
+
+    def test_delete_rows_rollback(self):
+        # test that a delete failing in one partition leaves every partition untouched
+        with self.assertRaises(tab_api.HyperException):
+            self.events.delete_rows('id < 250 OR 1 / (id - 300) = 1')
+        count = sum(len(chunk) for chunk in self.events.query_chunks())
+        self.assertEqual(count, 30)
+        self.assertEqual(self.events._deleted_rows, {})
+
+    def test_invalid_period(self):
+        with self.assertRaises(ValueError):
+            PartitionedTable(self.ds, 'events', 'ts', period='week')
+
+if __name__ == '__main__':
+    unittest.main()
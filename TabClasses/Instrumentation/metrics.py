@@ -0,0 +1,386 @@
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+import uuid
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+# upper bounds in seconds, from a fast catalog lookup to a large extract load
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   300.0)
+
+_current_span = contextvars.ContextVar('tabclasses_current_span', default=None)
+
+
+class Histogram:
+    """
+    A latency histogram with fixed bucket bounds, as used by Prometheus.
+
+    Observations only increment a bucket counter, so memory stays constant
+    however many operations are recorded. Quantiles are estimated by linear
+    interpolation within the bucket they fall in.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Constructor for the Histogram class.
+
+        Parameters:
+            buckets (tuple of float): The sorted upper bounds of the buckets in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Records one observation.
+
+        Parameters:
+            value (float): The observed number of seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Returns an estimate of a quantile, or None if nothing was observed.
+
+        Parameters:
+            q (float): The quantile between 0 and 1, e.g. 0.95.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+
+class _Series:
+    """
+    The histogram and counters of one operation with one set of labels.
+    """
+
+    def __init__(self, buckets):
+        self.histogram = Histogram(buckets)
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+
+class _NoopTimer:
+    """
+    The timer returned while metrics are disabled. It records nothing.
+    """
+
+    rows = 0
+    bytes = 0
+    error = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def __setattr__(self, name, value):
+        # counts set by the instrumented code are dropped
+        pass
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    """
+    Times one operation and records it as a span when tracing is on.
+
+    Set rows and bytes before the block ends to count them, and error to
+    count the operation as failed without raising.
+    """
+
+    def __init__(self, registry, operation, labels):
+        self.registry = registry
+        self.operation = operation
+        self.labels = labels
+        self.rows = 0
+        self.bytes = 0
+        self.error = False
+        self.attributes = {}
+        self._span = None
+        self._token = None
+        self._otel_span = None
+
+    def __enter__(self):
+        registry = self.registry
+        if registry._exporters or registry._tracer is not None:
+            parent = _current_span.get()
+            self._span = {
+                'name': self.operation,
+                'trace_id': parent['trace_id'] if parent is not None else uuid.uuid4().hex,
+                'span_id': uuid.uuid4().hex[:16],
+                'parent_id': parent['span_id'] if parent is not None else None,
+                'start': time.time(),
+            }
+            self._token = _current_span.set(self._span)
+            if registry._tracer is not None:
+                self._otel_span = registry._tracer.start_as_current_span(self.operation, attributes=self.labels)
+                self._otel_span.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def set_attribute(self, key, value):
+        """
+        Adds an attribute to the span of the operation.
+        """
+        self.attributes[key] = value
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self._start
+        error = self.error or exc_type is not None
+        self.registry.observe(self.operation, seconds, rows=self.rows, bytes=self.bytes, error=error,
+                              **self.labels)
+        if self._span is not None:
+            _current_span.reset(self._token)
+            attributes = dict(self.labels, **self.attributes)
+            if self.rows:
+                attributes['rows'] = self.rows
+            if self.bytes:
+                attributes['bytes'] = self.bytes
+            if self._otel_span is not None:
+                otel_span = otel_trace.get_current_span()
+                otel_span.set_attributes(attributes)
+                if error:
+                    otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+                self._otel_span.__exit__(exc_type, exc_value, traceback)
+            self._span.update(seconds=seconds, attributes=attributes, status='error' if error else 'ok')
+            self.registry._export(self._span)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Collects latency histograms, row and byte counters and spans of the Tableau clients.
+
+    TableauTransport times every REST call, and TableauDataSource times
+    connections, catalog lookups, inserts, copies, queries, updates and
+    deletes. Each operation is recorded per set of labels. While the
+    registry is disabled, timer returns a shared no-op object, so the
+    instrumented code pays for one attribute check per operation.
+    """
+
+    def __init__(self, enabled=True, buckets=DEFAULT_BUCKETS):
+        """
+        Constructor for the MetricsRegistry class.
+
+        Parameters:
+            enabled (bool): Record operations. A disabled registry records nothing until enabled.
+            buckets (tuple of float): The upper bounds in seconds of the latency histogram buckets.
+        """
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._exporters = []
+        self._tracer = None
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """
+        Starts recording operations.
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stops recording operations. Recorded metrics are kept.
+        """
+        self.enabled = False
+
+    def timer(self, operation, **labels):
+        """
+        Returns a context manager that records the duration of an operation.
+
+        Parameters:
+            operation (str): The name of the operation, e.g. 'hyper.insert'.
+            **labels: Labels of the operation, e.g. table='people'. Keep their values low in cardinality.
+
+        Returns:
+            A context manager whose rows, bytes and error attributes can be set inside the block.
+        """
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, operation, labels)
+
+    def observe(self, operation, seconds, rows=0, bytes=0, error=False, **labels):
+        """
+        Records an operation that was timed by the caller.
+
+        Parameters:
+            operation (str): The name of the operation.
+            seconds (float): The duration of the operation.
+            rows (int): The number of rows the operation processed.
+            bytes (int): The number of bytes the operation processed.
+            error (bool): Whether the operation failed.
+            **labels: Labels of the operation.
+        """
+        if not self.enabled:
+            return
+        key = (operation, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.buckets)
+            series.histogram.observe(seconds)
+            series.rows += rows
+            series.bytes += bytes
+            if error:
+                series.errors += 1
+
+    def add_span_exporter(self, exporter):
+        """
+        Registers a function that receives every finished span.
+
+        Spans of operations started inside another operation share its trace ID
+        and name it as their parent.
+
+        Parameters:
+            exporter (callable): Called with a dict with 'name', 'trace_id', 'span_id', 'parent_id',
+                'start' (a UNIX timestamp), 'seconds', 'attributes' and 'status' ('ok' or 'error').
+        """
+        self._exporters.append(exporter)
+
+    def enable_opentelemetry(self, tracer=None):
+        """
+        Also records every operation as an OpenTelemetry span.
+
+        Parameters:
+            tracer (opentelemetry.trace.Tracer): The tracer to use. Defaults to the tracer of the global provider.
+        """
+        if otel_trace is None:
+            raise ImportError("opentelemetry-api is required for OpenTelemetry spans. "
+                              "Install it with 'pip install opentelemetry-api'.")
+        self._tracer = tracer or otel_trace.get_tracer('TabClasses')
+
+    def _export(self, span):
+        for exporter in self._exporters:
+            try:
+                exporter(span)
+            except Exception as e:
+                print(f"Warning: Span exporter failed: {type(e).__name__}: {e}")
+
+    def stats(self):
+        """
+        Returns a summary of every recorded operation.
+
+        Returns:
+            list of dict: One dict per operation and set of labels with 'operation', 'labels', 'count', 'errors',
+            'seconds' (the total), 'mean', 'p50', 'p95', 'p99', 'max', 'rows', 'bytes', 'rows_per_second' and
+            'bytes_per_second', where the rates are relative to the time spent in the operation.
+        """
+        with self._lock:
+            summaries = []
+            for (operation, labels), series in sorted(self._series.items()):
+                histogram = series.histogram
+                summaries.append({
+                    'operation': operation,
+                    'labels': dict(labels),
+                    'count': histogram.count,
+                    'errors': series.errors,
+                    'seconds': histogram.sum,
+                    'mean': histogram.sum / histogram.count,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'p99': histogram.quantile(0.99),
+                    'max': histogram.max,
+                    'rows': series.rows,
+                    'bytes': series.bytes,
+                    'rows_per_second': series.rows / histogram.sum if histogram.sum else 0.0,
+                    'bytes_per_second': series.bytes / histogram.sum if histogram.sum else 0.0,
+                })
+            return summaries
+
+    def to_prometheus(self, prefix='tableau'):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Parameters:
+            prefix (str): The prefix of the metric names.
+
+        Returns:
+            str: The histogram of operation durations and the error, row and byte counters.
+        """
+        lines = [f"# HELP {prefix}_operation_seconds Duration of client operations.",
+                 f"# TYPE {prefix}_operation_seconds histogram"]
+        counters = {'errors': [], 'rows': [], 'bytes': []}
+        with self._lock:
+            for (operation, labels), series in sorted(self._series.items()):
+                label_text = ','.join(f'{name}="{_escape_label(value)}"'
+                                      for name, value in (('operation', operation),) + labels)
+                histogram = series.histogram
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(float(bound))
+                    lines.append(f'{prefix}_operation_seconds_bucket{{{label_text},le="{le}"}} {cumulative}')
+                lines.append(f"{prefix}_operation_seconds_sum{{{label_text}}} {histogram.sum!r}")
+                lines.append(f"{prefix}_operation_seconds_count{{{label_text}}} {histogram.count}")
+                for name in counters:
+                    counters[name].append(f"{prefix}_operation_{name}_total{{{label_text}}} "
+                                          f"{getattr(series, name)}")
+        for name, samples in counters.items():
+            lines.append(f"# HELP {prefix}_operation_{name}_total Total {name} of client operations.")
+            lines.append(f"# TYPE {prefix}_operation_{name}_total counter")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Drops every recorded metric.
+        """
+        with self._lock:
+            self._series.clear()
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """
+    Returns the process-wide metrics registry, creating it on first use.
+
+    The registry is disabled unless the TABLEAU_METRICS environment variable
+    is set to 1, so instrumentation costs nothing until it is turned on.
+
+    Returns:
+        MetricsRegistry: The shared registry.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry(enabled=os.environ.get('TABLEAU_METRICS') == '1')
+        return _default_registry
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+import tableauhyperapi as tab_api
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+from TabClasses.Instrumentation.metrics import Histogram, MetricsRegistry, _NOOP_TIMER
+from TabClasses.RestClient.restTransport import TableauTransport, _body_size, _endpoint
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestHistogram(unittest.TestCase):
+    def test_quantile(self):
+        histogram = Histogram(buckets=(0.1, 0.2, 0.4))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in [0.05] * 50 + [0.15] * 40 + [0.3] * 10:
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [50, 40, 10, 0])
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.1)
+        self.assertTrue(0.2 <= histogram.quantile(0.95) <= 0.3)
+        self.assertEqual(histogram.max, 0.3)
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_timer(self):
+        metrics = MetricsRegistry()
+        for _ in range(3):
+            with metrics.timer('hyper.insert', table='people') as timer:
+                timer.rows = 100
+                timer.bytes = 1000
+        with self.assertRaises(ValueError):
+            with metrics.timer('hyper.insert', table='people'):
+                raise ValueError("boom")
+        stats, = metrics.stats()
+        self.assertEqual((stats['operation'], stats['labels']), ('hyper.insert', {'table': 'people'}))
+        self.assertEqual((stats['count'], stats['errors'], stats['rows'], stats['bytes']), (4, 1, 300, 3000))
+        self.assertGreater(stats['rows_per_second'], 0)
+
+    def test_disabled(self):
+        metrics = MetricsRegistry(enabled=False)
+        self.assertIs(metrics.timer('hyper.insert'), _NOOP_TIMER)
+        with metrics.timer('hyper.insert') as timer:
+            timer.rows = 100
+        self.assertEqual(_NOOP_TIMER.rows, 0)
+        metrics.observe('hyper.query', 1.0)
+        self.assertEqual(metrics.stats(), [])
+
+    def test_prometheus(self):
+        metrics = MetricsRegistry(buckets=(0.5, 1.0))
+        metrics.observe('rest.request', 0.7, bytes=10, method='GET', endpoint='/api/"x"')
+        text = metrics.to_prometheus()
+        labels = 'operation="rest.request",endpoint="/api/\\"x\\"",method="GET"'
+        self.assertIn('# TYPE tableau_operation_seconds histogram', text)
+        self.assertIn(f'tableau_operation_seconds_bucket{{{labels},le="0.5"}} 0', text)
+        self.assertIn(f'tableau_operation_seconds_bucket{{{labels},le="1.0"}} 1', text)
+        self.assertIn(f'tableau_operation_seconds_bucket{{{labels},le="+Inf"}} 1', text)
+        self.assertIn(f'tableau_operation_seconds_count{{{labels}}} 1', text)
+        self.assertIn(f'tableau_operation_bytes_total{{{labels}}} 10', text)
+
+    def test_spans(self):
+        metrics = MetricsRegistry()
+        spans = []
+        metrics.add_span_exporter(spans.append)
+        with metrics.timer('sync'):
+            with metrics.timer('hyper.insert', table='people') as timer:
+                timer.rows = 5
+        inner, outer = spans
+        self.assertEqual(inner['trace_id'], outer['trace_id'])
+        self.assertEqual(inner['parent_id'], outer['span_id'])
+        self.assertIsNone(outer['parent_id'])
+        self.assertEqual(inner['attributes'], {'table': 'people', 'rows': 5})
+        self.assertEqual(inner['status'], 'ok')
+
+class TestInstrumentedClients(unittest.TestCase):
+    def test_transport(self):
+        self.assertEqual(_endpoint('http://host/api/3.10/sites/site-1/schedules/abc123'),
+                         '/api/3.10/sites/{id}/schedules/{id}')
+        metrics = MetricsRegistry()
+        with MockTableauServer(schedule_count=2) as server, TableauTransport(metrics=metrics) as transport:
+            for _ in range(3):
+                transport.get(f"{server.url}/api/3.10/sites/site-1/schedules/schedule-1")
+            transport.get(f"{server.url}/api/3.10/sites/site-1/schedules/missing-1")
+        stats, = metrics.stats()
+        self.assertEqual(stats['labels'], {'method': 'GET', 'endpoint': '/api/3.10/sites/{id}/schedules/{id}'})
+        self.assertEqual((stats['count'], stats['errors']), (4, 1))
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_streamed_upload(self):
+        # test that a streamed request body is recorded without its size
+        metrics = MetricsRegistry()
+        with MockTableauServer(schedule_count=1) as server, TableauTransport(metrics=metrics) as transport:
+            response = transport.post(f"{server.url}/api/3.10/sites/site-1/schedules/schedule-0/runNow",
+                                      data=(chunk for chunk in [b'{', b'}']))
+        self.assertEqual(response.status_code, 202)
+        stats, = metrics.stats()
+        self.assertEqual(stats['bytes'], len(response.content))
+        self.assertEqual(_body_size('{"name": "é"}'), 14)
+        self.assertEqual(_body_size(b'{}'), 2)
+        self.assertEqual(_body_size(None), 0)
+
+    def test_datasource(self):
+        metrics = MetricsRegistry()
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                HyperConnectionPool(parameters={'log_config': ''}) as pool, \
+                TableauDataSource(os.path.join(tmpdir, 'metrics.hyper'), pool=pool, metrics=metrics) as ds:
+            ds.create_table('people', {'id': tab_api.SqlType.int()})
+            ds.bulk_append_rows('people', [(i,) for i in range(1000)])
+            ds.delete_rows('people', 'DELETE FROM people WHERE id < 100')
+            chunks = list(ds.query_chunks('SELECT * FROM people', chunk_size=300))
+        self.assertEqual(len(chunks), 3)
+        stats = {entry['operation']: entry for entry in metrics.stats()}
+        self.assertEqual(stats['hyper.insert']['rows'], 1000)
+        self.assertEqual(stats['hyper.delete']['rows'], 100)
+        self.assertEqual((stats['hyper.query']['count'], stats['hyper.query']['rows']), (1, 900))
+        self.assertEqual(stats['hyper.connect']['count'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import concurrent.futures
+import functools
+
+from TabClasses.RestClient.restTransport import TableauTransport
+
+
+class AsyncClient:
+    """
+    A base class for asyncio variants of the synchronous REST clients.
+
+    Every call of the wrapped client runs on a thread pool while a semaphore
+    bounds the number of requests in flight, so many calls can be awaited
+    together with asyncio.gather and finish in about the time of the slowest.
+    """
+
+    def __init__(self, max_concurrency=10, transport=None):
+        """
+        Constructor for the AsyncClient class.
+
+        Parameters:
+            max_concurrency (int): The maximum number of requests in flight at once.
+            transport (TableauTransport): The HTTP transport to use. By default the client creates its own
+                transport with one pooled connection per concurrent request.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self._owns_transport = transport is None
+        self.transport = transport or TableauTransport(pool_maxsize=max_concurrency)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def _call(self, method, *args, **kwargs):
+        """
+        Runs a method of the synchronous client on the thread pool once a slot of the semaphore is free.
+        """
+        loop = asyncio.get_running_loop()
+        # asyncio primitives belong to one event loop, so a new loop gets a new semaphore
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    def close(self):
+        """
+        Shuts down the thread pool and closes the transport if the client created it.
+        """
+        self._executor.shutdown(wait=True)
+        if self._owns_transport:
+            self.transport.close()
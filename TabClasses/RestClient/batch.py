@@ -0,0 +1,55 @@
+import concurrent.futures
+import time
+
+
+class BatchError(Exception):
+    """
+    Raised after a batch finished when at least one of its items failed.
+
+    Attributes:
+        results (list of dict): The results of every item, in the order of the items.
+        failures (list of dict): The results of the failed items.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.failures = [result for result in results if result['error'] is not None]
+        super().__init__(f"{len(self.failures)} of {len(results)} batch items failed: "
+                         + "; ".join(f"{failure['item']!r}: {failure['error']}" for failure in self.failures[:5]))
+
+
+def run_batch(function, items, max_workers=8, raise_on_error=False):
+    """
+    Calls a function once per item on a thread pool and collects one result per item.
+
+    A failing item does not stop the others.
+
+    Parameters:
+        function (callable): Called with each item.
+        items (iterable): The items of the batch.
+        max_workers (int): The maximum number of items processed at once.
+        raise_on_error (bool): Raise a BatchError once every item is done if any item failed.
+
+    Returns:
+        list of dict: One result per item, in the order of the items, with 'item', 'result',
+        'seconds' and 'error', which is None if the item succeeded.
+    """
+    items = list(items)
+
+    def call(item):
+        start = time.perf_counter()
+        result = {'item': item, 'result': None, 'seconds': 0.0, 'error': None}
+        try:
+            result['result'] = function(item)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    if not items:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        results = list(executor.map(call, items))
+    if raise_on_error and any(result['error'] is not None for result in results):
+        raise BatchError(results)
+    return results
@@ -0,0 +1,112 @@
+import collections
+import threading
+import time
+
+
+class LookupCache:
+    """
+    A thread-safe name-to-ID index shared by the Tableau Server REST clients.
+
+    Entries expire after a time-to-live and the least recently used entries
+    are evicted once the cache is full. Keys are tuples such as
+    (server_url, site_id, 'schedules', name).
+    """
+
+    def __init__(self, ttl=300, max_entries=10000):
+        """
+        Constructor for the LookupCache class.
+
+        Parameters:
+            ttl (float): The number of seconds an entry stays valid. None keeps entries until they are evicted.
+            max_entries (int): The maximum number of entries kept.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for a key and marks it as recently used.
+
+        Parameters:
+            key (tuple): The key of the entry.
+            default: The value returned if the key is not cached or has expired.
+
+        Returns:
+            The cached value, or default.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Caches a value, evicting the least recently used entry if the cache is full.
+
+        Parameters:
+            key (tuple): The key of the entry.
+            value: The value to cache.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *prefix):
+        """
+        Removes every entry whose key starts with prefix. Without a prefix the whole cache is cleared.
+
+        Parameters:
+            *prefix: The leading elements of the keys to remove, e.g. (server_url, site_id, 'schedules').
+        """
+        with self._lock:
+            if not prefix:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[:len(prefix)] == prefix]:
+                del self._entries[key]
+
+    def stats(self):
+        """
+        Returns statistics about the cache.
+
+        Returns:
+            dict: The number of hits, misses and evictions and the current number of entries.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self._entries)}
+
+
+_default_lookup_cache = None
+_default_lookup_cache_lock = threading.Lock()
+
+
+def get_default_lookup_cache():
+    """
+    Returns the process-wide lookup cache, creating it on first use.
+
+    Returns:
+        LookupCache: The shared lookup cache.
+    """
+    global _default_lookup_cache
+    with _default_lookup_cache_lock:
+        if _default_lookup_cache is None:
+            _default_lookup_cache = LookupCache()
+        return _default_lookup_cache
@@ -0,0 +1,55 @@
+import concurrent.futures
+
+
+def iter_pages(transport, url, headers, key, page_size=100, prefetch=True):
+    """
+    Lazily iterates over the items of a paginated Tableau Server REST endpoint.
+
+    Pages are requested with the pageSize and pageNumber query parameters
+    only when the items of the previous page have been consumed. With
+    prefetch, the next page is requested in a background thread while the
+    current page is consumed. Closing the generator early, e.g. by breaking
+    out of a loop once an item is found, requests no further pages.
+
+    Parameters:
+        transport (TableauTransport): The HTTP transport to send the requests with.
+        url (str): The URL of the endpoint.
+        headers (dict): The headers of every request.
+        key (str): The key of the list of items in the response body, e.g. 'schedules'.
+        page_size (int): The number of items per page.
+        prefetch (bool): Request the next page while the current page is consumed.
+
+    Returns:
+        generator of dict: The items of every page in order.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1.")
+
+    def fetch(page_number):
+        response = transport.get(url, headers=headers, params={'pageSize': page_size, 'pageNumber': page_number})
+        response.raise_for_status()
+        return response.json()
+
+    def has_next(body, page_number):
+        pagination = body.get('pagination')
+        # servers that do not paginate return every item on the first page
+        if pagination is None:
+            return False
+        return page_number * page_size < int(pagination['totalAvailable'])
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page_number = 1
+        body = fetch(page_number)
+        while True:
+            next_page = None
+            if executor is not None and has_next(body, page_number):
+                next_page = executor.submit(fetch, page_number + 1)
+            yield from body[key]
+            if not has_next(body, page_number):
+                return
+            page_number += 1
+            body = next_page.result() if next_page is not None else fetch(page_number)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
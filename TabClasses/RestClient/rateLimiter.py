@@ -0,0 +1,145 @@
+import collections
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    An adaptive token-bucket rate limiter shared by the transports of a process.
+
+    Every request takes a token. Tokens are refilled at `rate` per second up
+    to `burst`. When the server throttles a request, the rate is halved and
+    every caller is paused for the Retry-After period, then the rate grows
+    back by `increase` requests per second with every successful request, up
+    to `max_rate`. Throttles within `cooldown` seconds of a decrease are
+    counted but do not lower the rate again, since requests that were already
+    in flight are throttled together. Without a rate, requests are not
+    limited until the first throttle, which sets the rate to half of the rate
+    observed in the last second.
+    """
+
+    def __init__(self, rate=None, burst=None, max_rate=None, min_rate=1.0, increase=0.5, cooldown=1.0,
+                 adaptive=True):
+        """
+        Constructor for the RateLimiter class.
+
+        Parameters:
+            rate (float): The initial number of requests per second. None does not limit requests.
+            burst (float): The maximum number of tokens that can accumulate. Defaults to one second of requests.
+            max_rate (float): The rate adaptive increases stop at. Defaults to the initial rate, or no limit.
+            min_rate (float): The rate adaptive decreases stop at.
+            increase (float): The number of requests per second the rate grows by after each success.
+            cooldown (float): The number of seconds after a decrease in which throttles do not lower the rate.
+            adaptive (bool): Adjust the rate when the server throttles requests.
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.cooldown = cooldown
+        self.adaptive = adaptive
+        self.throttles = 0
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self._tokens = self._capacity() if rate is not None else 0.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = None
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+
+    def _capacity(self):
+        return self.burst if self.burst is not None else max(self.rate, 1.0)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Blocks until the caller may send a request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._recent.append(now)
+            while self._recent[0] < now - 1.0:
+                self._recent.popleft()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate is not None:
+                # tokens may go negative, which reserves the next ones in arrival order
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            if wait > 0:
+                self.waits += 1
+                self.waited_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def throttled(self, retry_after=None):
+        """
+        Records a throttled request, lowers the rate and pauses every caller for retry_after seconds.
+
+        Parameters:
+            retry_after (float): The number of seconds the server asked clients to wait, or None.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttles += 1
+            if self.adaptive and (self._decreased_at is None or now - self._decreased_at >= self.cooldown):
+                if self.rate is None:
+                    self.rate = max(self.min_rate, len(self._recent) / 2)
+                    # the request being retried may go ahead once any pause is over
+                    self._tokens = 1.0
+                else:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                self._decreased_at = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def succeeded(self):
+        """
+        Records a successful request and raises the rate towards max_rate.
+        """
+        if not self.adaptive or self.rate is None:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate += self.increase
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+
+    def stats(self):
+        """
+        Returns statistics about the limiter.
+
+        Returns:
+            dict: The current rate, the number of throttles, and the number and total seconds of waits.
+        """
+        with self._lock:
+            return {'rate': self.rate, 'throttles': self.throttles, 'waits': self.waits,
+                    'waited_seconds': self.waited_seconds}
+
+
+_default_rate_limiter = None
+_default_rate_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter():
+    """
+    Returns the process-wide rate limiter, creating it on first use.
+
+    Returns:
+        RateLimiter: The shared rate limiter.
+    """
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = RateLimiter()
+        return _default_rate_limiter
@@ -0,0 +1,252 @@
+import email.utils
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from TabClasses.Instrumentation.metrics import get_default_registry
+from TabClasses.RestClient.rateLimiter import get_default_rate_limiter
+
+RETRY_STATUSES = (429, 502, 503, 504)
+# requests that failed without a response are only sent again if repeating them is safe
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# statuses that mean the server did not process the request, so other methods can be retried too
+UNPROCESSED_STATUSES = (429, 503)
+
+
+def _parse_retry_after(value):
+    """
+    Returns the number of seconds of a Retry-After header given in seconds or as an HTTP date, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def _body_size(body):
+    """
+    Returns the number of bytes of a request body, or 0 for a streamed body such as a generator or file object.
+    """
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0
+
+
+def _endpoint(url):
+    """
+    Returns the path of a URL with its IDs replaced by {id}, so metrics are grouped per endpoint.
+    """
+    segments = urllib.parse.urlsplit(url).path.split('/')
+    return '/'.join('{id}' if re.search(r'\d', segment) and not re.fullmatch(r'\d+\.\d+', segment) else segment
+                    for segment in segments)
+
+
+class TableauTransport:
+    """
+    A shared HTTP transport for the Tableau Server REST clients.
+
+    Requests go through one requests.Session with a pooled, keep-alive
+    connection adapter, so repeated calls to the same server reuse their
+    TCP and TLS connections. Every request first waits for the rate limiter.
+    Throttled (429) and unavailable (502, 503, 504) responses are retried
+    with jittered exponential backoff, or after the Retry-After period the
+    server asked for. A 502 or 504 may come from a gateway after the server
+    acted on the request, so non-idempotent requests such as POST are only
+    retried after a 429, a 503 or a response with a Retry-After header.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=(10, 60), rate_limiter=None,
+                 max_retries=5, backoff_base=0.5, backoff_max=30.0, metrics=None):
+        """
+        Constructor for the TableauTransport class.
+
+        Parameters:
+            pool_connections (int): The number of hosts to keep connection pools for.
+            pool_maxsize (int): The maximum number of connections kept open per host.
+            timeout (float or tuple): The default (connect, read) timeout in seconds for every request.
+            rate_limiter (RateLimiter): The rate limiter to wait for. Defaults to the process-wide limiter.
+            max_retries (int): The maximum number of times a request is retried.
+            backoff_base (float): The maximum delay in seconds before the first retry. The maximum
+                doubles with every retry and the actual delay is drawn uniformly below it.
+            backoff_max (float): The upper bound in seconds of the backoff delay.
+            metrics (MetricsRegistry): The registry REST calls are recorded in. Defaults to the process-wide registry.
+        """
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = metrics or get_default_registry()
+        self.request_hooks = []
+        self.requests = 0
+        self.retries = 0
+        self.throttles = 0
+        self.failures = 0
+        self._stats_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_request_hook(self, hook):
+        """
+        Registers a function that is called after every attempt of a request, including retries.
+
+        Parameters:
+            hook (callable): Called as hook(method, url, status_code, elapsed) with elapsed in seconds.
+                status_code is None if the request failed without a response.
+        """
+        self.request_hooks.append(hook)
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request through the pooled session, retrying throttled and failed attempts.
+
+        Parameters:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            **kwargs: Passed to requests.Session.request, e.g. headers or json.
+
+        Returns:
+            requests.Response: The response of the last attempt.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if not self.metrics.enabled:
+            return self._request(method, url, **kwargs)
+
+        # one observation per call, including its retries
+        with self.metrics.timer('rest.request', method=method.upper(), endpoint=_endpoint(url)) as timer:
+            response = self._request(method, url, **kwargs)
+            timer.error = not response.ok
+            timer.set_attribute('status_code', response.status_code)
+            timer.bytes = _body_size(response.request.body) if response.request is not None else 0
+            if not kwargs.get('stream'):
+                timer.bytes += len(response.content)
+        return response
+
+    def _request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying throttled and failed attempts.
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries or method.upper() not in IDEMPOTENT_METHODS:
+                    self._count('failures')
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                retryable = response.status_code in RETRY_STATUSES and (
+                    method.upper() in IDEMPOTENT_METHODS or response.status_code in UNPROCESSED_STATUSES
+                    or retry_after is not None)
+                if not retryable or attempt >= self.max_retries:
+                    if response.ok:
+                        self.rate_limiter.succeeded()
+                    else:
+                        self._count('failures')
+                    return response
+                if response.status_code == 429:
+                    self._count('throttles')
+                    self.rate_limiter.throttled(retry_after)
+                # jitter the Retry-After period too, so paused clients do not all return at once
+                delay = retry_after + random.uniform(0, self.backoff_base) if retry_after is not None \
+                    else self._backoff(attempt)
+                response.close()
+            self._count('retries')
+            attempt += 1
+            time.sleep(delay)
+
+    def _send(self, method, url, **kwargs):
+        """
+        Sends one attempt of a request and calls the request hooks.
+        """
+        self._count('requests')
+        start = time.perf_counter()
+        status_code = None
+        try:
+            response = self.session.request(method, url, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self.request_hooks:
+                hook(method, url, status_code, elapsed)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """
+        Returns statistics about the requests sent through the transport.
+
+        Returns:
+            dict: The number of attempts sent, retries, throttled responses and failed requests,
+            and the statistics of the rate limiter.
+        """
+        with self._stats_lock:
+            return {'requests': self.requests, 'retries': self.retries, 'throttles': self.throttles,
+                    'failures': self.failures, 'rate_limiter': self.rate_limiter.stats()}
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """
+    Returns the process-wide transport, creating it on first use.
+
+    Returns:
+        TableauTransport: The shared transport.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = TableauTransport()
+        return _default_transport
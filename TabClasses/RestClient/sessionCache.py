@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class SessionCache:
+    """
+    A cache of the site each Tableau Server personal access token signs in to.
+
+    Entries are keyed by the server URL and a SHA-256 hash of the token, so
+    the token itself is never stored. With a path, entries are also kept in
+    a JSON file that short-lived worker processes can share, which saves
+    every process the auth/whoami round trip.
+    """
+
+    def __init__(self, path=None, ttl=86400):
+        """
+        Constructor for the SessionCache class.
+
+        Parameters:
+            path (str): The JSON file to persist entries in. None keeps them in memory only.
+            ttl (float): The number of seconds an entry stays valid. None keeps entries forever.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(server_url, personal_access_token):
+        token_hash = hashlib.sha256(personal_access_token.encode()).hexdigest()
+        return f"{server_url.rstrip('/')} {token_hash}"
+
+    def _load(self):
+        """
+        Reads the entries from the file if it exists, otherwise starts empty.
+        """
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"Warning: Ignoring unreadable session cache {self.path}.")
+            return {}
+
+    def _save(self, removed=None):
+        """
+        Merges the entries into the file, drops the removed key and replaces the file atomically.
+        """
+        if self.path is None:
+            return
+        entries = self._load()
+        entries.pop(removed, None)
+        entries.update(self._entries)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+        self._entries = entries
+
+    def get_site_id(self, server_url, personal_access_token, resolve):
+        """
+        Returns the cached site ID for a server and token, resolving and caching it on a miss.
+
+        Parameters:
+            server_url (str): The URL of the Tableau Server.
+            personal_access_token (str): The personal access token.
+            resolve (callable): Called without arguments to look up the site ID on a miss.
+
+        Returns:
+            str: The ID of the site.
+        """
+        key = self._key(server_url, personal_access_token)
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or time.time() - entry['resolved_at'] < self.ttl):
+                return entry['site_id']
+        # resolve outside the lock so a slow request does not block lookups of other servers
+        site_id = resolve()
+        with self._lock:
+            self._entries[key] = {'site_id': site_id, 'resolved_at': time.time()}
+            self._save()
+        return site_id
+
+    def invalidate(self, server_url=None, personal_access_token=None):
+        """
+        Removes the entry of a server and token, or every entry if no server is given.
+
+        Parameters:
+            server_url (str): The URL of the Tableau Server.
+            personal_access_token (str): The personal access token.
+        """
+        with self._lock:
+            if server_url is None:
+                self._entries = {}
+                if self.path is not None and os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            if self._entries is None:
+                self._entries = self._load()
+            key = self._key(server_url, personal_access_token)
+            self._entries.pop(key, None)
+            self._save(removed=key)
+
+
+_default_session_cache = None
+_default_session_cache_lock = threading.Lock()
+
+
+def get_default_session_cache():
+    """
+    Returns the process-wide session cache, creating it on first use.
+
+    The cache is persisted to the file named by the TABLEAU_SESSION_CACHE
+    environment variable if it is set, and kept in memory otherwise.
+
+    Returns:
+        SessionCache: The shared session cache.
+    """
+    global _default_session_cache
+    with _default_session_cache_lock:
+        if _default_session_cache is None:
+            _default_session_cache = SessionCache(os.environ.get('TABLEAU_SESSION_CACHE'))
+        return _default_session_cache
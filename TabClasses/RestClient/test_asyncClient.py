@@ -0,0 +1,118 @@
+import asyncio
+import inspect
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.SchedulerClass.asyncJobSchedule import AsyncTableauScheduler
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.asyncTabPrep import AsyncTableauPrepFlow
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+class _CountingTransport(TableauTransport):
+    """
+    A transport that records the peak number of requests in flight at once.
+    """
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+class TestAsyncClients(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(latency=0.05, schedule_count=20, flow_count=5, project_count=5)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_fan_out(self):
+        # test that concurrent calls overlap without exceeding max_concurrency
+        transport = _CountingTransport()
+        with AsyncTableauScheduler(self.server.url, 'token', max_concurrency=4, transport=transport) as scheduler:
+            jobs = asyncio.run(self._search_jobs(scheduler))
+        transport.close()
+        self.assertEqual([job['name'] for job in jobs], [f'job{i}' for i in range(20)])
+        self.assertGreater(transport.peak, 1)
+        self.assertLessEqual(transport.peak, 4)
+
+    async def _search_jobs(self, scheduler):
+        return await asyncio.gather(*(scheduler.search_jobs_by_id(f'schedule-{i}') for i in range(20)))
+
+    def test_concurrency_bound(self):
+        # test that no more than max_concurrency requests run at once
+        async def run(scheduler):
+            start = time.perf_counter()
+            await asyncio.gather(*(scheduler.run_job('schedule-0') for _ in range(4)))
+            return time.perf_counter() - start
+
+        with AsyncTableauScheduler(self.server.url, 'token', max_concurrency=2) as scheduler:
+            self.assertGreaterEqual(asyncio.run(run(scheduler)), 0.1)
+            # a second event loop gets its own semaphore
+            self.assertGreaterEqual(asyncio.run(run(scheduler)), 0.1)
+
+    def test_prep_flow(self):
+        async def run(prep_flow):
+            return await asyncio.gather(prep_flow.get_flow_ids('flow1'), prep_flow.get_project_id('project2'),
+                                        prep_flow.create_flow('new', '', 'project2'))
+
+        with AsyncTableauPrepFlow(self.server.url, 'token', 'http://localhost:9004') as prep_flow:
+            flow_ids, project_id, flow_id = asyncio.run(run(prep_flow))
+        self.assertEqual(flow_ids, ['flow-1'])
+        self.assertEqual(project_id, 'project-2')
+        self.assertIn(flow_id, self.server.flows)
+
+    def test_no_prompt(self):
+        # test that the async client never blocks a pool thread on input()
+        with AsyncTableauScheduler(self.server.url, 'token') as scheduler, patch('builtins.input') as mock_input:
+            asyncio.run(scheduler.modify_job('schedule-0', {'name': 'renamed'}))
+            asyncio.run(scheduler.delete_job('schedule-1'))
+        mock_input.assert_not_called()
+        self.assertEqual(self.server.schedules['schedule-0']['name'], 'renamed')
+        self.assertNotIn('schedule-1', self.server.schedules)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            AsyncTableauScheduler(self.server.url, 'token', max_concurrency=0)
+
+class TestAsyncParity(unittest.TestCase):
+    def assert_parity(self, sync_class, async_class):
+        # test that every method of the sync client has an async counterpart with the same signature
+        for name, method in inspect.getmembers(sync_class, inspect.isfunction):
+            # lazy page iterators stay synchronous
+            if name.startswith(('_', 'iter_')):
+                continue
+            with self.subTest(method=name):
+                self.assertTrue(inspect.iscoroutinefunction(getattr(async_class, name, None)))
+                sync_parameters = inspect.signature(method).parameters
+                async_parameters = inspect.signature(getattr(async_class, name)).parameters
+                self.assertEqual(list(async_parameters), list(sync_parameters))
+                for parameter in sync_parameters.values():
+                    # the async clients never prompt by default
+                    expected = False if parameter.name == 'confirm' else parameter.default
+                    self.assertEqual(async_parameters[parameter.name].default, expected)
+
+        sync_parameters = inspect.signature(sync_class.__init__).parameters
+        self.assertLessEqual(set(sync_parameters), set(inspect.signature(async_class.__init__).parameters))
+
+    def test_scheduler(self):
+        self.assert_parity(TableauScheduler, AsyncTableauScheduler)
+
+    def test_prep_flow(self):
+        self.assert_parity(TableauPrepFlow, AsyncTableauPrepFlow)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+from TabClasses.RestClient.batch import BatchError, run_batch
+
+class TestRunBatch(unittest.TestCase):
+    def test_results_in_order(self):
+        results = run_batch(lambda x: x * 2, [3, 1, 2])
+        self.assertEqual([result['result'] for result in results], [6, 2, 4])
+        self.assertEqual([result['item'] for result in results], [3, 1, 2])
+        self.assertTrue(all(result['error'] is None for result in results))
+
+    def test_concurrency(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work(item):
+            with lock:
+                active.append(item)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.remove(item)
+
+        run_batch(work, range(8), max_workers=4)
+        self.assertEqual(max(peak), 4)
+
+    def test_errors(self):
+        def work(item):
+            if item % 2:
+                raise ValueError(f"odd {item}")
+            return item
+
+        results = run_batch(work, range(4))
+        self.assertEqual([result['error'] for result in results],
+                         [None, 'ValueError: odd 1', None, 'ValueError: odd 3'])
+        with self.assertRaises(BatchError) as context:
+            run_batch(work, range(4), raise_on_error=True)
+        self.assertEqual(len(context.exception.failures), 2)
+        self.assertIn('2 of 4 batch items failed', str(context.exception))
+
+    def test_empty(self):
+        self.assertEqual(run_batch(lambda x: x, []), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import time
+import unittest
+from TabClasses.RestClient.lookupCache import LookupCache, get_default_lookup_cache
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestLookupCache(unittest.TestCase):
+    def test_get_set(self):
+        cache = LookupCache()
+        self.assertIsNone(cache.get(('a',)))
+        cache.set(('a',), 1)
+        self.assertEqual(cache.get(('a',)), 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1})
+
+    def test_ttl(self):
+        cache = LookupCache(ttl=0.05)
+        cache.set(('a',), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(('a',)))
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_lru_eviction(self):
+        cache = LookupCache(max_entries=2)
+        cache.set(('a',), 1)
+        cache.set(('b',), 2)
+        cache.get(('a',))
+        cache.set(('c',), 3)
+        self.assertEqual(cache.get(('a',)), 1)
+        self.assertIsNone(cache.get(('b',)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_invalidate(self):
+        cache = LookupCache()
+        cache.set(('server', 'schedules', 'a'), 1)
+        cache.set(('server', 'schedules', 'b'), 2)
+        cache.set(('server', 'flows', 'a'), 3)
+        cache.invalidate('server', 'schedules', 'a')
+        self.assertIsNone(cache.get(('server', 'schedules', 'a')))
+        cache.invalidate('server', 'schedules')
+        self.assertIsNone(cache.get(('server', 'schedules', 'b')))
+        self.assertEqual(cache.get(('server', 'flows', 'a')), 3)
+        cache.invalidate()
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_invalid_max_entries(self):
+        with self.assertRaises(ValueError):
+            LookupCache(max_entries=0)
+
+    def test_default_lookup_cache(self):
+        self.assertIs(get_default_lookup_cache(), get_default_lookup_cache())
+
+class TestClientLookups(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=10, flow_count=10, project_count=10)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.cache = LookupCache()
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_job_lookups(self):
+        scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport, lookup_cache=self.cache)
+        self.assertEqual(scheduler.get_job_id('job5'), 'schedule-5')
+        self.server.request_count = 0
+        # jobs seen during the first scan are indexed too
+        self.assertEqual(scheduler.get_job_id('job5'), 'schedule-5')
+        self.assertEqual(scheduler.get_job_id('job2'), 'schedule-2')
+        self.assertEqual(self.server.request_count, 0)
+
+        # scheduling a job with a known name invalidates it
+        self.server.schedules.pop('schedule-2')
+        scheduler.schedule_job('job2', 60, '2023-02-23T12:00:00Z', '/path/to/script.py', [])
+        self.assertNotEqual(scheduler.get_job_id('job2'), 'schedule-2')
+
+    def test_flow_and_project_lookups(self):
+        prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport,
+                                    lookup_cache=self.cache)
+        self.assertEqual(prep_flow.get_flow_ids('flow1'), ['flow-1'])
+        prep_flow.create_flow('new', '', 'project1')
+        self.server.request_count = 0
+        # the project ID and its permission check are cached
+        flow_id = prep_flow.create_flow('flow1', '', 'project1')
+        self.assertEqual(self.server.request_count, 1)
+        # creating a flow invalidates its name
+        self.assertEqual(prep_flow.get_flow_ids('flow1'), ['flow-1', flow_id])
+        self.assertEqual(prep_flow.get_flow_ids('new'), [flow for flow in self.server.flows
+                                                          if self.server.flows[flow]['name'] == 'new'])
+
+if __name__ == '__main__':
+    unittest.main()
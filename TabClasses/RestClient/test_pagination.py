@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import MagicMock
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.RestClient.pagination import iter_pages
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestIterPages(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=150, flow_count=25, project_count=30)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.url = f"{self.server.url}/api/3.10/sites/s/schedules"
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_all_pages(self):
+        for prefetch in (True, False):
+            self.server.request_count = 0
+            jobs = list(iter_pages(self.transport, self.url, {}, 'schedules', page_size=20, prefetch=prefetch))
+            self.assertEqual([job['name'] for job in jobs], [f'job{i}' for i in range(150)])
+            self.assertEqual(self.server.request_count, 8)
+
+    def test_lazy_and_early_stop(self):
+        pages = iter_pages(self.transport, self.url, {}, 'schedules', page_size=20, prefetch=False)
+        self.assertEqual(self.server.request_count, 0)
+        for job in pages:
+            if job['name'] == 'job25':
+                break
+        pages.close()
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_unpaginated_server(self):
+        transport = MagicMock()
+        transport.get.return_value.json.return_value = {'schedules': [{'id': '1'}, {'id': '2'}]}
+        self.assertEqual(len(list(iter_pages(transport, 'http://testserver', {}, 'schedules', page_size=1))), 2)
+        transport.get.assert_called_once()
+
+    def test_invalid_page_size(self):
+        with self.assertRaises(ValueError):
+            list(iter_pages(self.transport, self.url, {}, 'schedules', page_size=0))
+
+    def test_clients(self):
+        # test that the clients see every item beyond the first page
+        scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport,
+                                     lookup_cache=LookupCache())
+        self.assertEqual(len(scheduler.get_all_jobs()), 150)
+        self.assertEqual(scheduler.get_job_id('job149'), 'schedule-149')
+        self.assertIsNone(scheduler.get_job_id('missing'))
+
+        prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport,
+                                    lookup_cache=LookupCache())
+        self.assertEqual(len(list(prep_flow.iter_flows(page_size=10))), 25)
+        self.assertEqual(prep_flow.get_flow_ids('flow24'), ['flow-24'])
+        self.server.request_count = 0
+        self.assertEqual(prep_flow.get_project_id('project1'), 'project-1')
+        # one page of projects and the permission check
+        self.assertEqual(self.server.request_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
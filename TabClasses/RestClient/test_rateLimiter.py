@@ -0,0 +1,63 @@
+import time
+import unittest
+from TabClasses.RestClient.rateLimiter import RateLimiter, get_default_rate_limiter
+
+class TestRateLimiter(unittest.TestCase):
+    def test_unlimited(self):
+        limiter = RateLimiter()
+        start = time.perf_counter()
+        for _ in range(1000):
+            limiter.acquire()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(limiter.stats()['waits'], 0)
+
+    def test_rate(self):
+        limiter = RateLimiter(rate=50, burst=1)
+        start = time.perf_counter()
+        for _ in range(11):
+            limiter.acquire()
+        # the first token is available at once, the next ten every 20 ms
+        self.assertGreaterEqual(time.perf_counter() - start, 0.18)
+        self.assertEqual(limiter.stats()['waits'], 10)
+
+    def test_throttle_and_recover(self):
+        limiter = RateLimiter(rate=10, increase=1)
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 5)
+        # throttles of requests that were in flight at the same time lower the rate once
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 5)
+        for _ in range(10):
+            limiter.succeeded()
+        # the rate grows back up to the initial rate
+        self.assertEqual(limiter.rate, 10)
+        self.assertEqual(limiter.stats()['throttles'], 2)
+
+    def test_throttle_without_rate(self):
+        limiter = RateLimiter(min_rate=2)
+        for _ in range(40):
+            limiter.acquire()
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 20)
+
+    def test_retry_after_pauses_callers(self):
+        limiter = RateLimiter()
+        limiter.throttled(retry_after=0.1)
+        start = time.perf_counter()
+        limiter.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_not_adaptive(self):
+        limiter = RateLimiter(rate=10, adaptive=False)
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 10)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            RateLimiter(rate=0)
+
+    def test_default_rate_limiter(self):
+        self.assertIs(get_default_rate_limiter(), get_default_rate_limiter())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import concurrent.futures
+import socket
+import time
+import unittest
+from unittest.mock import MagicMock
+import requests
+from TabClasses.RestClient.rateLimiter import RateLimiter
+from TabClasses.RestClient.restTransport import TableauTransport, _parse_retry_after, get_default_transport
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestTableauTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=3)
+        self.server.start()
+        self.transport = TableauTransport(pool_maxsize=2, timeout=5)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_keep_alive(self):
+        # test that repeated requests reuse one connection
+        for _ in range(5):
+            response = self.transport.get(f"{self.server.url}/api/3.10/auth/whoami")
+            response.raise_for_status()
+        self.assertEqual(self.server.request_count, 5)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_request_hook(self):
+        calls = []
+        self.transport.add_request_hook(lambda method, url, status, elapsed: calls.append((method, status, elapsed)))
+        self.transport.get(f"{self.server.url}/api/3.10/auth/whoami")
+        self.transport.delete(f"{self.server.url}/api/3.10/sites/s/schedules/missing")
+        self.assertEqual([(method, status) for method, status, _ in calls], [('GET', 200), ('DELETE', 404)])
+        self.assertTrue(all(elapsed >= 0 for _, _, elapsed in calls))
+
+    def test_default_timeout(self):
+        self.transport.session = MagicMock()
+        self.transport.get('http://testserver/api')
+        self.transport.get('http://testserver/api', timeout=1)
+        self.assertEqual(self.transport.session.request.call_args_list[0].kwargs['timeout'], 5)
+        self.assertEqual(self.transport.session.request.call_args_list[1].kwargs['timeout'], 1)
+
+    def test_clients_share_transport(self):
+        scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport)
+        prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport)
+        self.assertEqual(len(scheduler.get_all_jobs()), 3)
+        self.assertEqual(prep_flow.get_flow_ids('flow1'), ['flow-1'])
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_default_transport(self):
+        self.assertIs(get_default_transport(), get_default_transport())
+
+class TestTableauTransportRetries(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=3)
+        self.server.start()
+        self.limiter = RateLimiter()
+        self.transport = TableauTransport(rate_limiter=self.limiter, max_retries=3, backoff_base=0.01)
+        self.url = f"{self.server.url}/api/3.10/auth/whoami"
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_retry_after(self):
+        self.server.inject(429, count=2, retry_after='0.1')
+        start = time.perf_counter()
+        response = self.transport.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        stats = self.transport.stats()
+        self.assertEqual((stats['requests'], stats['retries'], stats['throttles'], stats['failures']), (3, 2, 2, 0))
+        self.assertEqual(stats['rate_limiter']['throttles'], 2)
+
+    def test_unavailable(self):
+        self.server.inject(503)
+        self.assertEqual(self.transport.get(self.url).status_code, 200)
+        self.assertEqual(self.transport.stats()['throttles'], 0)
+        self.assertEqual(self.transport.stats()['retries'], 1)
+
+    def test_retries_exhausted(self):
+        self.server.inject(503, count=10)
+        self.assertEqual(self.transport.get(self.url).status_code, 503)
+        self.assertEqual(self.transport.stats()['requests'], 4)
+        self.assertEqual(self.transport.stats()['failures'], 1)
+
+    def test_post_not_resent_after_gateway_error(self):
+        # the server may have acted on a POST answered with 502, so it is not sent again
+        url = f"{self.server.url}/api/3.10/sites/mock-site/schedules/schedule-0/runNow"
+        self.server.inject(502)
+        self.assertEqual(self.transport.post(url).status_code, 502)
+        self.assertEqual(self.transport.stats()['requests'], 1)
+
+        # a 503 means the request was not processed, so a POST is retried
+        self.server.inject(503)
+        self.assertEqual(self.transport.post(url).status_code, 202)
+        self.assertEqual(self.transport.stats()['requests'], 3)
+
+    def test_client_errors_not_retried(self):
+        self.assertEqual(self.transport.get(f"{self.server.url}/missing").status_code, 404)
+        self.assertEqual(self.transport.stats()['retries'], 0)
+
+    def test_connection_errors(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            url = f"http://127.0.0.1:{s.getsockname()[1]}/"
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.get(url)
+        self.assertEqual(self.transport.stats()['requests'], 4)
+        # a POST may have reached the server, so it is not sent again
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.post(url)
+        self.assertEqual(self.transport.stats()['requests'], 5)
+
+    def test_adapts_to_server_limit(self):
+        self.server.rate_limit = 100
+        self.transport.max_retries = 10
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = list(executor.map(lambda _: self.transport.get(self.url).status_code, range(200)))
+        self.assertEqual(statuses, [200] * 200)
+        self.assertGreater(self.server.throttled_count, 0)
+        self.assertIsNotNone(self.limiter.rate)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(_parse_retry_after('3'), 3.0)
+        self.assertIsNone(_parse_retry_after(None))
+        self.assertIsNone(_parse_retry_after('soon'))
+        self.assertEqual(_parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.RestClient.sessionCache import SessionCache, get_default_session_cache
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestSessionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sessions.json')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_memory_cache(self):
+        cache = SessionCache()
+        resolve = MagicMock(return_value='site-1')
+        self.assertEqual(cache.get_site_id('http://server', 'token', resolve), 'site-1')
+        self.assertEqual(cache.get_site_id('http://server/', 'token', resolve), 'site-1')
+        resolve.assert_called_once()
+        # another token is another entry
+        self.assertEqual(cache.get_site_id('http://server', 'other', MagicMock(return_value='site-2')), 'site-2')
+
+    def test_ttl(self):
+        cache = SessionCache(ttl=0)
+        resolve = MagicMock(return_value='site-1')
+        cache.get_site_id('http://server', 'token', resolve)
+        cache.get_site_id('http://server', 'token', resolve)
+        self.assertEqual(resolve.call_count, 2)
+
+    def test_file_cache_shared(self):
+        SessionCache(self.path).get_site_id('http://server', 'secret-token', lambda: 'site-1')
+        with open(self.path) as f:
+            self.assertNotIn('secret-token', f.read())
+        # a second process reads the file instead of resolving the site
+        resolve = MagicMock()
+        self.assertEqual(SessionCache(self.path).get_site_id('http://server', 'secret-token', resolve), 'site-1')
+        resolve.assert_not_called()
+
+    def test_invalidate(self):
+        cache = SessionCache(self.path)
+        cache.get_site_id('http://server', 'token', lambda: 'site-1')
+        cache.get_site_id('http://server', 'other', lambda: 'site-2')
+        cache.invalidate('http://server', 'token')
+        resolve = MagicMock(return_value='site-3')
+        self.assertEqual(SessionCache(self.path).get_site_id('http://server', 'token', resolve), 'site-3')
+        self.assertEqual(SessionCache(self.path).get_site_id('http://server', 'other', resolve), 'site-2')
+        cache.invalidate()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_unreadable_file(self):
+        with open(self.path, 'w') as f:
+            f.write('not json')
+        self.assertEqual(SessionCache(self.path).get_site_id('http://server', 'token', lambda: 'site-1'), 'site-1')
+
+    def test_default_session_cache(self):
+        self.assertIs(get_default_session_cache(), get_default_session_cache())
+
+class TestLazySiteResolution(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=3)
+        self.server.start()
+        self.transport = TableauTransport()
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_no_requests_at_construction(self):
+        cache = SessionCache()
+        scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport, session_cache=cache)
+        prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport,
+                                    session_cache=cache)
+        self.assertEqual(self.server.request_count, 0)
+
+        scheduler.run_job('schedule-0')
+        # auth/whoami and runNow
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(prep_flow.site_id, 'mock-site')
+        self.assertEqual(self.server.request_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
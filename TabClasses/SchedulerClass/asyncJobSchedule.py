@@ -0,0 +1,79 @@
+from TabClasses.RestClient.asyncClient import AsyncClient
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+
+class AsyncTableauScheduler(AsyncClient):
+    """
+    An asyncio variant of TableauScheduler with the same methods.
+
+    Calls are bounded by max_concurrency, e.g.
+    await asyncio.gather(*(scheduler.run_job(job_id) for job_id in job_ids)).
+    modify_job and delete_job do not prompt for confirmation by default,
+    since input() would block a thread of the pool.
+    """
+    def __init__(self, server_url, personal_access_token, max_concurrency=10, transport=None, lookup_cache=None,
+                 session_cache=None):
+        """
+        Constructor for the AsyncTableauScheduler class.
+
+        Parameters:
+            server_url (str): The URL of the Tableau Server.
+            personal_access_token (str): The personal access token for authentication.
+            max_concurrency (int): The maximum number of requests in flight at once.
+            transport (TableauTransport): The HTTP transport to use.
+            lookup_cache (LookupCache): The cache of job names to IDs. Defaults to the process-wide cache.
+            session_cache (SessionCache): The cache of site IDs. Defaults to the process-wide cache.
+        """
+        super().__init__(max_concurrency, transport)
+        self.scheduler = TableauScheduler(server_url, personal_access_token, transport=self.transport,
+                                          lookup_cache=lookup_cache, session_cache=session_cache)
+        self.server_url = server_url
+
+    async def schedule_job(self, job_name, frequency_in_minutes, start_time, script_path, script_args,
+                           activate_in_create=False):
+        return await self._call(self.scheduler.schedule_job, job_name, frequency_in_minutes, start_time,
+                                script_path, script_args, activate_in_create=activate_in_create)
+
+    async def run_job(self, job_id):
+        return await self._call(self.scheduler.run_job, job_id)
+
+    async def query_job_runs(self, run_ids):
+        return await self._call(self.scheduler.query_job_runs, run_ids)
+
+    @property
+    def site_id(self):
+        return self.scheduler.site_id
+
+    async def get_site_id(self):
+        return await self._call(self.scheduler.get_site_id)
+
+    async def get_job_id(self, job_name):
+        return await self._call(self.scheduler.get_job_id, job_name)
+
+    async def get_all_jobs(self):
+        return await self._call(self.scheduler.get_all_jobs)
+
+    async def search_jobs_by_id(self, job_id):
+        return await self._call(self.scheduler.search_jobs_by_id, job_id)
+
+    async def modify_job(self, job_id, job_properties, job_info=None, confirm=False):
+        return await self._call(self.scheduler.modify_job, job_id, job_properties, job_info=job_info,
+                                confirm=confirm)
+
+    async def delete_job(self, job_id, confirm=False):
+        return await self._call(self.scheduler.delete_job, job_id, confirm=confirm)
+
+    async def schedule_jobs(self, jobs, max_workers=8, raise_on_error=False):
+        return await self._call(self.scheduler.schedule_jobs, jobs, max_workers=max_workers,
+                                raise_on_error=raise_on_error)
+
+    async def run_jobs(self, job_ids, max_workers=8, raise_on_error=False):
+        return await self._call(self.scheduler.run_jobs, job_ids, max_workers=max_workers,
+                                raise_on_error=raise_on_error)
+
+    async def modify_jobs(self, changes, job_infos=None, max_workers=8, raise_on_error=False):
+        return await self._call(self.scheduler.modify_jobs, changes, job_infos=job_infos, max_workers=max_workers,
+                                raise_on_error=raise_on_error)
+
+    async def delete_jobs(self, job_ids, max_workers=8, raise_on_error=False):
+        return await self._call(self.scheduler.delete_jobs, job_ids, max_workers=max_workers,
+                                raise_on_error=raise_on_error)
@@ -1,23 +1,47 @@
-import requests
 import datetime
 
+from TabClasses.RestClient.batch import run_batch
+from TabClasses.RestClient.lookupCache import get_default_lookup_cache
+from TabClasses.RestClient.pagination import iter_pages
+from TabClasses.RestClient.restTransport import get_default_transport
+from TabClasses.RestClient.sessionCache import get_default_session_cache
+
 class TableauScheduler:
     """
     A class for scheduling and managing tasks on Tableau Server
     using the Tableau Server REST API.
     """
-    def __init__(self, server_url, personal_access_token):
+    def __init__(self, server_url, personal_access_token, transport=None, lookup_cache=None, session_cache=None):
         # constructor takes the Tableau Server URL and a personal access token for authentication
+        # transport is an optional TableauTransport; by default one keep-alive session is shared per process
+        # lookup_cache is an optional LookupCache of job names to IDs; by default one cache is shared per process
+        # session_cache is an optional SessionCache of site IDs; the site is only resolved on first use
         self.server_url = server_url
+        self.transport = transport or get_default_transport()
+        self.lookup_cache = lookup_cache or get_default_lookup_cache()
+        self.session_cache = session_cache or get_default_session_cache()
+        self._site_id = None
         self.personal_access_token = personal_access_token
         self.headers = {
             'Content-Type': 'application/json',
             'Accept': 'application/json',
             'X-Tableau-Auth': self.personal_access_token
         }
-        self.site_id = self.get_site_id()
 
-    def schedule_job(self, job_name, frequency_in_minutes, start_time, script_path, script_args):
+    @property
+    def site_id(self):
+        # the site is resolved on the first request that needs it, through the session cache
+        if self._site_id is None:
+            self._site_id = self.session_cache.get_site_id(self.server_url, self.personal_access_token,
+                                                           self.get_site_id)
+        return self._site_id
+
+    @site_id.setter
+    def site_id(self, site_id):
+        self._site_id = site_id
+
+    def schedule_job(self, job_name, frequency_in_minutes, start_time, script_path, script_args,
+                     activate_in_create=False):
         """
         Schedules a job that runs the specified script with the specified
         arguments at the specified frequency.
@@ -28,6 +52,11 @@ class TableauScheduler:
             start_time (str): The start time of the job in ISO 8601 format ("YYYY-MM-DDTHH:mm:ssZ").
             script_path (str): The path to the script to run.
             script_args (list of str): The list of arguments to pass to the script.
+            activate_in_create (bool): Create the job in the Active state instead of activating it
+                with a second request.
+
+        Returns:
+            str: The ID of the new job.
         """
 
         # create the job
@@ -41,17 +70,22 @@ class TableauScheduler:
                 "parameters": " ".join(script_args)
             }
         }
-        response = requests.post(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules",
-                                 headers=self.headers,
-                                 json=job_payload)
+        if activate_in_create:
+            job_payload["state"] = "Active"
+        response = self.transport.post(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules",
+                                       headers=self.headers,
+                                       json=job_payload)
         response.raise_for_status()
         job_id = response.json()['id']
+        self.lookup_cache.invalidate(*self._lookup_key(job_name))
 
         # activate the job
-        response = requests.put(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                headers=self.headers,
-                                json={"state": "Active"})
-        response.raise_for_status()
+        if not activate_in_create:
+            response = self.transport.put(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                          headers=self.headers,
+                                          json={"state": "Active"})
+            response.raise_for_status()
+        return job_id
 
     def run_job(self, job_id):
         """
@@ -59,11 +93,35 @@ class TableauScheduler:
 
         Parameters:
             job_id (str): The ID of the job to run.
+
+        Returns:
+            str or None: The ID of the background job of the run, which can be passed to
+            query_job_runs or a JobTracker, or None if the server did not return one.
         """
         # method runs a scheduled job immediately
-        response = requests.post(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}/runNow",
-                                 headers=self.headers)
+        response = self.transport.post(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}/runNow",
+                                       headers=self.headers)
         response.raise_for_status()
+        if not response.content:
+            return None
+        return response.json().get('job', {}).get('id')
+
+    def query_job_runs(self, run_ids):
+        """
+        Retrieves the status of many background job runs with one request.
+
+        Parameters:
+            run_ids (list of str): The IDs of the runs, as returned by run_job.
+
+        Returns:
+            list of dict: The status of each run that was found, with 'id', 'createdAt' and, once they
+            are known, 'startedAt', 'completedAt' and 'finishCode'.
+        """
+        response = self.transport.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/jobs",
+                                      headers=self.headers,
+                                      params={'filter': f"id:in:[{','.join(run_ids)}]"})
+        response.raise_for_status()
+        return response.json()['backgroundJobs']
 
     def get_site_id(self):
         """
@@ -73,8 +131,8 @@ class TableauScheduler:
             str: The ID of the current site.
         """
         # method retrieves the ID of the current site
-        response = requests.get(f"{self.server_url}/api/3.10/auth/whoami",
-                                headers=self.headers)
+        response = self.transport.get(f"{self.server_url}/api/3.10/auth/whoami",
+                                      headers=self.headers)
         response.raise_for_status()
         return response.json()['site']['id']
 
@@ -88,12 +146,16 @@ class TableauScheduler:
         Returns:
             str or None: The ID of the scheduled job, or None if the job is not found.
         """
-        # method retrieves the ID of a scheduled job by name
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules",
-                                headers=self.headers)
-        response.raise_for_status()
-        jobs = response.json()['schedules']
-        for job in jobs:
+        # method retrieves the ID of a scheduled job by name, stopping at the page that contains it
+        job_id = self.lookup_cache.get(self._lookup_key(job_name))
+        if job_id is not None:
+            return job_id
+        seen = set()
+        for job in self.iter_jobs():
+            # index every job on the way so later lookups of other names are free too
+            if job['name'] not in seen:
+                seen.add(job['name'])
+                self.lookup_cache.set(self._lookup_key(job['name']), job['id'])
             if job['name'] == job_name:
                 return job['id']
         return None
@@ -107,10 +169,21 @@ class TableauScheduler:
             dictionary represents a scheduled job.
         """
         # method retrieves a list of all scheduled jobs
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules",
-                                headers=self.headers)
-        response.raise_for_status()
-        return response.json()['schedules']
+        return list(self.iter_jobs())
+
+    def iter_jobs(self, page_size=100, prefetch=True):
+        """
+        Lazily iterates over the scheduled jobs on the Tableau Server one page at a time.
+
+        Parameters:
+            page_size (int): The number of jobs requested per page.
+            prefetch (bool): Request the next page in the background while the current page is consumed.
+
+        Returns:
+            generator of dict: The scheduled jobs. Pages are only requested as the generator is consumed.
+        """
+        return iter_pages(self.transport, f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules",
+                          self.headers, 'schedules', page_size=page_size, prefetch=prefetch)
 
     def search_jobs_by_id(self, job_id):
         """
@@ -123,8 +196,8 @@ class TableauScheduler:
             dict or None: A dictionary representing the scheduled job, or None if the job is not found.
         """
 
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                headers=self.headers)
+        response = self.transport.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                      headers=self.headers)
         response.raise_for_status()
         job_info = response.json()
         if job_info.get('error'):
@@ -134,40 +207,56 @@ class TableauScheduler:
             # return the job information
             return job_info
 
-    def modify_job(self, job_id, job_properties):
+    def modify_job(self, job_id, job_properties, job_info=None, confirm=True):
         # method modifies the properties of a scheduled job
         # job_id: ID of the job to modify
         # job_properties: dictionary of job properties to update
+        # job_info: the current job information, if the caller already has it; otherwise it is fetched
+        # confirm: prompt the user before making changes; False submits them without asking
 
         # get the current job information
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                headers=self.headers)
-        response.raise_for_status()
-        job_info = response.json()
+        if job_info is None:
+            response = self.transport.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                          headers=self.headers)
+            response.raise_for_status()
+            job_info = response.json()
 
         # update the job properties
         job_payload = job_info.copy()
         job_payload.update(job_properties)
 
         # prompt the user for confirmation before making changes
-        print(f"Current job information for job {job_id}:")
-        print(job_info)
-        print(f"Proposed changes to job {job_id}:")
-        print(job_properties)
-        confirmation = input("Do you want to make these changes? (y/n) ")
-        if confirmation.lower() == 'y':
+        if confirm:
+            print(f"Current job information for job {job_id}:")
+            print(job_info)
+            print(f"Proposed changes to job {job_id}:")
+            print(job_properties)
+            confirmation = input("Do you want to make these changes? (y/n) ")
+        if not confirm or confirmation.lower() == 'y':
             # submit the updated job information
-            response = requests.put(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                    headers=self.headers,
-                                    json=job_payload)
+            response = self.transport.put(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                          headers=self.headers,
+                                          json=job_payload)
             response.raise_for_status()
+            self.lookup_cache.invalidate(*self._lookup_key(job_info.get('name')))
+            if 'name' in job_properties:
+                self.lookup_cache.invalidate(*self._lookup_key(job_properties['name']))
         else:
             print("Changes not submitted.")
 
-    def delete_job(self, job_id):
+    def delete_job(self, job_id, confirm=True):
         # method deletes a scheduled job by ID
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                headers=self.headers)
+        # confirm: prompt the user before deleting; False deletes without fetching the job or asking
+        if not confirm:
+            response = self.transport.delete(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                             headers=self.headers)
+            response.raise_for_status()
+            # the name of the job is unknown, so every cached job name of the site is dropped
+            self.lookup_cache.invalidate(self.server_url, self.site_id, 'schedules')
+            return
+
+        response = self.transport.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                      headers=self.headers)
         response.raise_for_status()
 
         job_info = response.json()
@@ -177,9 +266,77 @@ class TableauScheduler:
         confirmation = input("Enter 'y' to confirm, or 'n' to cancel: ")
         if confirmation.lower() == 'y':
             print("Deleting job...")
-            response = requests.delete(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
-                                    headers=self.headers)
+            response = self.transport.delete(f"{self.server_url}/api/3.10/sites/{self.site_id}/schedules/{job_id}",
+                                          headers=self.headers)
             response.raise_for_status()
+            self.lookup_cache.invalidate(*self._lookup_key(job_info['name']))
             print("Job deleted.")
         else:
-            print("Deletion cancelled.")
\ No newline at end of file
+            print("Deletion cancelled.")
+
+    def schedule_jobs(self, jobs, max_workers=8, raise_on_error=False):
+        """
+        Schedules many jobs concurrently. Every job is created in the Active state with a single request.
+
+        Parameters:
+            jobs (list of dict): The arguments of schedule_job for each job, i.e. 'job_name',
+                'frequency_in_minutes', 'start_time', 'script_path' and 'script_args'.
+            max_workers (int): The maximum number of requests in flight at once.
+            raise_on_error (bool): Raise a BatchError after the batch if any job failed.
+
+        Returns:
+            list of dict: One result per job with 'item', 'result' (the new job ID), 'seconds' and 'error'.
+        """
+        return run_batch(lambda job: self.schedule_job(activate_in_create=True, **job), jobs,
+                         max_workers=max_workers, raise_on_error=raise_on_error)
+
+    def run_jobs(self, job_ids, max_workers=8, raise_on_error=False):
+        """
+        Runs many scheduled jobs immediately and concurrently.
+
+        Parameters:
+            job_ids (list of str): The IDs of the jobs to run.
+            max_workers (int): The maximum number of requests in flight at once.
+            raise_on_error (bool): Raise a BatchError after the batch if any job failed.
+
+        Returns:
+            list of dict: One result per job with 'item', 'result', 'seconds' and 'error'.
+        """
+        return run_batch(self.run_job, job_ids, max_workers=max_workers, raise_on_error=raise_on_error)
+
+    def modify_jobs(self, changes, job_infos=None, max_workers=8, raise_on_error=False):
+        """
+        Modifies many scheduled jobs concurrently without prompting for confirmation.
+
+        Parameters:
+            changes (dict): The job properties to update, keyed by job ID.
+            job_infos (dict): The current information of the jobs keyed by job ID, e.g. from get_all_jobs.
+                Jobs found here are not fetched again before they are modified.
+            max_workers (int): The maximum number of requests in flight at once.
+            raise_on_error (bool): Raise a BatchError after the batch if any job failed.
+
+        Returns:
+            list of dict: One result per job with 'item' (the job ID), 'result', 'seconds' and 'error'.
+        """
+        job_infos = job_infos or {}
+        return run_batch(lambda job_id: self.modify_job(job_id, changes[job_id], job_info=job_infos.get(job_id),
+                                                        confirm=False),
+                         changes, max_workers=max_workers, raise_on_error=raise_on_error)
+
+    def delete_jobs(self, job_ids, max_workers=8, raise_on_error=False):
+        """
+        Deletes many scheduled jobs concurrently without prompting for confirmation.
+
+        Parameters:
+            job_ids (list of str): The IDs of the jobs to delete.
+            max_workers (int): The maximum number of requests in flight at once.
+            raise_on_error (bool): Raise a BatchError after the batch if any job failed.
+
+        Returns:
+            list of dict: One result per job with 'item', 'result', 'seconds' and 'error'.
+        """
+        return run_batch(lambda job_id: self.delete_job(job_id, confirm=False), job_ids,
+                         max_workers=max_workers, raise_on_error=raise_on_error)
+
+    def _lookup_key(self, job_name):
+        return (self.server_url, self.site_id, 'schedules', job_name)
@@ -0,0 +1,226 @@
+import asyncio
+import concurrent.futures
+import datetime
+import threading
+import time
+
+FINISH_CODES = {0: 'Success', 1: 'Failed', 2: 'Cancelled'}
+
+
+def _parse_timestamp(value):
+    # datetime.fromisoformat only accepts a trailing Z from Python 3.11
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None
+
+
+def _seconds_between(start, end):
+    return (end - start).total_seconds() if start is not None and end is not None else None
+
+
+class JobTracker:
+    """
+    Tracks many background job runs with a single polling thread.
+
+    Every tracked run gets a concurrent.futures.Future that resolves once
+    the run completes. All runs in flight are polled together, up to
+    batch_size per request. The poll interval starts at min_interval and
+    doubles up to max_interval while nothing changes, and drops back to
+    min_interval as soon as a run starts or completes. A cancelled future
+    stops the tracking of its run without affecting the others.
+    """
+
+    def __init__(self, scheduler, min_interval=0.5, max_interval=30.0, batch_size=100):
+        """
+        Constructor for the JobTracker class.
+
+        Parameters:
+            scheduler (TableauScheduler): The scheduler used to start and query runs.
+            min_interval (float): The shortest number of seconds between two polls.
+            max_interval (float): The longest number of seconds between two polls.
+            batch_size (int): The maximum number of runs queried per request.
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Poll intervals must be positive and min_interval must not exceed max_interval.")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.scheduler = scheduler
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self.polls = 0
+        self.requests = 0
+        self._runs = {}
+        self._started = set()
+        self._reset = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def track(self, run_id):
+        """
+        Starts tracking a run.
+
+        Parameters:
+            run_id (str): The ID of the run, as returned by TableauScheduler.run_job.
+
+        Returns:
+            concurrent.futures.Future: Resolves to a dict with 'run_id', 'status' ('Success', 'Failed' or
+            'Cancelled'), 'finish_code', 'created_at', 'started_at' and 'completed_at' as datetimes,
+            'queue_seconds' and 'run_seconds'.
+        """
+        with self._condition:
+            if self._closed:
+                raise ValueError("The JobTracker is closed.")
+            if run_id in self._runs and not self._runs[run_id].cancelled():
+                return self._runs[run_id]
+            future = concurrent.futures.Future()
+            self._runs[run_id] = future
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+            # a new run resets the poll interval
+            self._reset = True
+            self._condition.notify()
+        return future
+
+    def run_job(self, job_id):
+        """
+        Runs a scheduled job immediately and tracks the run.
+
+        Parameters:
+            job_id (str): The ID of the scheduled job.
+
+        Returns:
+            concurrent.futures.Future: The future of the run, see track.
+        """
+        run_id = self.scheduler.run_job(job_id)
+        if run_id is None:
+            raise ValueError(f"The server did not return a run for job {job_id}.")
+        return self.track(run_id)
+
+    def track_async(self, run_id):
+        """
+        Starts tracking a run from a coroutine.
+
+        Parameters:
+            run_id (str): The ID of the run.
+
+        Returns:
+            asyncio.Future: An awaitable of the running event loop that resolves like track.
+        """
+        return asyncio.wrap_future(self.track(run_id))
+
+    def in_flight(self):
+        """
+        Returns the number of tracked runs that have not completed.
+        """
+        with self._condition:
+            return len(self._runs)
+
+    def close(self):
+        """
+        Stops polling. Runs that have not completed get their futures cancelled.
+        """
+        with self._condition:
+            self._closed = True
+            for future in self._runs.values():
+                future.cancel()
+            self._runs.clear()
+            self._started.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        interval = self.min_interval
+        next_poll = time.monotonic() + interval
+        with self._condition:
+            while not self._closed:
+                if not self._runs:
+                    self._condition.wait()
+                    interval = self.min_interval
+                    next_poll = time.monotonic() + interval
+                    continue
+                if self._reset:
+                    # a new run is polled after at most min_interval
+                    self._reset = False
+                    interval = self.min_interval
+                    next_poll = min(next_poll, time.monotonic() + interval)
+                remaining = next_poll - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                # runs whose futures were cancelled, e.g. by asyncio.wait_for, are no longer polled
+                for run_id in [run_id for run_id, future in self._runs.items() if future.cancelled()]:
+                    del self._runs[run_id]
+                    self._started.discard(run_id)
+                run_ids = list(self._runs)
+                self._condition.release()
+                try:
+                    changed = self._poll(run_ids)
+                except Exception as e:
+                    print(f"Warning: Polling job runs failed: {type(e).__name__}: {e}")
+                    changed = False
+                finally:
+                    self._condition.acquire()
+                interval = self.min_interval if changed else min(self.max_interval, interval * 2)
+                next_poll = time.monotonic() + interval
+
+    def _poll(self, run_ids):
+        """
+        Queries the runs in batches and resolves the completed ones. Returns whether any run progressed.
+        """
+        self.polls += 1
+        changed = False
+        for i in range(0, len(run_ids), self.batch_size):
+            self.requests += 1
+            try:
+                statuses = self.scheduler.query_job_runs(run_ids[i:i + self.batch_size])
+            except Exception as e:
+                print(f"Warning: Polling job runs failed: {type(e).__name__}: {e}")
+                continue
+            for status in statuses:
+                changed |= self._update(status)
+        return changed
+
+    def _update(self, status):
+        with self._condition:
+            future = self._runs.get(status['id'])
+            if future is None:
+                return False
+            if status.get('completedAt') is None:
+                # a run that just left the queue counts as progress
+                if status.get('startedAt') is not None and status['id'] not in self._started:
+                    self._started.add(status['id'])
+                    return True
+                return False
+            del self._runs[status['id']]
+            self._started.discard(status['id'])
+            # a future cancelled by the caller cannot take a result
+            if not future.set_running_or_notify_cancel():
+                return True
+
+        try:
+            created_at = _parse_timestamp(status.get('createdAt'))
+            started_at = _parse_timestamp(status.get('startedAt'))
+            completed_at = _parse_timestamp(status.get('completedAt'))
+            finish_code = int(status['finishCode']) if status.get('finishCode') is not None else None
+        except (TypeError, ValueError) as e:
+            future.set_exception(e)
+            return True
+        future.set_result({
+            'run_id': status['id'],
+            'status': FINISH_CODES.get(finish_code, 'Unknown'),
+            'finish_code': finish_code,
+            'created_at': created_at,
+            'started_at': started_at,
+            'completed_at': completed_at,
+            'queue_seconds': _seconds_between(created_at, started_at),
+            'run_seconds': _seconds_between(started_at, completed_at),
+        })
+        return True
@@ -0,0 +1,338 @@
+import concurrent.futures
+import datetime
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+
+
+class IntervalTrigger:
+    """
+    Fires every `seconds` seconds, counted from a start time.
+    """
+
+    def __init__(self, seconds, start=None):
+        """
+        Constructor for the IntervalTrigger class.
+
+        Parameters:
+            seconds (float): The number of seconds between two runs.
+            start (float): The UNIX timestamp of the first run. Defaults to one interval from now.
+        """
+        if seconds <= 0:
+            raise ValueError("The interval must be positive.")
+        self.seconds = seconds
+        self.start = start if start is not None else time.time() + seconds
+
+    def next_fire_time(self, after):
+        """
+        Returns the first fire time strictly after a timestamp.
+
+        Parameters:
+            after (float): A UNIX timestamp.
+
+        Returns:
+            float: The UNIX timestamp of the next run.
+        """
+        if after < self.start:
+            return self.start
+        return self.start + (math.floor((after - self.start) / self.seconds) + 1) * self.seconds
+
+
+class CronTrigger:
+    """
+    Fires at the local times matching a five-field cron expression.
+
+    The fields are minute, hour, day of month, month and day of week
+    (0 or 7 is Sunday). Each field accepts *, numbers, ranges such as 1-5,
+    lists such as 1,15 and steps such as */10 or 0-30/5. As in cron, when
+    both day fields are restricted a day matches if either of them does.
+    """
+
+    _FIELDS = [('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7)]
+
+    def __init__(self, expression):
+        """
+        Constructor for the CronTrigger class.
+
+        Parameters:
+            expression (str): The cron expression, e.g. "*/15 6-18 * * 1-5".
+        """
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields.")
+        self.expression = expression
+        values = {}
+        for part, (name, low, high) in zip(parts, self._FIELDS):
+            values[name] = self._parse_field(part, low, high, name)
+        self.minutes = values['minute']
+        self.hours = values['hour']
+        self.days = values['day']
+        self.months = values['month']
+        # cron allows both 0 and 7 for Sunday; datetime counts Monday as 0, so store Sunday as 6
+        self.weekdays = {(day - 1) % 7 for day in values['weekday']}
+        self.day_restricted = parts[2] != '*'
+        self.weekday_restricted = parts[4] != '*'
+
+    @staticmethod
+    def _parse_field(field, low, high, name):
+        values = set()
+        for item in field.split(','):
+            value_range, _, step = item.partition('/')
+            if value_range == '*':
+                start, end = low, high
+            elif '-' in value_range:
+                start, end = (int(value) for value in value_range.split('-', 1))
+            else:
+                start = end = int(value_range)
+            step = int(step) if step else 1
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid {name} field '{field}' in cron expression.")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day_match = moment.day in self.days
+        weekday_match = moment.weekday() in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_fire_time(self, after):
+        """
+        Returns the first fire time strictly after a timestamp.
+
+        Parameters:
+            after (float): A UNIX timestamp.
+
+        Returns:
+            float or None: The UNIX timestamp of the next run, or None if the expression never matches.
+        """
+        moment = datetime.datetime.fromtimestamp(after).replace(second=0, microsecond=0) \
+            + datetime.timedelta(minutes=1)
+        # a matching date exists within a few years unless the expression is impossible, e.g. 31 February
+        limit = moment + datetime.timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + datetime.timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + datetime.timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += datetime.timedelta(minutes=1)
+            else:
+                return moment.timestamp()
+        return None
+
+
+class _ScheduledJob:
+    """
+    A job of the local scheduler with its trigger and run statistics.
+    """
+
+    def __init__(self, job_id, trigger, func, args, jitter):
+        self.job_id = job_id
+        self.trigger = trigger
+        self.func = func
+        self.args = args
+        self.jitter = jitter
+        self.next_run = None
+        self.running = False
+        self.removed = False
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+
+
+class LocalScheduler:
+    """
+    An in-process scheduler that triggers jobs from a heap-based timer queue.
+
+    A single timer thread sleeps until the earliest due job, so thousands of
+    jobs cost almost no CPU between runs. Due jobs are dispatched to a
+    worker pool, by default through TableauScheduler.run_job. A job whose
+    previous run is still going is not started twice. With coalescing, runs
+    missed while the scheduler was busy or stopped are merged into one.
+    """
+
+    def __init__(self, scheduler=None, max_workers=8, coalesce=True):
+        """
+        Constructor for the LocalScheduler class.
+
+        Parameters:
+            scheduler (TableauScheduler): The scheduler whose run_job is called for jobs added without a function.
+            max_workers (int): The maximum number of jobs running at once.
+            coalesce (bool): Run a job once instead of once per missed run after a delay.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.scheduler = scheduler
+        self.max_workers = max_workers
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self.skipped = 0
+        self._jobs = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def add_job(self, job_id, trigger, func=None, args=(), jitter=0.0):
+        """
+        Adds a job, replacing any job with the same ID.
+
+        Parameters:
+            job_id (str): The ID of the job. Without func, the ID of the Tableau Server job to run.
+            trigger (IntervalTrigger, CronTrigger, float or str): When to run the job. A number is an interval
+                in seconds and a string is a cron expression.
+            func (callable): The function to run. Defaults to the run_job method of the scheduler.
+            args (tuple): The arguments of func. Defaults to (job_id,) when func is not given.
+            jitter (float): The maximum number of seconds each run is randomly delayed by,
+                so jobs with the same trigger do not all start at once.
+        """
+        if isinstance(trigger, (int, float)):
+            trigger = IntervalTrigger(trigger)
+        elif isinstance(trigger, str):
+            trigger = CronTrigger(trigger)
+        if func is None:
+            if self.scheduler is None:
+                raise ValueError("A function is required when the LocalScheduler has no TableauScheduler.")
+            func = self.scheduler.run_job
+            args = args or (job_id,)
+        job = _ScheduledJob(job_id, trigger, func, tuple(args), jitter)
+        with self._condition:
+            if job_id in self._jobs:
+                self._jobs[job_id].removed = True
+            self._jobs[job_id] = job
+            self._push(job, trigger.next_fire_time(time.time()))
+            self._condition.notify()
+
+    def remove_job(self, job_id):
+        """
+        Removes a job. A run that already started is not interrupted.
+
+        Parameters:
+            job_id (str): The ID of the job.
+        """
+        with self._condition:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                raise ValueError(f"Job {job_id} is not scheduled.")
+            # the heap entry is skipped when it comes due
+            job.removed = True
+
+    def get_jobs(self):
+        """
+        Returns the scheduled jobs with their next run time and run statistics.
+
+        Returns:
+            list of dict: One dict per job with 'job_id', 'next_run', 'running', 'runs', 'failures' and 'last_error'.
+        """
+        with self._condition:
+            return [{'job_id': job.job_id, 'next_run': job.next_run, 'running': job.running, 'runs': job.runs,
+                     'failures': job.failures, 'last_error': job.last_error} for job in self._jobs.values()]
+
+    def stats(self):
+        """
+        Returns statistics about the scheduler.
+
+        Returns:
+            dict: The number of jobs, completed runs, failed runs, coalesced and skipped runs.
+        """
+        with self._condition:
+            jobs = list(self._jobs.values())
+            return {'jobs': len(jobs), 'runs': sum(job.runs for job in jobs),
+                    'failures': sum(job.failures for job in jobs), 'coalesced': self.coalesced,
+                    'skipped': self.skipped}
+
+    def start(self):
+        """
+        Starts the timer thread and the worker pool.
+        """
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops the timer thread. Jobs stay scheduled and resume when the scheduler is started again.
+
+        Parameters:
+            wait (bool): Wait for running jobs to finish.
+        """
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def _push(self, job, scheduled_time):
+        """
+        Queues the next run of a job. Must be called with the condition held.
+        """
+        job.next_run = scheduled_time
+        if scheduled_time is None:
+            return
+        fire_time = scheduled_time + random.uniform(0, job.jitter) if job.jitter else scheduled_time
+        heapq.heappush(self._heap, (fire_time, next(self._counter), scheduled_time, job))
+
+    def _loop(self):
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                fire_time, _, scheduled_time, job = self._heap[0]
+                now = time.time()
+                if fire_time > now:
+                    self._condition.wait(fire_time - now)
+                    continue
+                heapq.heappop(self._heap)
+                if job.removed:
+                    continue
+
+                next_time = job.trigger.next_fire_time(scheduled_time)
+                if self.coalesce and next_time is not None and next_time <= now:
+                    # runs missed while the scheduler was stopped or busy are merged into this one
+                    self.coalesced += 1
+                    next_time = job.trigger.next_fire_time(now)
+                self._push(job, next_time)
+
+                if job.running:
+                    self.skipped += 1
+                    continue
+                job.running = True
+                self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        try:
+            job.func(*job.args)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Warning: Scheduled job {job.job_id} failed: {error}")
+        with self._condition:
+            job.running = False
+            if error is None:
+                job.runs += 1
+            else:
+                job.failures += 1
+                job.last_error = error
@@ -1,7 +1,11 @@
 import unittest
 from unittest.mock import MagicMock, patch
 from datetime import datetime, timezone, timedelta
+from TabClasses.RestClient.batch import BatchError
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.RestClient.restTransport import TableauTransport
 from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from benchmarks.mockTableauServer import MockTableauServer
 
 class TestTableauScheduler(unittest.TestCase):
 
@@ -66,8 +70,13 @@ class TestTableauScheduler(unittest.TestCase):
         actual_job_id = self.scheduler.get_job_id(expected_job_name)
         self.assertEqual(actual_job_id, expected_job_id)
 
-    @patch('TabClasses.SchedulerClass.jobSchedule.requests')
-    def test_modify_job(self, mock_requests):
+    def test_modify_job(self):
+        mock_requests = self.scheduler.transport = MagicMock()
+        self.scheduler.server_url = 'http://testserver'
+        self.scheduler.site_id = 'test_site_id'
+        self.scheduler.headers['X-Tableau-Auth'] = 'test_personal_access_token'
+        self.scheduler.lookup_cache = LookupCache()
+
         # mock the response from the get request to retrieve job information
         mock_get_response = MagicMock()
         mock_get_response.json.return_value = {
@@ -87,7 +96,9 @@ class TestTableauScheduler(unittest.TestCase):
         # modify the job properties
         job_id = 'test_job_id'
         job_properties = {'name': 'modified_test_job', 'frequency': {'intervalInMinutes': 30}}
-        self.scheduler.modify_job(job_id, job_properties)
+        with patch('builtins.input', return_value='y') as mock_input:
+            self.scheduler.modify_job(job_id, job_properties)
+        mock_input.assert_called_once()
 
         # assert that requests.get was called with the correct arguments
         expected_get_url = "http://testserver/api/3.10/sites/test_site_id/schedules/test_job_id"
@@ -113,4 +124,53 @@ class TestTableauScheduler(unittest.TestCase):
             'taskType': 'external',
             'taskPayload': {'url': 'http://testserver/scripts/test_script.py', 'parameters': 'arg1 arg2'}
         }
-        mock_requests.put.assert_called_once_with(expected_put_url, headers=expected_put_headers, json=expected_put_json)
\ No newline at end of file
+        mock_requests.put.assert_called_once_with(expected_put_url, headers=expected_put_headers, json=expected_put_json)
+
+
+class TestTableauSchedulerBatch(unittest.TestCase):
+
+    def setUp(self):
+        # Run the batch methods against a local mock Tableau Server
+        self.server = MockTableauServer(schedule_count=10)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport,
+                                          lookup_cache=LookupCache())
+        self.scheduler.site_id = 'mock-site'
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_schedule_jobs(self):
+        jobs = [{'job_name': f'new{i}', 'frequency_in_minutes': 60, 'start_time': '2023-02-23T12:00:00Z',
+                 'script_path': '/path/to/script.py', 'script_args': []} for i in range(5)]
+        results = self.scheduler.schedule_jobs(jobs)
+        self.assertEqual([result['error'] for result in results], [None] * 5)
+        # one request per job, created in the Active state
+        self.assertEqual(self.server.request_count, 5)
+        for result in results:
+            self.assertEqual(self.server.schedules[result['result']]['state'], 'Active')
+
+    def test_modify_jobs_without_prompt(self):
+        job_infos = {job['id']: job for job in self.scheduler.get_all_jobs()}
+        self.server.request_count = 0
+        with patch('builtins.input') as mock_input:
+            results = self.scheduler.modify_jobs({'schedule-0': {'name': 'renamed'},
+                                                  'schedule-1': {'name': 'renamed1'}}, job_infos=job_infos)
+        mock_input.assert_not_called()
+        self.assertEqual([result['item'] for result in results], ['schedule-0', 'schedule-1'])
+        # the known job information is not fetched again
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(self.server.schedules['schedule-0']['name'], 'renamed')
+
+    def test_delete_and_run_jobs_with_errors(self):
+        results = self.scheduler.delete_jobs(['schedule-0', 'missing', 'schedule-1'])
+        self.assertEqual([result['error'] is None for result in results], [True, False, True])
+        self.assertIn('HTTPError', results[1]['error'])
+        self.assertNotIn('schedule-0', self.server.schedules)
+
+        with self.assertRaises(BatchError) as context:
+            self.scheduler.run_jobs(['schedule-2', 'schedule-0'], raise_on_error=True)
+        self.assertEqual(len(context.exception.results), 2)
+        self.assertEqual([failure['item'] for failure in context.exception.failures], ['schedule-0'])
@@ -0,0 +1,116 @@
+import asyncio
+import concurrent.futures
+import datetime
+import time
+import unittest
+from unittest.mock import MagicMock
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.SchedulerClass.jobTracker import JobTracker, _parse_timestamp
+from benchmarks.mockTableauServer import MockTableauServer
+
+class TestJobTracker(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(schedule_count=5, job_queue_seconds=0.1, job_run_seconds=0.2)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.scheduler = TableauScheduler(self.server.url, 'token', transport=self.transport,
+                                          lookup_cache=LookupCache())
+        self.scheduler.site_id = 'mock-site'
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_run_and_wait(self):
+        with JobTracker(self.scheduler, min_interval=0.05, max_interval=0.2) as tracker:
+            future = tracker.run_job('schedule-0')
+            run = future.result(timeout=5)
+        self.assertEqual(run['status'], 'Success')
+        self.assertEqual(run['finish_code'], 0)
+        self.assertAlmostEqual(run['queue_seconds'], 0.1, places=3)
+        self.assertAlmostEqual(run['run_seconds'], 0.2, places=3)
+
+    def test_many_runs_batched(self):
+        run_ids = [self.scheduler.run_job(f'schedule-{i % 5}') for i in range(250)]
+        self.server.request_count = 0
+        with JobTracker(self.scheduler, min_interval=0.05, max_interval=0.2, batch_size=100) as tracker:
+            futures = [tracker.track(run_id) for run_id in run_ids]
+            done, not_done = concurrent.futures.wait(futures, timeout=5)
+        self.assertEqual(len(done), 250)
+        self.assertTrue(all(future.result()['status'] == 'Success' for future in futures))
+        # at most three requests per poll for 250 runs, not one per run
+        self.assertEqual(self.server.request_count, tracker.requests)
+        self.assertLessEqual(tracker.requests, tracker.polls * 3)
+        self.assertLess(tracker.requests, 30)
+
+    def test_failed_run(self):
+        run_id = self.scheduler.run_job('schedule-0')
+        self.server.jobs[run_id]['finishCode'] = 1
+        with JobTracker(self.scheduler, min_interval=0.05) as tracker:
+            self.assertEqual(tracker.track(run_id).result(timeout=5)['status'], 'Failed')
+
+    def test_track_async(self):
+        async def wait(tracker):
+            run_ids = [self.scheduler.run_job('schedule-1') for _ in range(3)]
+            return await asyncio.gather(*(tracker.track_async(run_id) for run_id in run_ids))
+
+        with JobTracker(self.scheduler, min_interval=0.05) as tracker:
+            runs = asyncio.run(wait(tracker))
+        self.assertEqual([run['status'] for run in runs], ['Success'] * 3)
+
+    def test_cancelled_future(self):
+        # test that a run abandoned by asyncio.wait_for does not stop the tracking of other runs
+        async def wait(tracker, run_id):
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(tracker.track_async(run_id), 0.01)
+
+        run_ids = [self.scheduler.run_job('schedule-0') for _ in range(2)]
+        with JobTracker(self.scheduler, min_interval=0.05) as tracker:
+            asyncio.run(wait(tracker, run_ids[0]))
+            self.assertEqual(tracker.track(run_ids[1]).result(timeout=5)['status'], 'Success')
+            self.assertTrue(tracker._thread.is_alive())
+            self.assertEqual(tracker.in_flight(), 0)
+
+    def test_malformed_status(self):
+        # test that a run with an unreadable status fails its own future only
+        scheduler = MagicMock()
+        scheduler.query_job_runs.return_value = [
+            {'id': 'bad', 'completedAt': 'not a timestamp'},
+            {'id': 'good', 'completedAt': '2023-03-01T12:00:00Z', 'finishCode': '0'},
+        ]
+        with JobTracker(scheduler, min_interval=0.02) as tracker:
+            bad, good = tracker.track('bad'), tracker.track('good')
+            self.assertEqual(good.result(timeout=5)['status'], 'Success')
+            with self.assertRaises(ValueError):
+                bad.result(timeout=5)
+            self.assertTrue(tracker._thread.is_alive())
+
+    def test_parse_timestamp(self):
+        # test that the UTC timestamps of the REST API parse on every Python version
+        self.assertEqual(_parse_timestamp('2023-02-23T12:00:00Z'),
+                         datetime.datetime(2023, 2, 23, 12, tzinfo=datetime.timezone.utc))
+        self.assertEqual(_parse_timestamp('2023-02-23T12:00:00.250000Z'),
+                         datetime.datetime(2023, 2, 23, 12, 0, 0, 250000, tzinfo=datetime.timezone.utc))
+        self.assertIsNone(_parse_timestamp(None))
+
+    def test_adaptive_interval(self):
+        scheduler = MagicMock()
+        scheduler.query_job_runs.return_value = [{'id': 'run', 'createdAt': '2023-03-01T12:00:00Z'}]
+        with JobTracker(scheduler, min_interval=0.02, max_interval=0.16) as tracker:
+            future = tracker.track('run')
+            time.sleep(0.5)
+            # 0.02 + 0.04 + 0.08 + 0.16 + 0.16 seconds
+            self.assertLessEqual(tracker.polls, 6)
+            self.assertEqual(tracker.in_flight(), 1)
+        self.assertTrue(future.cancelled())
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            JobTracker(self.scheduler, min_interval=0)
+        with self.assertRaises(ValueError):
+            JobTracker(self.scheduler, batch_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
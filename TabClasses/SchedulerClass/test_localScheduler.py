@@ -0,0 +1,116 @@
+import datetime
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from TabClasses.SchedulerClass.localScheduler import CronTrigger, IntervalTrigger, LocalScheduler
+
+def _timestamp(*args):
+    return datetime.datetime(*args).timestamp()
+
+class TestTriggers(unittest.TestCase):
+    def test_interval(self):
+        trigger = IntervalTrigger(10, start=100)
+        self.assertEqual(trigger.next_fire_time(50), 100)
+        self.assertEqual(trigger.next_fire_time(100), 110)
+        self.assertEqual(trigger.next_fire_time(125), 130)
+        with self.assertRaises(ValueError):
+            IntervalTrigger(0)
+
+    def test_cron(self):
+        # Wednesday, 1 March 2023 at 12:07
+        now = _timestamp(2023, 3, 1, 12, 7, 30)
+        self.assertEqual(CronTrigger('* * * * *').next_fire_time(now), _timestamp(2023, 3, 1, 12, 8))
+        self.assertEqual(CronTrigger('*/15 * * * *').next_fire_time(now), _timestamp(2023, 3, 1, 12, 15))
+        self.assertEqual(CronTrigger('0 9 * * *').next_fire_time(now), _timestamp(2023, 3, 2, 9, 0))
+        self.assertEqual(CronTrigger('30 8 * * 1-5').next_fire_time(_timestamp(2023, 3, 3, 9, 0)),
+                         _timestamp(2023, 3, 6, 8, 30))
+        self.assertEqual(CronTrigger('0 0 1 1 *').next_fire_time(now), _timestamp(2024, 1, 1, 0, 0))
+        self.assertEqual(CronTrigger('0 0 * * 0').next_fire_time(now), _timestamp(2023, 3, 5, 0, 0))
+        self.assertEqual(CronTrigger('0 0 * * 7').next_fire_time(now), _timestamp(2023, 3, 5, 0, 0))
+        # either day field matches when both are restricted
+        self.assertEqual(CronTrigger('0 0 15 * 5').next_fire_time(now), _timestamp(2023, 3, 3, 0, 0))
+        self.assertEqual(CronTrigger('0 0 29 2 *').next_fire_time(now), _timestamp(2024, 2, 29, 0, 0))
+        self.assertIsNone(CronTrigger('0 0 31 2 *').next_fire_time(now))
+
+    def test_invalid_cron(self):
+        for expression in ['* * * *', '60 * * * *', '5-1 * * * *', '*/0 * * * *']:
+            with self.assertRaises(ValueError):
+                CronTrigger(expression)
+
+class TestLocalScheduler(unittest.TestCase):
+    def test_dispatch_through_run_job(self):
+        tableau_scheduler = MagicMock()
+        with LocalScheduler(tableau_scheduler) as scheduler:
+            scheduler.add_job('schedule-1', 0.05)
+            time.sleep(0.28)
+        self.assertGreaterEqual(tableau_scheduler.run_job.call_count, 4)
+        tableau_scheduler.run_job.assert_called_with('schedule-1')
+        self.assertEqual(scheduler.stats()['runs'], tableau_scheduler.run_job.call_count)
+
+    def test_requires_function_without_scheduler(self):
+        with self.assertRaises(ValueError):
+            LocalScheduler().add_job('job', 1)
+
+    def test_overlapping_runs_skipped(self):
+        running = []
+        peak = []
+
+        def slow():
+            running.append(1)
+            peak.append(len(running))
+            time.sleep(0.2)
+            running.pop()
+
+        with LocalScheduler() as scheduler:
+            scheduler.add_job('slow', 0.02, func=slow)
+            time.sleep(0.3)
+        self.assertEqual(max(peak), 1)
+        self.assertGreater(scheduler.stats()['skipped'], 0)
+
+    def test_coalesce_missed_runs(self):
+        calls = []
+        scheduler = LocalScheduler()
+        scheduler.add_job('job', IntervalTrigger(0.01, start=time.time() - 1), func=lambda: calls.append(1))
+        with scheduler:
+            time.sleep(0.05)
+        # the hundred missed runs are merged into one
+        self.assertLess(len(calls), 10)
+        self.assertGreater(scheduler.stats()['coalesced'], 0)
+
+    def test_remove_job_and_failures(self):
+        def fail():
+            raise RuntimeError("boom")
+
+        with LocalScheduler() as scheduler:
+            scheduler.add_job('fail', 0.02, func=fail)
+            time.sleep(0.1)
+            jobs = scheduler.get_jobs()
+            scheduler.remove_job('fail')
+            failures = jobs[0]['failures']
+            time.sleep(0.1)
+        self.assertGreater(failures, 0)
+        self.assertEqual(jobs[0]['last_error'], 'RuntimeError: boom')
+        self.assertEqual(scheduler.get_jobs(), [])
+        with self.assertRaises(ValueError):
+            scheduler.remove_job('fail')
+
+    def test_many_jobs(self):
+        counts = {}
+        lock = threading.Lock()
+
+        def run(job_id):
+            with lock:
+                counts[job_id] = counts.get(job_id, 0) + 1
+
+        start = time.time() + 0.2
+        with LocalScheduler(max_workers=16) as scheduler:
+            for i in range(5000):
+                scheduler.add_job(f'job{i}', IntervalTrigger(0.5, start=start), func=run, args=(f'job{i}',),
+                                  jitter=0.1)
+            time.sleep(0.5)
+        self.assertEqual(len(counts), 5000)
+        self.assertEqual(set(counts.values()), {1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+from TabClasses.RestClient.asyncClient import AsyncClient
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+
+class AsyncTableauPrepFlow(AsyncClient):
+    """
+    An asyncio variant of TableauPrepFlow with the same methods.
+    """
+
+    def __init__(self, server_url, personal_access_token, tabpy_conn_string, max_concurrency=10, transport=None,
+                 lookup_cache=None, session_cache=None, deployment_cache=None, tabpy_client=None):
+        """
+        Constructor for the AsyncTableauPrepFlow class.
+        Parameters:
+            server_url (str): The URL of the Tableau Server.
+            personal_access_token (str): The personal access token for authentication.
+            tabpy_conn_string (str): The URL of the TabPy server.
+            max_concurrency (int): The maximum number of requests in flight at once.
+            transport (TableauTransport): The HTTP transport to use.
+            lookup_cache (LookupCache): The cache of flow and project names to IDs. Defaults to the process-wide cache.
+            session_cache (SessionCache): The cache of site IDs. Defaults to the process-wide cache.
+            deployment_cache (DeploymentCache): The cache of deployed scripts and flow steps.
+                Defaults to the process-wide cache.
+            tabpy_client: The TabPy client to deploy scripts with. Defaults to a client for tabpy_conn_string.
+        """
+        super().__init__(max_concurrency, transport)
+        self.prep_flow = TableauPrepFlow(server_url, personal_access_token, tabpy_conn_string,
+                                         transport=self.transport, lookup_cache=lookup_cache,
+                                         session_cache=session_cache, deployment_cache=deployment_cache,
+                                         tabpy_client=tabpy_client)
+        self.server_url = server_url
+
+    @property
+    def site_id(self):
+        return self.prep_flow.site_id
+
+    async def get_site_id(self):
+        return await self._call(self.prep_flow.get_site_id)
+
+    async def get_flow_ids(self, flow_name):
+        return await self._call(self.prep_flow.get_flow_ids, flow_name)
+
+    async def create_flow(self, flow_name, flow_description, project_name, project_id=None):
+        return await self._call(self.prep_flow.create_flow, flow_name, flow_description, project_name,
+                                project_id=project_id)
+
+    async def add_script(self, flow_id, script_name, script_code, flow_name, force=False):
+        return await self._call(self.prep_flow.add_script, flow_id, script_name, script_code, flow_name,
+                                force=force)
+
+    async def deploy_script(self, script_name, script_code, force=False):
+        return await self._call(self.prep_flow.deploy_script, script_name, script_code, force=force)
+
+    async def add_script_steps(self, flow_id, script_names, force=False, batch_size=50):
+        return await self._call(self.prep_flow.add_script_steps, flow_id, script_names, force=force,
+                                batch_size=batch_size)
+
+    async def get_project_id(self, project_name):
+        return await self._call(self.prep_flow.get_project_id, project_name)
@@ -0,0 +1,189 @@
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+
+
+def content_hash(obj):
+    """
+    Returns a SHA-256 hash of a script, a function or a JSON-serializable step definition.
+
+    Functions are hashed by their source code, or by their bytecode if the source is not available.
+
+    Parameters:
+        obj (str, callable or dict): The content to hash.
+
+    Returns:
+        str: The hexadecimal hash.
+    """
+    if isinstance(obj, str):
+        data = obj.encode()
+    elif callable(obj):
+        try:
+            data = inspect.getsource(obj).encode()
+        except (OSError, TypeError):
+            code = obj.__code__
+            data = code.co_code + repr(code.co_consts).encode()
+    else:
+        data = json.dumps(obj, sort_keys=True).encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+class DeploymentCache:
+    """
+    Remembers which scripts were deployed to TabPy and which steps were added to flows.
+
+    Scripts are keyed by TabPy URL and script name and store the hash of
+    their code. Steps are keyed by server URL, flow ID and script name and
+    store the hash of their definition and the ID of the step. With a path,
+    the cache is persisted to a JSON file so later runs of a sync job can
+    skip everything that did not change. Changes made inside batch are
+    written once when it ends, merged with the entries other processes
+    saved to the file in the meantime.
+    """
+
+    def __init__(self, path=None):
+        """
+        Constructor for the DeploymentCache class.
+
+        Parameters:
+            path (str): The JSON file to persist the cache in. None keeps it in memory only.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._changes = []
+        self._batch_depth = 0
+
+    def _load(self):
+        """
+        Reads the entries from the file if it exists, otherwise starts empty.
+        """
+        entries = {'scripts': {}, 'steps': {}}
+        if self.path is not None and os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    entries.update(json.load(f))
+            except (OSError, ValueError):
+                print(f"Warning: Ignoring unreadable deployment cache {self.path}.")
+        return entries
+
+    def get(self, kind, key):
+        """
+        Returns the entry of a deployed script or step, or None.
+
+        Parameters:
+            kind (str): 'scripts' or 'steps'.
+            key (str): The key of the entry.
+        """
+        with self._lock:
+            return self._entries[kind].get(key)
+
+    def set(self, kind, key, value):
+        """
+        Stores the entry of a deployed script or step and persists it, or inside batch once the batch ends.
+
+        Parameters:
+            kind (str): 'scripts' or 'steps'.
+            key (str): The key of the entry.
+            value: The JSON-serializable entry.
+        """
+        with self._lock:
+            self._entries[kind][key] = value
+            self._changes.append((kind, key, value))
+            if not self._batch_depth:
+                self._save()
+
+    def invalidate(self, kind=None, key=None):
+        """
+        Removes one entry, every entry of a kind, or the whole cache.
+
+        Parameters:
+            kind (str): 'scripts' or 'steps'. None removes every entry.
+            key (str): The key of the entry. None removes every entry of the kind.
+        """
+        with self._lock:
+            self._changes.append((kind, key, None))
+            _apply(self._entries, [(kind, key, None)])
+            if not self._batch_depth:
+                self._save()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defers writing the file until the outermost batch ends, so many changes cost one write.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._save()
+
+    def flush(self):
+        """
+        Writes the pending changes to the file.
+        """
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        """
+        Applies the pending changes to the entries in the file and replaces the file atomically.
+        """
+        if self.path is None or not self._changes:
+            self._changes = []
+            return
+        entries = self._load()
+        _apply(entries, self._changes)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+        self._entries = entries
+        self._changes = []
+
+
+def _apply(entries, changes):
+    """
+    Applies changes to cache entries. A change with the value None removes its key, or every key of its kind,
+    or every entry if its kind is None too.
+    """
+    for kind, key, value in changes:
+        if value is not None:
+            entries[kind][key] = value
+            continue
+        for name in ([kind] if kind is not None else list(entries)):
+            if key is None:
+                entries[name].clear()
+            else:
+                entries[name].pop(key, None)
+
+
+_default_deployment_cache = None
+_default_deployment_cache_lock = threading.Lock()
+
+
+def get_default_deployment_cache():
+    """
+    Returns the process-wide deployment cache, creating it on first use.
+
+    The cache is persisted to the file named by the TABPY_DEPLOYMENT_CACHE
+    environment variable if it is set, and kept in memory otherwise.
+
+    Returns:
+        DeploymentCache: The shared deployment cache.
+    """
+    global _default_deployment_cache
+    with _default_deployment_cache_lock:
+        if _default_deployment_cache is None:
+            _default_deployment_cache = DeploymentCache(os.environ.get('TABPY_DEPLOYMENT_CACHE'))
+        return _default_deployment_cache
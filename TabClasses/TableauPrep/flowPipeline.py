@@ -0,0 +1,229 @@
+import concurrent.futures
+import threading
+import time
+
+from TabClasses.TableauPrep.deploymentCache import content_hash
+
+
+def _run_graph(tasks, max_workers, on_complete=None, timings=None):
+    """
+    Runs tasks on a thread pool as soon as the tasks they depend on have finished.
+
+    Parameters:
+        tasks (dict): Maps each task key to (function, dependencies). The function is called with a dict of
+            the results of its dependencies. Dependencies are keys of other tasks.
+        max_workers (int): The maximum number of tasks running at once.
+        on_complete (callable): Called with the key of each task and the outcomes so far once the task is done.
+        timings (dict): If given, filled with the (start, end) time.perf_counter() values of every task that ran.
+
+    Returns:
+        dict: Maps each task key to (result, error). A task whose dependency failed is not run and gets
+            an error naming the dependency.
+    """
+    dependents = {key: [] for key in tasks}
+    waiting = {}
+    for key, (_, dependencies) in tasks.items():
+        waiting[key] = len(dependencies)
+        for dependency in dependencies:
+            dependents[dependency].append(key)
+
+    outcomes = {}
+    lock = threading.Lock()
+    finished = threading.Event()
+
+    def complete(key, result, error, executor):
+        ready = []
+        with lock:
+            outcomes[key] = (result, error)
+            for dependent in dependents[key]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+            done = len(outcomes) == len(tasks)
+        if on_complete is not None:
+            try:
+                on_complete(key, outcomes)
+            except Exception as e:
+                print(f"Warning: Completion callback failed: {type(e).__name__}: {e}")
+        for dependent in ready:
+            submit(dependent, executor)
+        if done:
+            finished.set()
+
+    def submit(key, executor):
+        function, dependencies = tasks[key]
+        failed = [dependency for dependency in dependencies if outcomes[dependency][1] is not None]
+        if failed:
+            complete(key, None, f"Dependency {failed[0]} failed: {outcomes[failed[0]][1]}", executor)
+            return
+
+        def run():
+            start = time.perf_counter()
+            try:
+                result = function({dependency: outcomes[dependency][0] for dependency in dependencies})
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            else:
+                error = None
+            if timings is not None:
+                timings[key] = (start, time.perf_counter())
+            complete(key, result, error, executor)
+
+        executor.submit(run)
+
+    if not tasks:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for key in [key for key, count in waiting.items() if count == 0]:
+            submit(key, executor)
+        finished.wait()
+    return outcomes
+
+
+class FlowProvisioner:
+    """
+    Provisions many Tableau Prep flows with their TabPy scripts from a declarative spec.
+
+    The spec is turned into a dependency graph: project lookups, an index of
+    the existing flows, TabPy deployments, flow creation and step attachment. Every node runs as soon
+    as its dependencies are done, so TabPy deployments overlap with the REST
+    calls and independent flows are provisioned concurrently. Each project
+    is looked up and each script is deployed only once, however many flows
+    use it, and the flows of the site are listed in a single scan. The new steps of a flow are posted in batches.
+    """
+
+    def __init__(self, prep_flow, max_workers=8, step_batch_size=50, reuse_existing=True, force=False,
+                 progress=None):
+        """
+        Constructor for the FlowProvisioner class.
+
+        Parameters:
+            prep_flow (TableauPrepFlow): The client used for the REST calls and TabPy deployments.
+            max_workers (int): The maximum number of requests and deployments in flight at once.
+            step_batch_size (int): The maximum number of new steps posted per request.
+            reuse_existing (bool): Use an existing flow with the same name instead of creating another one.
+            force (bool): Redeploy scripts and replace steps even if they did not change.
+            progress (callable): Called with the result of each flow once it is provisioned.
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.prep_flow = prep_flow
+        self.max_workers = max_workers
+        self.step_batch_size = step_batch_size
+        self.reuse_existing = reuse_existing
+        self.force = force
+        self.progress = progress
+
+    def provision(self, spec):
+        """
+        Provisions every flow of a spec.
+
+        Parameters:
+            spec (list of dict): One entry per flow with 'name', 'project', an optional 'description' and
+                optional 'scripts', a dict of script names to the functions to deploy to TabPy.
+
+        Returns:
+            list of dict: One result per flow, in the order of the spec, with 'flow', 'flow_id', 'created',
+            'deployed' (the scripts of the flow deployed by this call), 'steps' (see
+            TableauPrepFlow.add_script_steps), 'seconds' (from the start of the flow's creation to the end of
+            its last task) and 'error', which is None if the flow succeeded.
+        """
+        scripts = self._validate(spec)
+
+        tasks = {}
+        for project_name in {entry['project'] for entry in spec}:
+            tasks[('project', project_name)] = (lambda results, project_name=project_name:
+                                                self._get_project_id(project_name), [])
+        for script_name, script_code in scripts.items():
+            tasks[('script', script_name)] = (lambda results, script_name=script_name, script_code=script_code:
+                                              self.prep_flow.deploy_script(script_name, script_code,
+                                                                           force=self.force), [])
+        flow_dependencies = []
+        if self.reuse_existing:
+            # one scan of the site's flows serves the lookups of every flow
+            tasks[('flows', None)] = (lambda results: self._index_flows(), [])
+            flow_dependencies.append(('flows', None))
+        for entry in spec:
+            flow_key = ('flow', entry['name'])
+            tasks[flow_key] = (lambda results, entry=entry: self._get_or_create_flow(entry, results),
+                               [('project', entry['project'])] + flow_dependencies)
+            tasks[('steps', entry['name'])] = (lambda results, entry=entry: self._add_steps(entry, results),
+                                               [flow_key] + [('script', name) for name in entry.get('scripts', {})])
+
+        on_complete = None
+        if self.progress is not None:
+            entries = {entry['name']: entry for entry in spec}
+
+            # report each flow as soon as its steps are attached or it failed
+            def on_complete(key, outcomes):
+                if key[0] == 'steps':
+                    self.progress(self._result(entries[key[1]], outcomes, timings))
+
+        # deployments and steps are written to the deployment cache file once, after the whole spec
+        timings = {}
+        with self.prep_flow.deployment_cache.batch():
+            outcomes = _run_graph(tasks, self.max_workers, on_complete, timings)
+        return [self._result(entry, outcomes, timings) for entry in spec]
+
+    def _validate(self, spec):
+        """
+        Checks the spec and returns the scripts it uses, keyed by name.
+        """
+        names = set()
+        scripts = {}
+        for entry in spec:
+            if 'name' not in entry or 'project' not in entry:
+                raise ValueError("Every flow needs a 'name' and a 'project'.")
+            if entry['name'] in names:
+                raise ValueError(f"Flow {entry['name']} appears more than once.")
+            names.add(entry['name'])
+            for script_name, script_code in entry.get('scripts', {}).items():
+                if script_name in scripts and content_hash(scripts[script_name]) != content_hash(script_code):
+                    raise ValueError(f"Script {script_name} has different code in different flows.")
+                scripts[script_name] = script_code
+        return scripts
+
+    def _get_project_id(self, project_name):
+        project_id = self.prep_flow.get_project_id(project_name)
+        if project_id is None:
+            raise ValueError(f"Project {project_name} does not exist or is not accessible.")
+        return project_id
+
+    def _index_flows(self):
+        """
+        Returns the IDs of the existing flows, keyed by name.
+        """
+        flow_ids_by_name = {}
+        for flow in self.prep_flow.iter_flows():
+            flow_ids_by_name.setdefault(flow['name'], []).append(flow['id'])
+        return flow_ids_by_name
+
+    def _get_or_create_flow(self, entry, results):
+        if self.reuse_existing:
+            flow_ids = results[('flows', None)].get(entry['name'])
+            if flow_ids:
+                return flow_ids[0], False
+        project_id = results[('project', entry['project'])]
+        return self.prep_flow.create_flow(entry['name'], entry.get('description', ''), entry['project'],
+                                          project_id=project_id), True
+
+    def _add_steps(self, entry, results):
+        flow_id, _ = results[('flow', entry['name'])]
+        return self.prep_flow.add_script_steps(flow_id, list(entry.get('scripts', {})), force=self.force,
+                                               batch_size=self.step_batch_size)
+
+    def _result(self, entry, outcomes, timings):
+        flow_id, created = outcomes.get(('flow', entry['name']), (None, None))[0] or (None, False)
+        steps, error = outcomes.get(('steps', entry['name']), (None, None))
+        # a flow whose project lookup failed never ran a task of its own
+        spans = [timings[key] for key in (('flow', entry['name']), ('steps', entry['name'])) if key in timings]
+        return {
+            'flow': entry['name'],
+            'flow_id': flow_id,
+            'created': created,
+            'deployed': [name for name in entry.get('scripts', {})
+                         if outcomes.get(('script', name), (False, None))[0]],
+            'steps': steps or [],
+            'seconds': spans[-1][1] - spans[0][0] if spans else 0.0,
+            'error': error,
+        }
@@ -1,31 +1,78 @@
-import requests
 import json
 import os
 import base64
 import uuid
 
+from TabClasses.RestClient.lookupCache import get_default_lookup_cache
+from TabClasses.RestClient.pagination import iter_pages
+from TabClasses.RestClient.restTransport import get_default_transport
+from TabClasses.RestClient.sessionCache import get_default_session_cache
+from TabClasses.TableauPrep.deploymentCache import content_hash, get_default_deployment_cache
+
+try:
+    from tabpy.tabpy_tools import client as tabpy_tools
+except ImportError:
+    tabpy_tools = None
+
 class TableauPrepFlow:
     """
     A class for interacting with Tableau Prep flows using the Tableau Server REST API.
     """
 
-    def __init__(self, server_url, personal_access_token, tabpy_conn_string):
+    def __init__(self, server_url, personal_access_token, tabpy_conn_string, transport=None, lookup_cache=None,
+                 session_cache=None, deployment_cache=None, tabpy_client=None):
         """
         Constructor for the TableauPrepFlow class.
         Parameters:
             server_url (str): The URL of the Tableau Server.
             personal_access_token (str): The personal access token for authentication.
+            tabpy_conn_string (str): The URL of the TabPy server.
+            transport (TableauTransport): The HTTP transport to use. Defaults to the process-wide transport.
+            lookup_cache (LookupCache): The cache of flow and project names to IDs. Defaults to the process-wide cache.
+            session_cache (SessionCache): The cache of site IDs. Defaults to the process-wide cache.
+            deployment_cache (DeploymentCache): The cache of deployed scripts and flow steps.
+                Defaults to the process-wide cache.
+            tabpy_client: The TabPy client to deploy scripts with. Defaults to a client for tabpy_conn_string.
         """
         self.server_url = server_url
+        self.transport = transport or get_default_transport()
+        self.lookup_cache = lookup_cache or get_default_lookup_cache()
+        self.session_cache = session_cache or get_default_session_cache()
+        self._site_id = None
         self.personal_access_token = personal_access_token
         self.headers = {
             'Content-Type': 'application/json',
             'Accept': 'application/json',
             'X-Tableau-Auth': self.personal_access_token
         }
-        self.site_id = self.get_site_id()
         self.tabpy_conn_string = tabpy_conn_string
+        self.deployment_cache = deployment_cache or get_default_deployment_cache()
+        self.tabpy_client = tabpy_client
 
+    @property
+    def site_id(self):
+        """
+        The ID of the current site, resolved through the session cache on first use.
+        """
+        if self._site_id is None:
+            self._site_id = self.session_cache.get_site_id(self.server_url, self.personal_access_token,
+                                                           self.get_site_id)
+        return self._site_id
+
+    @site_id.setter
+    def site_id(self, site_id):
+        self._site_id = site_id
+
+    def get_site_id(self):
+        """
+        Retrieves the ID of the current site.
+        Returns:
+            str: The ID of the current site.
+        """
+        response = self.transport.get(f"{self.server_url}/api/3.10/auth/whoami",
+                                      headers=self.headers)
+        response.raise_for_status()
+        return response.json()['site']['id']
 
     def get_flow_ids(self, flow_name):
         """
@@ -35,20 +82,53 @@ class TableauPrepFlow:
         Returns:
             list of str: A list of flow IDs.
         """
-        response = requests.get(f"{self.server_url}/api/1.0/flows", headers=self.headers)
-        response.raise_for_status()
-        flows = response.json()['flows']
-        return [flow['id'] for flow in flows if flow['name'] == flow_name]
+        flow_ids = self.lookup_cache.get(self._lookup_key('flows', flow_name))
+        if flow_ids is not None:
+            return list(flow_ids)
+        # index the IDs of every flow name seen during the scan
+        flow_ids_by_name = {}
+        for flow in self.iter_flows():
+            flow_ids_by_name.setdefault(flow['name'], []).append(flow['id'])
+        for name, ids in flow_ids_by_name.items():
+            self.lookup_cache.set(self._lookup_key('flows', name), tuple(ids))
+        return flow_ids_by_name.get(flow_name, [])
 
-    def create_flow(self, flow_name, flow_description, project_name):
+    def iter_flows(self, page_size=100, prefetch=True):
+        """
+        Lazily iterates over the Tableau Prep flows one page at a time.
+        Parameters:
+            page_size (int): The number of flows requested per page.
+            prefetch (bool): Request the next page in the background while the current page is consumed.
+        Returns:
+            generator of dict: The flows. Pages are only requested as the generator is consumed.
+        """
+        return iter_pages(self.transport, f"{self.server_url}/api/1.0/flows", self.headers, 'flows',
+                          page_size=page_size, prefetch=prefetch)
+
+    def iter_projects(self, page_size=100, prefetch=True):
+        """
+        Lazily iterates over the projects of the site one page at a time.
+        Parameters:
+            page_size (int): The number of projects requested per page.
+            prefetch (bool): Request the next page in the background while the current page is consumed.
+        Returns:
+            generator of dict: The projects. Pages are only requested as the generator is consumed.
+        """
+        return iter_pages(self.transport, f"{self.server_url}/api/3.10/sites/{self.site_id}/projects",
+                          self.headers, 'projects', page_size=page_size, prefetch=prefetch)
+
+    def create_flow(self, flow_name, flow_description, project_name, project_id=None):
         """
         Creates a new Tableau Prep flow with the specified name.
         Parameters:
             flow_name (str): The name of the new flow.
+            project_name (str): The name of the project of the new flow.
+            project_id (str): The ID of the project, if the caller already has it; otherwise it is looked up.
         Returns:
             str: The ID of the new flow.
         """
-        project_id = self.get_project_id(project_name)
+        if project_id is None:
+            project_id = self.get_project_id(project_name)
 
         flow_payload = {
             "project": {
@@ -57,51 +137,141 @@ class TableauPrepFlow:
             "name": flow_name
         }
 
-        response = requests.post(f"{self.server_url}/api/3.11/sites/{self.site_id}/flows",
-                                 headers=self.headers,
-                                 json=flow_payload)
+        response = self.transport.post(f"{self.server_url}/api/3.11/sites/{self.site_id}/flows",
+                                       headers=self.headers,
+                                       json=flow_payload)
         response.raise_for_status()
+        self.lookup_cache.invalidate(*self._lookup_key('flows', flow_name))
 
         flow_id = response.json()['id']
         return flow_id
 
-    def add_script(self, flow_id, script_name, script_code, flow_name):
+    def add_script(self, flow_id, script_name, script_code, flow_name, force=False):
         """
         Adds a Python script to a Tableau Prep flow.
+
+        The script is only deployed to TabPy if its code changed since the last deployment,
+        and the script step is only posted if the flow does not have an identical one.
         Parameters:
-            flow_id (str): The ID of the Tableau Prep flow.
+            flow_id (str): The ID of the Tableau Prep flow. If None, the first flow named flow_name is used.
             script_name (str): The name of the script to add.
-            script_path (str): The path to the script to add.
-            script_args (list of str): The list of arguments to pass to the script.
-        """
-        # create the TabPy client
-        tabpy_client = tabpy_tools.Client(f'{self.tabpy_conn_string}/')
-
-        # deploy the script to TabPy
-        tabpy_client.deploy(script_name, script_code)
-
-        # get the flow ID
-        flow_id = self.get_flow_id(flow_name)
-
-        # create the script step
-        script_step = {
-            "step": {
-                "type": "script",
-                "name": script_name,
-                "arguments": {
-                    "script": f"http://localhost:9004/endpoints/{script_name}"
-                },
-                "id": str(uuid.uuid4())
-            },
-            "outputConnections": [],
-            "inputConnections": []
-        }
+            script_code (callable or str): The function to deploy to TabPy.
+            flow_name (str): The name of the Tableau Prep flow, used when flow_id is None.
+            force (bool): Deploy the script and update the step even if they did not change.
+        Returns:
+            dict: Whether the script was 'deployed', and whether the 'step' was 'created', 'updated' or
+            'unchanged', with its 'step_id'.
+        """
+        with self.deployment_cache.batch():
+            deployed = self.deploy_script(script_name, script_code, force=force)
 
-        # add the script step to the flow
-        response = requests.post(f"{self.server_url}/api/1.0/flows/{flow_id}/steps",
-                                 headers=self.headers,
-                                 json=script_step)
-        response.raise_for_status()
+            # get the flow ID
+            if flow_id is None:
+                flow_ids = self.get_flow_ids(flow_name)
+                if not flow_ids:
+                    raise ValueError(f"Flow {flow_name} does not exist.")
+                flow_id = flow_ids[0]
+
+            step = self.add_script_steps(flow_id, [script_name], force=force)[0]
+        return {'deployed': deployed, 'step': step['step'], 'step_id': step['step_id']}
+
+    def deploy_script(self, script_name, script_code, force=False):
+        """
+        Deploys a script to TabPy unless the same code is already deployed.
+        Parameters:
+            script_name (str): The name of the script.
+            script_code (callable or str): The function to deploy to TabPy.
+            force (bool): Deploy the script even if it did not change.
+        Returns:
+            bool: Whether the script was deployed.
+        """
+        script_key = f"{self.tabpy_conn_string} {script_name}"
+        script_hash = content_hash(script_code)
+        if not force and self.deployment_cache.get('scripts', script_key) == script_hash:
+            return False
+        with self.transport.metrics.timer('tabpy.deploy'):
+            self._get_tabpy_client().deploy(script_name, script_code, override=True)
+        self.deployment_cache.set('scripts', script_key, script_hash)
+        return True
+
+    def add_script_steps(self, flow_id, script_names, force=False, batch_size=50):
+        """
+        Adds script steps for deployed scripts to a Tableau Prep flow.
+
+        New steps are posted together, up to batch_size per request. Steps that were added
+        earlier are replaced only if their definition changed, and left alone otherwise.
+        Parameters:
+            flow_id (str): The ID of the Tableau Prep flow.
+            script_names (list of str): The names of the deployed scripts.
+            force (bool): Replace steps even if they did not change.
+            batch_size (int): The maximum number of new steps posted per request.
+        Returns:
+            list of dict: One dict per script with 'script', 'step' ('created', 'updated' or 'unchanged')
+            and 'step_id'.
+        """
+        # the cache file is written once for all steps
+        with self.deployment_cache.batch():
+            results = []
+            new_steps = []
+            for script_name in script_names:
+                # create the script step
+                step_definition = {
+                    "type": "script",
+                    "name": script_name,
+                    "arguments": {
+                        "script": f"{self.tabpy_conn_string}/endpoints/{script_name}"
+                    }
+                }
+                step_key = f"{self.server_url} {flow_id} {script_name}"
+                step_hash = content_hash(step_definition)
+                cached_step = self.deployment_cache.get('steps', step_key)
+                if cached_step is not None and cached_step['hash'] == step_hash and not force:
+                    results.append({'script': script_name, 'step': 'unchanged',
+                                    'step_id': cached_step['step_id']})
+                    continue
+
+                step_id = cached_step['step_id'] if cached_step is not None else str(uuid.uuid4())
+                script_step = {
+                    "step": dict(step_definition, id=step_id),
+                    "outputConnections": [],
+                    "inputConnections": []
+                }
+                if cached_step is None:
+                    new_steps.append((step_key, step_hash, script_step))
+                    results.append({'script': script_name, 'step': 'created', 'step_id': step_id})
+                    continue
+
+                # replace the step added earlier
+                response = self.transport.put(f"{self.server_url}/api/1.0/flows/{flow_id}/steps/{step_id}",
+                                              headers=self.headers,
+                                              json=script_step)
+                response.raise_for_status()
+                self.deployment_cache.set('steps', step_key, {'hash': step_hash, 'step_id': step_id})
+                results.append({'script': script_name, 'step': 'updated', 'step_id': step_id})
+
+            # add the new script steps to the flow
+            for i in range(0, len(new_steps), batch_size):
+                batch = new_steps[i:i + batch_size]
+                payload = batch[0][2] if len(batch) == 1 \
+                    else {"steps": [script_step for _, _, script_step in batch]}
+                response = self.transport.post(f"{self.server_url}/api/1.0/flows/{flow_id}/steps",
+                                               headers=self.headers,
+                                               json=payload)
+                response.raise_for_status()
+                for step_key, step_hash, script_step in batch:
+                    self.deployment_cache.set('steps', step_key,
+                                              {'hash': step_hash, 'step_id': script_step['step']['id']})
+        return results
+
+    def _get_tabpy_client(self):
+        """
+        Returns the TabPy client, creating it on first use.
+        """
+        if self.tabpy_client is None:
+            if tabpy_tools is None:
+                raise ImportError("Deploying scripts requires the tabpy package.")
+            self.tabpy_client = tabpy_tools.Client(f'{self.tabpy_conn_string}/')
+        return self.tabpy_client
 
     def get_project_id(self, project_name):
         """
@@ -112,20 +282,22 @@ class TableauPrepFlow:
             str or None: The ID of the project, or None if the project is not found or the user does not have
             permission to access it.
         """
-        response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/projects",
-                                headers=self.headers)
-        response.raise_for_status()
-
-        projects = response.json()['projects']
-        for project in projects:
+        project_id = self.lookup_cache.get(self._lookup_key('projects', project_name))
+        if project_id is not None:
+            return project_id
+        for project in self.iter_projects():
             if project['name'] == project_name:
                 project_id = project['id']
                 # check if the user has permission to access the project
-                response = requests.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/projects/{project_id}/permissions",
-                                        headers=self.headers)
+                response = self.transport.get(f"{self.server_url}/api/3.10/sites/{self.site_id}/projects/{project_id}/permissions",
+                                              headers=self.headers)
                 if response.status_code == 200:
+                    self.lookup_cache.set(self._lookup_key('projects', project_name), project_id)
                     return project_id
                 else:
                     print(f"Warning: User does not have permission to access project {project_name}.")
                     return None
         return None
+
+    def _lookup_key(self, kind, name):
+        return (self.server_url, self.site_id, kind, name)
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.TableauPrep.deploymentCache import DeploymentCache, content_hash
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+def add(x, y):
+    return x + y
+
+class TestDeploymentCache(unittest.TestCase):
+    def test_content_hash(self):
+        self.assertEqual(content_hash('code'), content_hash('code'))
+        self.assertNotEqual(content_hash('code'), content_hash('other code'))
+        self.assertEqual(content_hash(add), content_hash(add))
+        self.assertEqual(content_hash({'a': 1, 'b': 2}), content_hash({'b': 2, 'a': 1}))
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'deployments.json')
+            cache = DeploymentCache(path)
+            cache.set('scripts', 'tabpy add', 'hash')
+            cache.set('steps', 'server flow add', {'hash': 'step', 'step_id': 'id'})
+            self.assertEqual(DeploymentCache(path).get('scripts', 'tabpy add'), 'hash')
+            cache.invalidate('scripts')
+            self.assertIsNone(DeploymentCache(path).get('scripts', 'tabpy add'))
+            self.assertIsNotNone(DeploymentCache(path).get('steps', 'server flow add'))
+            cache.invalidate()
+            self.assertIsNone(DeploymentCache(path).get('steps', 'server flow add'))
+
+    def test_batch_writes_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'deployments.json')
+            cache = DeploymentCache(path)
+            with patch('TabClasses.TableauPrep.deploymentCache.os.replace', wraps=os.replace) as replace:
+                with cache.batch():
+                    for i in range(100):
+                        cache.set('scripts', f'tabpy script{i}', 'hash')
+                    self.assertEqual(replace.call_count, 0)
+                    self.assertEqual(cache.get('scripts', 'tabpy script99'), 'hash')
+                self.assertEqual(replace.call_count, 1)
+            self.assertEqual(DeploymentCache(path).get('scripts', 'tabpy script99'), 'hash')
+
+    def test_merges_with_file(self):
+        # test that two processes sharing the file keep each other's entries
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'deployments.json')
+            first, second = DeploymentCache(path), DeploymentCache(path)
+            first.set('scripts', 'tabpy add', 'hash1')
+            second.set('scripts', 'tabpy multiply', 'hash2')
+            second.invalidate('steps', 'server flow add')
+            cache = DeploymentCache(path)
+            self.assertEqual(cache.get('scripts', 'tabpy add'), 'hash1')
+            self.assertEqual(cache.get('scripts', 'tabpy multiply'), 'hash2')
+            # saving also picks up the entries of the other process
+            self.assertEqual(second.get('scripts', 'tabpy add'), 'hash1')
+
+class TestAddScript(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(flow_count=3)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.tabpy_client = MagicMock()
+        self.cache = DeploymentCache()
+        self.prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport,
+                                         lookup_cache=LookupCache(), deployment_cache=self.cache,
+                                         tabpy_client=self.tabpy_client)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_unchanged_script_skipped(self):
+        result = self.prep_flow.add_script('flow-1', 'add', add, 'flow1')
+        self.assertEqual((result['deployed'], result['step']), (True, 'created'))
+        self.server.request_count = 0
+        result = self.prep_flow.add_script('flow-1', 'add', add, 'flow1')
+        self.assertEqual((result['deployed'], result['step']), (False, 'unchanged'))
+        self.tabpy_client.deploy.assert_called_once_with('add', add, override=True)
+        self.assertEqual(self.server.request_count, 0)
+        self.assertEqual(len(self.server.flows['flow-1']['steps']), 1)
+
+    def test_changed_script_redeployed(self):
+        self.prep_flow.add_script(None, 'add', 'def add(x, y): return x + y', 'flow2')
+        result = self.prep_flow.add_script(None, 'add', 'def add(x, y): return y + x', 'flow2')
+        # the step definition only refers to the endpoint, so it stays in place
+        self.assertEqual((result['deployed'], result['step']), (True, 'unchanged'))
+        self.assertEqual(self.tabpy_client.deploy.call_count, 2)
+
+    def test_changed_step_updated(self):
+        first = self.prep_flow.add_script('flow-1', 'add', add, 'flow1')
+        self.prep_flow.tabpy_conn_string = 'http://tabpy:9004'
+        second = self.prep_flow.add_script('flow-1', 'add', add, 'flow1')
+        self.assertEqual(second['step'], 'updated')
+        self.assertEqual(second['step_id'], first['step_id'])
+        steps = self.server.flows['flow-1']['steps']
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0]['step']['arguments']['script'], 'http://tabpy:9004/endpoints/add')
+
+    def test_force(self):
+        self.prep_flow.add_script('flow-1', 'add', add, 'flow1')
+        result = self.prep_flow.add_script('flow-1', 'add', add, 'flow1', force=True)
+        self.assertEqual((result['deployed'], result['step']), (True, 'updated'))
+
+    def test_unknown_flow(self):
+        with self.assertRaises(ValueError):
+            self.prep_flow.add_script(None, 'add', add, 'missing')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.RestClient.restTransport import TableauTransport
+from TabClasses.TableauPrep.deploymentCache import DeploymentCache
+from TabClasses.TableauPrep.flowPipeline import FlowProvisioner, _run_graph
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+def add(x, y):
+    return x + y
+
+def multiply(x, y):
+    return x * y
+
+class TestRunGraph(unittest.TestCase):
+    def test_dependencies(self):
+        order = []
+        tasks = {
+            'a': (lambda results: order.append('a') or 1, []),
+            'b': (lambda results: order.append('b') or results['a'] + 1, ['a']),
+            'c': (lambda results: results['a'] + results['b'], ['a', 'b']),
+        }
+        outcomes = _run_graph(tasks, 4)
+        self.assertEqual(outcomes['c'], (3, None))
+        self.assertEqual(order, ['a', 'b'])
+
+    def test_failed_dependency(self):
+        def fail(results):
+            raise ValueError("boom")
+        outcomes = _run_graph({'a': (fail, []), 'b': (lambda results: 1, ['a']), 'c': (lambda results: 2, [])}, 2)
+        self.assertEqual(outcomes['a'][1], "ValueError: boom")
+        self.assertIn("Dependency a failed", outcomes['b'][1])
+        self.assertEqual(outcomes['c'], (2, None))
+
+    def test_independent_tasks_overlap(self):
+        tasks = {i: (lambda results: time.sleep(0.2), []) for i in range(8)}
+        start = time.perf_counter()
+        _run_graph(tasks, 8)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+class TestFlowProvisioner(unittest.TestCase):
+    def setUp(self):
+        self.server = MockTableauServer(flow_count=2, project_count=3)
+        self.server.start()
+        self.transport = TableauTransport()
+        self.tabpy_client = MagicMock()
+        self.prep_flow = TableauPrepFlow(self.server.url, 'token', 'http://localhost:9004', transport=self.transport,
+                                         lookup_cache=LookupCache(), deployment_cache=DeploymentCache(),
+                                         tabpy_client=self.tabpy_client)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.stop()
+
+    def test_provision(self):
+        spec = [{'name': f'new{i}', 'project': f'project{i % 3}', 'scripts': {'add': add, 'multiply': multiply}}
+                for i in range(6)]
+        progress = []
+        results = FlowProvisioner(self.prep_flow, max_workers=4, progress=progress.append).provision(spec)
+        self.assertEqual([result['flow'] for result in results], [entry['name'] for entry in spec])
+        self.assertTrue(all(result['error'] is None and result['created'] for result in results))
+        self.assertEqual(len(progress), 6)
+        # each script is deployed once however many flows use it
+        self.assertEqual(self.tabpy_client.deploy.call_count, 2)
+        for result in results:
+            steps = self.server.flows[result['flow_id']]['steps']
+            self.assertEqual([step['step']['name'] for step in steps], ['add', 'multiply'])
+
+        # a second run reuses the flows and leaves everything in place
+        results = FlowProvisioner(self.prep_flow).provision(spec)
+        self.assertFalse(any(result['created'] or result['deployed'] for result in results))
+        self.assertTrue(all(step['step'] == 'unchanged' for result in results for step in result['steps']))
+        self.assertEqual(self.tabpy_client.deploy.call_count, 2)
+
+    def test_flows_listed_once(self):
+        # test that the flows of the site are scanned once for the whole spec
+        urls = []
+        self.transport.add_request_hook(lambda method, url, status, elapsed: urls.append((method, url)))
+        spec = [{'name': name, 'project': 'project0'} for name in ('flow0', 'flow1', 'new0', 'new1')]
+        results = FlowProvisioner(self.prep_flow).provision(spec)
+        self.assertEqual([result['created'] for result in results], [False, False, True, True])
+        self.assertEqual([result['flow_id'] for result in results[:2]], ['flow-0', 'flow-1'])
+        scans = [url for method, url in urls if method == 'GET' and url.split('?')[0].endswith('/api/1.0/flows')]
+        self.assertEqual(len(scans), 1)
+
+    def test_deployment_cache_written_once(self):
+        spec = [{'name': f'new{i}', 'project': 'project0', 'scripts': {'add': add, 'multiply': multiply}}
+                for i in range(4)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.prep_flow.deployment_cache = DeploymentCache(os.path.join(tmpdir, 'deployments.json'))
+            with patch('TabClasses.TableauPrep.deploymentCache.os.replace', wraps=os.replace) as replace:
+                FlowProvisioner(self.prep_flow).provision(spec)
+            self.assertEqual(replace.call_count, 1)
+            cache = DeploymentCache(os.path.join(tmpdir, 'deployments.json'))
+            self.assertEqual((len(cache._entries['scripts']), len(cache._entries['steps'])), (2, 8))
+
+    def test_seconds_per_flow(self):
+        # test that each flow reports its own duration, not that of the whole spec
+        add_script_steps = self.prep_flow.add_script_steps
+
+        def slow_steps(flow_id, script_names, **kwargs):
+            if self.server.flows[flow_id]['name'] == 'slow':
+                time.sleep(0.5)
+            return add_script_steps(flow_id, script_names, **kwargs)
+
+        spec = [{'name': 'fast', 'project': 'project0', 'scripts': {'add': add}},
+                {'name': 'slow', 'project': 'project0', 'scripts': {'add': add}}]
+        with patch.object(self.prep_flow, 'add_script_steps', side_effect=slow_steps):
+            fast, slow = FlowProvisioner(self.prep_flow).provision(spec)
+        self.assertGreaterEqual(slow['seconds'], 0.5)
+        self.assertLess(fast['seconds'], slow['seconds'] - 0.25)
+
+    def test_failed_project(self):
+        spec = [{'name': 'good', 'project': 'project0', 'scripts': {'add': add}},
+                {'name': 'bad', 'project': 'missing', 'scripts': {'add': add}}]
+        results = FlowProvisioner(self.prep_flow).provision(spec)
+        self.assertIsNone(results[0]['error'])
+        self.assertIn("Project missing does not exist", results[1]['error'])
+        self.assertIsNone(results[1]['flow_id'])
+
+    def test_invalid_spec(self):
+        provisioner = FlowProvisioner(self.prep_flow)
+        with self.assertRaises(ValueError):
+            provisioner.provision([{'name': 'a', 'project': 'project0'}, {'name': 'a', 'project': 'project1'}])
+        with self.assertRaises(ValueError):
+            provisioner.provision([{'name': 'a', 'project': 'project0', 'scripts': {'f': add}},
+                                   {'name': 'b', 'project': 'project0', 'scripts': {'f': multiply}}])
+        self.tabpy_client.deploy.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Benchmarks columnar ingestion into a local Hyper process.
+
+Compares TableauDataSource.append_dataframe with the tuple-based path, which
+has to turn the DataFrame into Python tuples before bulk_append_rows can insert
+them. Run from the repository root:
+
+    python -m benchmarks.bench_columnar --rows 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import tableauhyperapi as tab_api
+
+from benchmarks.bench_hyperQuery import TABLE_NAME, open_datasource
+
+
+def make_dataframe(row_count):
+    """
+    Builds a benchmark DataFrame of (int, text, double) columns.
+    """
+    ids = np.arange(row_count, dtype='int32')
+    return pd.DataFrame({
+        'id': ids,
+        'name': pd.Series(ids).astype(str),
+        'value': ids * 0.5,
+    })
+
+
+def bench_tuples(ds, df):
+    """
+    Inserts the DataFrame as tuples, which is what append_rows requires.
+    """
+    ds.bulk_append_rows(TABLE_NAME, df.itertuples(index=False, name=None))
+
+
+def bench_columnar(ds, df):
+    """
+    Inserts the DataFrame through append_dataframe.
+    """
+    ds.append_dataframe(TABLE_NAME, df)
+
+
+def run(row_counts):
+    results = []
+    with tab_api.HyperProcess(tab_api.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                              parameters={'log_config': ''}) as hyper, \
+            tempfile.TemporaryDirectory() as tmpdir:
+        for row_count in row_counts:
+            df = make_dataframe(row_count)
+            for name, case in (('tuples', bench_tuples), ('append_dataframe', bench_columnar)):
+                ds = open_datasource(hyper, os.path.join(tmpdir, f'{name}_{row_count}.hyper'))
+                try:
+                    start = time.perf_counter()
+                    case(ds, df)
+                    elapsed = time.perf_counter() - start
+                finally:
+                    ds.connection.close()
+                results.append({'case': name, 'rows': row_count, 'seconds': elapsed,
+                                'rows_per_sec': row_count / elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 10000000])
+    args = parser.parse_args()
+
+    for result in run(args.rows):
+        print(f"{result['case']:>20} {result['rows']:>10} rows "
+              f"{result['seconds']:>9.3f} s {result['rows_per_sec']:>14,.0f} rows/sec")
+
+
+if __name__ == '__main__':
+    main()
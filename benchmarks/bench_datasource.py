@@ -0,0 +1,120 @@
+"""
+Benchmarks TableauDataSource append, update and delete operations against a local Hyper process.
+
+Every operation runs at several row counts and table widths. Run from the
+repository root:
+
+    python -m benchmarks.bench_datasource --rows 10000 100000 --widths 2 10 50
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import tableauhyperapi as tab_api
+
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+TABLE_NAME = 'bench_table'
+
+
+def make_columns(width):
+    """
+    Returns a table definition with an id column and width - 1 integer value columns.
+    """
+    columns = {'id': tab_api.SqlType.int()}
+    for i in range(1, width):
+        columns[f'value{i}'] = tab_api.SqlType.int()
+    return columns
+
+
+def make_rows(row_count, width):
+    """
+    Generates rows for a table created with make_columns.
+    """
+    return [(i,) + (i,) * (width - 1) for i in range(row_count)]
+
+
+def _fresh_datasource(pool, path, width, rows=None):
+    """
+    Opens a data source on an empty .hyper file with the benchmark table, optionally filled with rows.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    ds = TableauDataSource(path, pool=pool)
+    ds.create_table(TABLE_NAME, make_columns(width))
+    if rows is not None:
+        ds.bulk_append_rows(TABLE_NAME, rows)
+    return ds
+
+
+def _time_best(setup, operation, repeat):
+    """
+    Runs setup and then operation repeat times and returns the fastest time of the operation.
+    """
+    best = None
+    for _ in range(repeat):
+        ds = setup()
+        try:
+            start = time.perf_counter()
+            operation(ds)
+            elapsed = time.perf_counter() - start
+        finally:
+            ds.connection.close()
+            ds.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(row_counts, widths, repeat=3):
+    """
+    Runs every datasource benchmark and returns one result per case, row count and width.
+    """
+    results = []
+    with HyperConnectionPool(parameters={'log_config': ''}) as pool, tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'bench.hyper')
+        for width in widths:
+            for row_count in row_counts:
+                rows = make_rows(row_count, width)
+                empty = lambda: _fresh_datasource(pool, path, width)
+                filled = lambda: _fresh_datasource(pool, path, width, rows)
+                cases = [
+                    ('append_rows', empty, lambda ds: ds.append_rows(TABLE_NAME, rows), row_count),
+                    ('bulk_append_rows', empty, lambda ds: ds.bulk_append_rows(TABLE_NAME, rows), row_count),
+                    ('update_rows', filled,
+                     lambda ds: ds.update_rows(TABLE_NAME, f"UPDATE {TABLE_NAME} SET id = id + 1 WHERE id % 10 = 0"),
+                     row_count // 10),
+                    ('delete_rows', filled,
+                     lambda ds: ds.delete_rows(TABLE_NAME, f"DELETE FROM {TABLE_NAME} WHERE id % 10 = 1"),
+                     row_count // 10),
+                    ('update_rows_by_key', filled,
+                     lambda ds: ds.update_rows_by_key(TABLE_NAME, [(row[0], row[1:]) for row in rows[::10]],
+                                                      ['id'], list(make_columns(width))[1:]),
+                     row_count // 10),
+                    ('delete_rows_by_key', filled,
+                     lambda ds: ds.delete_rows_by_key(TABLE_NAME, [row[0] for row in rows[1::10]], ['id']),
+                     row_count // 10),
+                ]
+                for name, setup, operation, affected in cases:
+                    seconds = _time_best(setup, operation, repeat)
+                    results.append({'suite': 'datasource', 'case': name,
+                                    'params': {'rows': row_count, 'width': width},
+                                    'seconds': seconds, 'rate': affected / seconds, 'unit': 'rows/sec'})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--widths', type=int, nargs='+', default=[2, 10, 50])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(args.rows, args.widths, args.repeat):
+        print(f"{result['case']:>20} {result['params']['rows']:>10} rows {result['params']['width']:>4} cols "
+              f"{result['seconds']:>9.3f} s {result['rate']:>14,.0f} {result['unit']}")
+
+
+if __name__ == '__main__':
+    main()
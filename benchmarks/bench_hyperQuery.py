@@ -0,0 +1,98 @@
+"""
+Benchmarks row ingestion into a local Hyper process.
+
+Compares the row-at-a-time insert path with TableauDataSource.bulk_append_rows
+and prints rows/sec for each. Run from the repository root:
+
+    python -m benchmarks.bench_hyperQuery --rows 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import tableauhyperapi as tab_api
+
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+TABLE_NAME = 'bench_table'
+
+
+def make_rows(row_count):
+    """
+    Generates benchmark rows of (int, text, double).
+    """
+    return ((i, f'name{i}', i * 0.5) for i in range(row_count))
+
+
+def open_datasource(hyper, path):
+    """
+    Opens a TableauDataSource on a fresh .hyper file with the benchmark table.
+    """
+    ds = TableauDataSource(path)
+    ds.connection = tab_api.Connection(hyper.endpoint, path, tab_api.CreateMode.CREATE_AND_REPLACE)
+    ds.connection.catalog.create_table(tab_api.TableDefinition(
+        tab_api.TableName(TABLE_NAME),
+        [tab_api.TableDefinition.Column('id', tab_api.SqlType.int()),
+         tab_api.TableDefinition.Column('name', tab_api.SqlType.text()),
+         tab_api.TableDefinition.Column('value', tab_api.SqlType.double())]))
+    return ds
+
+
+def bench_row_at_a_time(ds, row_count):
+    """
+    Inserts one row per statement, which is what append_rows does today.
+    """
+    table = tab_api.TableName(TABLE_NAME)
+    ds.connection.execute_command("BEGIN TRANSACTION")
+    for row in make_rows(row_count):
+        ds.connection.execute_command(
+            f"INSERT INTO {table} VALUES ({row[0]}, {tab_api.escape_string_literal(row[1])}, {row[2]})")
+    ds.connection.execute_command("COMMIT")
+
+
+def bench_bulk(ds, row_count, batch_size, flush_size):
+    """
+    Inserts rows through bulk_append_rows.
+    """
+    ds.bulk_append_rows(TABLE_NAME, make_rows(row_count), batch_size=batch_size, flush_size=flush_size)
+
+
+def run(row_counts, batch_size, flush_size, max_row_at_a_time):
+    results = []
+    with tab_api.HyperProcess(tab_api.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+                              parameters={'log_config': ''}) as hyper, \
+            tempfile.TemporaryDirectory() as tmpdir:
+        for row_count in row_counts:
+            cases = [('bulk_append_rows', lambda ds: bench_bulk(ds, row_count, batch_size, flush_size))]
+            if row_count <= max_row_at_a_time:
+                cases.insert(0, ('row_at_a_time', lambda ds: bench_row_at_a_time(ds, row_count)))
+            for name, case in cases:
+                ds = open_datasource(hyper, os.path.join(tmpdir, f'{name}_{row_count}.hyper'))
+                try:
+                    start = time.perf_counter()
+                    case(ds)
+                    elapsed = time.perf_counter() - start
+                finally:
+                    ds.connection.close()
+                results.append({'case': name, 'rows': row_count, 'seconds': elapsed,
+                                'rows_per_sec': row_count / elapsed})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--flush-size', type=int, default=100000)
+    parser.add_argument('--max-row-at-a-time', type=int, default=10000,
+                        help='skip the row-at-a-time case above this row count')
+    args = parser.parse_args()
+
+    for result in run(args.rows, args.batch_size, args.flush_size, args.max_row_at_a_time):
+        print(f"{result['case']:>20} {result['rows']:>10} rows "
+              f"{result['seconds']:>9.3f} s {result['rows_per_sec']:>14,.0f} rows/sec")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmarks file size and query times of an extract before and after TableOptimizer rewrites it.
+
+The table is loaded in random order with wide types, then copied into a
+fresh file in the recommended sort order with the recommended types. Run
+from the repository root:
+
+    python -m benchmarks.bench_optimizer --rows 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+
+import tableauhyperapi as tab_api
+
+from TabClasses.HyperAPI.extractOptimizer import TableOptimizer
+from TabClasses.HyperAPI.extractSnapshot import ShadowExtract
+from TabClasses.HyperAPI.hyperPool import HyperConnectionPool
+from TabClasses.HyperAPI.hyperQuery import TableauDataSource
+
+TABLE_NAME = 'events'
+COLUMNS = {
+    'id': tab_api.SqlType.big_int(),
+    'region': tab_api.SqlType.text(),
+    'category': tab_api.SqlType.big_int(),
+    'amount': tab_api.SqlType.double(),
+    'day': tab_api.SqlType.timestamp(),
+    'value': tab_api.SqlType.double(),
+}
+QUERIES = {
+    'filter_region': f"SELECT SUM(amount) FROM {TABLE_NAME} WHERE region = 'north'",
+    'filter_day': f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE day BETWEEN '2023-03-01' AND '2023-03-07'",
+    'group_category': f"SELECT category, AVG(value) FROM {TABLE_NAME} GROUP BY category",
+}
+
+
+def make_rows(row_count, seed=0):
+    """
+    Generates rows in random order with a few low-cardinality columns.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2023, 1, 1)
+    regions = ['north', 'south', 'east', 'west', 'central']
+    rows = [(i, rng.choice(regions), rng.randint(0, 49), float(rng.randint(0, 1000)),
+             start + datetime.timedelta(days=rng.randint(0, 364)), rng.random()) for i in range(row_count)]
+    rng.shuffle(rows)
+    return rows
+
+
+def run(row_counts, repeat=5):
+    """
+    Runs the optimizer benchmark and returns one result per query and file size, before and after.
+    """
+    results = []
+    with HyperConnectionPool(parameters={'log_config': ''}) as pool, tempfile.TemporaryDirectory() as tmpdir:
+        for row_count in row_counts:
+            path = os.path.join(tmpdir, f'bench_{row_count}.hyper')
+            with TableauDataSource(path, pool=pool) as ds:
+                ds.create_table(TABLE_NAME, COLUMNS)
+                ds.bulk_append_rows(TABLE_NAME, make_rows(row_count))
+                report = TableOptimizer(ds).report(TABLE_NAME, filter_columns=['day'])
+            pool.discard(path)
+            measurements = {'before': _measure(pool, path, repeat)}
+
+            with ShadowExtract(path, pool=pool, clone=False) as shadow:
+                TableOptimizer(shadow).optimize(TABLE_NAME, sort_key=report['sort_key'], types=report['types'],
+                                                source_database=path)
+            measurements['after'] = _measure(pool, path, repeat)
+
+            for stage, (file_bytes, timings) in measurements.items():
+                results.append({'suite': 'optimizer', 'case': f'file_size_{stage}', 'params': {'rows': row_count},
+                                'seconds': 0.0, 'rate': row_count / (file_bytes / 2 ** 20), 'unit': 'rows/MiB',
+                                'bytes': file_bytes})
+                for name, seconds in timings.items():
+                    results.append({'suite': 'optimizer', 'case': f'{name}_{stage}', 'params': {'rows': row_count},
+                                    'seconds': seconds, 'rate': row_count / seconds, 'unit': 'rows/sec'})
+    return results
+
+
+def _measure(pool, path, repeat):
+    """
+    Returns the size of a file and the fastest time of every query against it.
+    """
+    with TableauDataSource(path, pool=pool) as ds:
+        timings = TableOptimizer(ds).benchmark(QUERIES, repeat=repeat)
+    pool.discard(path)
+    return os.path.getsize(path), timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for result in run(args.rows, args.repeat):
+        detail = f"{result['bytes']:>14,} bytes" if 'bytes' in result else f"{result['seconds']:>12.4f} s"
+        print(f"{result['case']:>22} {result['params']['rows']:>10} rows {detail} "
+              f"{result['rate']:>14,.0f} {result['unit']}")
+
+
+if __name__ == '__main__':
+    main()
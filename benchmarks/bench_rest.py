@@ -0,0 +1,79 @@
+"""
+Benchmarks the TableauScheduler and TableauPrepFlow REST calls against a local mock server.
+
+The mock server adds a fixed latency to every request. Name lookups are
+measured without the lookup cache, so they time the requests, and again
+with a warm cache as separate '(cached)' cases. Run from the repository
+root:
+
+    python -m benchmarks.bench_rest --calls 50 --latency 0.005
+"""
+import argparse
+import time
+
+from TabClasses.RestClient.lookupCache import LookupCache
+from TabClasses.SchedulerClass.jobSchedule import TableauScheduler
+from TabClasses.TableauPrep.tabPrep import TableauPrepFlow
+from benchmarks.mockTableauServer import MockTableauServer
+
+
+def _cases(scheduler, prep_flow, cached_scheduler, cached_prep_flow):
+    """
+    Returns the REST calls to benchmark as (name, callable) pairs.
+    """
+    return [
+        ('TableauScheduler.get_site_id', scheduler.get_site_id),
+        ('TableauScheduler.get_all_jobs', scheduler.get_all_jobs),
+        ('TableauScheduler.get_job_id', lambda: scheduler.get_job_id('job99')),
+        ('TableauScheduler.search_jobs_by_id', lambda: scheduler.search_jobs_by_id('schedule-0')),
+        ('TableauScheduler.run_job', lambda: scheduler.run_job('schedule-0')),
+        ('TableauScheduler.schedule_job',
+         lambda: scheduler.schedule_job('bench', 60, '2023-02-23T12:00:00Z', '/path/to/script.py', ['arg'])),
+        ('TableauPrepFlow.get_flow_ids', lambda: prep_flow.get_flow_ids('flow99')),
+        ('TableauPrepFlow.get_project_id', lambda: prep_flow.get_project_id('project19')),
+        ('TableauPrepFlow.create_flow', lambda: prep_flow.create_flow('bench', '', 'project19')),
+        ('TableauScheduler.get_job_id (cached)', lambda: cached_scheduler.get_job_id('job99')),
+        ('TableauPrepFlow.get_flow_ids (cached)', lambda: cached_prep_flow.get_flow_ids('flow99')),
+        ('TableauPrepFlow.get_project_id (cached)', lambda: cached_prep_flow.get_project_id('project19')),
+    ]
+
+
+def run(calls=50, latency=0.005, repeat=3):
+    """
+    Runs every REST benchmark and returns one result per call type.
+    """
+    results = []
+    with MockTableauServer(latency=latency) as server:
+        # entries of a cache with a time-to-live of zero expire at once, so every lookup goes to the server
+        scheduler = TableauScheduler(server.url, 'bench-token', lookup_cache=LookupCache(ttl=0))
+        prep_flow = TableauPrepFlow(server.url, 'bench-token', 'http://localhost:9004',
+                                    lookup_cache=LookupCache(ttl=0))
+        cached_scheduler = TableauScheduler(server.url, 'bench-token', lookup_cache=LookupCache())
+        cached_prep_flow = TableauPrepFlow(server.url, 'bench-token', 'http://localhost:9004',
+                                           lookup_cache=LookupCache())
+        for name, call in _cases(scheduler, prep_flow, cached_scheduler, cached_prep_flow):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(calls):
+                    call()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results.append({'suite': 'rest', 'case': name, 'params': {'calls': calls, 'latency': latency},
+                            'seconds': best, 'rate': calls / best, 'unit': 'calls/sec'})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for result in run(args.calls, args.latency, args.repeat):
+        print(f"{result['case']:>40} {result['seconds']:>9.3f} s {result['rate']:>10,.1f} {result['unit']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+A local mock of the Tableau Server REST endpoints used by TableauScheduler and TableauPrepFlow.
+
+Every request sleeps for a configurable latency before it is answered, so
+benchmarks can measure client overhead under realistic round-trip times.
+"""
+import collections
+import datetime
+import http.server
+import json
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+
+
+class MockTableauServer:
+    """
+    An in-memory Tableau Server that runs on a local port in a background thread.
+    """
+
+    def __init__(self, latency=0.0, schedule_count=100, flow_count=100, project_count=20, site_id='mock-site',
+                 rate_limit=None, job_queue_seconds=0.0, job_run_seconds=0.0):
+        """
+        Constructor for the MockTableauServer class.
+
+        Parameters:
+            latency (float): The number of seconds every request waits before it is answered.
+            schedule_count (int): The number of schedules the server starts with.
+            flow_count (int): The number of flows the server starts with.
+            project_count (int): The number of projects the server starts with.
+            site_id (str): The ID of the site returned by auth/whoami.
+            rate_limit (int): The number of requests per second answered before the server responds with 429.
+                None answers every request.
+            job_queue_seconds (float): The number of seconds a job started by runNow waits before it starts.
+            job_run_seconds (float): The number of seconds a job started by runNow runs.
+        """
+        self.latency = latency
+        self.site_id = site_id
+        self.schedules = {f'schedule-{i}': {'id': f'schedule-{i}', 'name': f'job{i}', 'state': 'Active',
+                                            'frequency': {'intervalInMinutes': 60}}
+                          for i in range(schedule_count)}
+        self.flows = {f'flow-{i}': {'id': f'flow-{i}', 'name': f'flow{i}', 'steps': []} for i in range(flow_count)}
+        self.projects = {f'project-{i}': {'id': f'project-{i}', 'name': f'project{i}'} for i in range(project_count)}
+        self.jobs = {}
+        self.job_queue_seconds = job_queue_seconds
+        self.job_run_seconds = job_run_seconds
+        self.request_count = 0
+        self.connection_count = 0
+        self.rate_limit = rate_limit
+        self.throttled_count = 0
+        self._recent = collections.deque()
+        self._injected = collections.deque()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self.url = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Starts the server on a free local port.
+        """
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def inject(self, status, count=1, retry_after=None):
+        """
+        Makes the next requests fail with a status code.
+
+        Parameters:
+            status (int): The status code to respond with, e.g. 429 or 503.
+            count (int): The number of requests that fail.
+            retry_after (str): The value of the Retry-After header of the failed responses.
+        """
+        with self._lock:
+            self._injected.extend([(status, retry_after)] * count)
+
+    def handle(self, method, path, body, query=None):
+        """
+        Answers one request.
+
+        Parameters:
+            method (str): The HTTP method.
+            path (str): The request path.
+            body (dict): The decoded JSON body, or None.
+            query (dict): The query parameters. pageSize and pageNumber paginate list endpoints.
+
+        Returns:
+            tuple: The HTTP status code, the JSON-serializable response body and the extra response headers.
+        """
+        with self._lock:
+            self.request_count += 1
+            now = time.monotonic()
+            if self._injected:
+                status, retry_after = self._injected.popleft()
+                return status, {'error': 'injected'}, {'Retry-After': retry_after} if retry_after else {}
+            if self.rate_limit is not None:
+                while self._recent and self._recent[0] < now - 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.throttled_count += 1
+                    return 429, {'error': 'rate limit exceeded'}, {}
+                self._recent.append(now)
+        if self.latency:
+            time.sleep(self.latency)
+
+        site = r'/api/3\.1[01]/sites/[^/]+'
+        routes = [
+            ('GET', r'/api/3\.10/auth/whoami', lambda m: (200, {'site': {'id': self.site_id}})),
+            ('GET', site + r'/schedules', lambda m: self._list('schedules', self.schedules, query)),
+            ('POST', site + r'/schedules', lambda m: self._create(self.schedules, body)),
+            ('GET', site + r'/schedules/([^/]+)', lambda m: self._get(self.schedules, m.group(1))),
+            ('PUT', site + r'/schedules/([^/]+)', lambda m: self._update(self.schedules, m.group(1), body)),
+            ('DELETE', site + r'/schedules/([^/]+)', lambda m: self._delete(self.schedules, m.group(1))),
+            ('POST', site + r'/schedules/([^/]+)/runNow', lambda m: self._run_now(m.group(1))),
+            ('GET', site + r'/jobs', lambda m: self._query_jobs(query)),
+            ('GET', r'/api/1\.0/flows', lambda m: self._list('flows', self.flows, query)),
+            ('POST', site + r'/flows', lambda m: self._create(self.flows, body)),
+            ('POST', r'/api/1\.0/flows/([^/]+)/steps', lambda m: self._add_step(m.group(1), body)),
+            ('PUT', r'/api/1\.0/flows/([^/]+)/steps/([^/]+)',
+             lambda m: self._update_step(m.group(1), m.group(2), body)),
+            ('GET', site + r'/projects', lambda m: self._list('projects', self.projects, query)),
+            ('GET', site + r'/projects/([^/]+)/permissions', lambda m: self._get(self.projects, m.group(1))),
+        ]
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                return handler(match) + ({},)
+        return 404, {'error': f'No route for {method} {path}'}, {}
+
+    def _list(self, key, collection, query):
+        items = list(collection.values())
+        if not query or 'pageSize' not in query:
+            return 200, {key: items}
+        page_size = int(query['pageSize'])
+        page_number = int(query.get('pageNumber', 1))
+        page = items[(page_number - 1) * page_size:page_number * page_size]
+        return 200, {'pagination': {'pageNumber': str(page_number), 'pageSize': str(page_size),
+                                    'totalAvailable': str(len(items))}, key: page}
+
+    def _create(self, collection, body):
+        item = dict(body or {}, id=str(uuid.uuid4()))
+        with self._lock:
+            collection[item['id']] = item
+        return 201, item
+
+    def _run_now(self, schedule_id):
+        if schedule_id not in self.schedules:
+            return 404, {'error': f'{schedule_id} not found'}
+        job = {'id': str(uuid.uuid4()), 'created': time.time()}
+        with self._lock:
+            self.jobs[job['id']] = job
+        return 202, {'job': self._job_status(job)}
+
+    def _job_status(self, job):
+        """
+        Returns the state of a job, derived from the time since it was created.
+        """
+        def timestamp(seconds):
+            return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+
+        status = {'id': job['id'], 'createdAt': timestamp(job['created']), 'progress': 0}
+        started = job['created'] + self.job_queue_seconds
+        completed = started + self.job_run_seconds
+        now = time.time()
+        if now >= started:
+            status['startedAt'] = timestamp(started)
+        if now >= completed:
+            status.update(completedAt=timestamp(completed), finishCode=job.get('finishCode', 0), progress=100)
+        return status
+
+    def _query_jobs(self, query):
+        # only the id:in:[...] filter is supported
+        match = re.fullmatch(r'id:in:\[(.*)\]', (query or {}).get('filter', ''))
+        job_ids = match.group(1).split(',') if match else list(self.jobs)
+        return 200, {'backgroundJobs': [self._job_status(self.jobs[job_id]) for job_id in job_ids
+                                        if job_id in self.jobs]}
+
+    def _get(self, collection, item_id):
+        item = collection.get(item_id)
+        return (200, item) if item is not None else (404, {'error': f'{item_id} not found'})
+
+    def _update(self, collection, item_id, body):
+        with self._lock:
+            if item_id not in collection:
+                return 404, {'error': f'{item_id} not found'}
+            collection[item_id].update(body or {})
+            return 200, collection[item_id]
+
+    def _delete(self, collection, item_id):
+        with self._lock:
+            item = collection.pop(item_id, None)
+        return (204, None) if item is not None else (404, {'error': f'{item_id} not found'})
+
+    def _update_step(self, flow_id, step_id, body):
+        with self._lock:
+            flow = self.flows.get(flow_id)
+            if flow is None:
+                return 404, {'error': f'{flow_id} not found'}
+            for i, step in enumerate(flow['steps']):
+                if step['step']['id'] == step_id:
+                    flow['steps'][i] = body
+                    return 200, body
+        return 404, {'error': f'{step_id} not found'}
+
+    def _add_step(self, flow_id, body):
+        with self._lock:
+            flow = self.flows.get(flow_id)
+            if flow is None:
+                return 404, {'error': f'{flow_id} not found'}
+            # a body with a list of steps adds them all
+            flow.setdefault('steps', []).extend(body['steps'] if 'steps' in body else [body])
+        return 201, body
+
+
+def _make_handler(server):
+    """
+    Builds a request handler class bound to a MockTableauServer.
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        # HTTP/1.1 keeps connections open so clients can reuse them
+        protocol_version = 'HTTP/1.1'
+        # Send headers and body in one segment without waiting for delayed ACKs
+        disable_nagle_algorithm = True
+        wbufsize = -1
+
+        def setup(self):
+            super().setup()
+            with server._lock:
+                server.connection_count += 1
+
+        def _respond(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            url = urllib.parse.urlsplit(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            status, payload, headers = server.handle(self.command, url.path, body, query)
+            data = json.dumps(payload).encode() if payload is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,109 @@
+"""
+Runs the benchmark suite and writes machine-readable results.
+
+Results are written as JSON. When a baseline results file is given, every
+case that got slower than the baseline by more than the tolerance is
+reported and the exit code is 1. Run from the repository root:
+
+    python -m benchmarks.run_suite --output results.json
+    python -m benchmarks.run_suite --quick --baseline results.json --tolerance 0.25
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+import tableauhyperapi as tab_api
+
+from benchmarks import bench_columnar, bench_datasource, bench_optimizer, bench_rest
+
+
+def _key(result):
+    return result['suite'], result['case'], tuple(sorted(result['params'].items()))
+
+
+def run(quick=False):
+    """
+    Runs every benchmark of the suite.
+
+    Parameters:
+        quick (bool): Use small row counts and few calls, e.g. for CI.
+
+    Returns:
+        dict: The environment the suite ran in and the list of results.
+    """
+    if quick:
+        datasource = bench_datasource.run([1000, 10000], [2, 10], repeat=2)
+        columnar = bench_columnar.run([100000])
+        rest = bench_rest.run(calls=20, latency=0.002, repeat=2)
+        optimizer = bench_optimizer.run([100000], repeat=2)
+    else:
+        datasource = bench_datasource.run([10000, 100000, 1000000], [2, 10, 50])
+        columnar = bench_columnar.run([1000000])
+        rest = bench_rest.run(calls=100, latency=0.005)
+        optimizer = bench_optimizer.run([1000000])
+
+    results = datasource + rest + optimizer
+    for result in columnar:
+        results.append({'suite': 'columnar', 'case': result['case'], 'params': {'rows': result['rows']},
+                        'seconds': result['seconds'], 'rate': result['rows_per_sec'], 'unit': 'rows/sec'})
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'hyperapi': str(tab_api.VERSION),
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Finds the cases whose rate dropped by more than tolerance compared to a baseline.
+
+    Parameters:
+        results (dict): The output of run.
+        baseline (dict): The output of an earlier run.
+        tolerance (float): The allowed relative slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list of dict: One entry per regressed case with its baseline and current rate.
+    """
+    baseline_rates = {_key(result): result['rate'] for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        baseline_rate = baseline_rates.get(_key(result))
+        if baseline_rate and result['rate'] < baseline_rate * (1 - tolerance):
+            regressions.append({'suite': result['suite'], 'case': result['case'], 'params': result['params'],
+                                'baseline_rate': baseline_rate, 'rate': result['rate'], 'unit': result['unit']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare the results with this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--quick', action='store_true', help='use small row counts and few calls')
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    for result in results['results']:
+        print(f"{result['suite']:>10} {result['case']:>36} {json.dumps(result['params']):>32} "
+              f"{result['rate']:>14,.1f} {result['unit']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression['suite']} {regression['case']} {json.dumps(regression['params'])}: "
+                  f"{regression['rate']:,.1f} {regression['unit']} vs {regression['baseline_rate']:,.1f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()